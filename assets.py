@@ -0,0 +1,328 @@
+import argparse
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import struct
+
+from typing import TYPE_CHECKING, BinaryIO, Dict, List, NamedTuple, Optional, Union
+
+from PIL import Image, ImageOps
+
+from static_values import ASSET_ARCHIVE_PATH, ASSETS_DIRECTORY
+
+if TYPE_CHECKING:
+    from arcade import Texture
+
+logger = logging.getLogger(__name__)
+
+# The start of an archive, followed by the length of the index
+ARCHIVE_MAGIC = b"ICEPACK1"
+ARCHIVE_HEADER = struct.Struct("<8sI")
+# arcade's map loader reads the maps and tilesheets by their paths, so these are always loose files
+LOOSE_DIRECTORIES = ("maps", "tilesheets")
+
+
+class AssetEntryTuple(NamedTuple):
+    # From the end of the index
+    offset: int
+    size: int
+    # sha256 of the file, as hex
+    digest: str
+
+
+class AssetReader(io.RawIOBase):
+    """
+    A read only file over part of the archive. Reads are sliced straight from the mapped archive,
+    so opening an image doesn't copy the whole file first
+    """
+
+    def __init__(self, view: memoryview) -> None:
+        super().__init__()
+        self.view = view
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.view)
+        self.position = max(0, offset)
+        return self.position
+
+    def readinto(self, buffer: Union[bytearray, memoryview]) -> int:  # type: ignore
+        data = self.view[self.position : self.position + len(buffer)]
+        size = len(data)
+        memoryview(buffer).cast("B")[:size] = data
+        self.position += size
+        return size
+
+
+def asset_name(path: str) -> str:
+    """
+    The name an asset is stored under, its path relative to the assets directory with forward slashes
+
+    Args:
+        path (str): The path, relative to the assets directory
+
+    Returns:
+        str
+    """
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def build_archive(directory: str, archive_path: str) -> int:
+    """
+    Pack the assets into one file. The header is followed by a json index of the offset, size and hash
+    of each file, then the files one after another. Maps and tilesheets are left out.
+
+    Args:
+        directory (str): The assets directory
+        archive_path (str): Where to write the archive
+
+    Returns:
+        int: How many files were packed
+    """
+    files: List[str] = []
+    for root, directories, file_names in os.walk(directory):
+        directories[:] = sorted(
+            name
+            for name in directories
+            if asset_name(os.path.relpath(os.path.join(root, name), directory))
+            not in LOOSE_DIRECTORIES
+        )
+        files.extend(os.path.join(root, name) for name in sorted(file_names))
+
+    index = {}
+    contents = []
+    # Offsets are from the end of the index, so they don't depend on its size
+    offset = 0
+    for path in files:
+        with open(path, "rb") as file:
+            data = file.read()
+        name = asset_name(os.path.relpath(path, directory))
+        index[name] = [offset, len(data), hashlib.sha256(data).hexdigest()]
+        contents.append(data)
+        offset += len(data)
+    index_bytes = json.dumps(index).encode()
+
+    temporary_path = f"{archive_path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, len(index_bytes)))
+        file.write(index_bytes)
+        for data in contents:
+            file.write(data)
+    os.replace(temporary_path, archive_path)
+    return len(files)
+
+
+class Assets:
+    """
+    Reads the game's assets, from the packed archive when there is one, so starting the game opens one file
+    rather than every image. Assets that aren't in the archive, or every asset when `GAME_LOOSE_ASSETS` is set
+    or the archive hasn't been built, are read from the assets directory instead, so they can be changed
+    during development without building the archive again.
+    Paths are relative to the assets directory, and don't depend on the working directory.
+    """
+
+    def __init__(self, directory: str, archive_path: Optional[str] = None) -> None:
+        """
+        Open the archive
+
+        Args:
+            directory (str): The assets directory
+            archive_path (Optional[str], optional): The packed archive. Defaults to only reading loose files.
+        """
+        self.directory = directory
+        self.index: Dict[str, AssetEntryTuple] = {}
+        self.data: Optional[mmap.mmap] = None
+        # Where the files start in the archive, after the index
+        self.data_start = 0
+        self.textures: Dict[str, "Texture"] = {}
+        if archive_path is not None and not os.environ.get("GAME_LOOSE_ASSETS"):
+            self.open_archive(archive_path)
+
+    def open_archive(self, archive_path: str) -> None:
+        """
+        Map the archive into memory and read its index
+
+        Args:
+            archive_path (str)
+        """
+        try:
+            with open(archive_path, "rb") as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            logger.info("There is no asset archive, loose files are used")
+            return
+        except (OSError, ValueError) as error:
+            logger.warning("Could not open the asset archive: %s", error)
+            return
+
+        try:
+            magic, index_size = ARCHIVE_HEADER.unpack_from(data)
+            if magic != ARCHIVE_MAGIC:
+                raise ValueError("it isn't an asset archive")
+            start = ARCHIVE_HEADER.size
+            index = json.loads(bytes(data[start : start + index_size]))
+            self.data_start = start + index_size
+        except (struct.error, ValueError) as error:
+            logger.warning("Could not read the asset archive: %s", error)
+            data.close()
+            return
+        self.index = {name: AssetEntryTuple(*entry) for name, entry in index.items()}
+        self.data = data
+
+    def path(self, name: str) -> str:
+        """
+        The path of a loose asset, for the loaders that need a file
+
+        Args:
+            name (str): The path relative to the assets directory
+
+        Returns:
+            str
+        """
+        return os.path.join(self.directory, name)
+
+    def view(self, name: str) -> Optional[memoryview]:
+        """
+        The part of the archive an asset is in, without copying it
+
+        Args:
+            name (str): The path relative to the assets directory
+
+        Returns:
+            Optional[memoryview]: The view, or None if the asset isn't in the archive
+        """
+        entry = self.index.get(asset_name(name))
+        if entry is None or self.data is None:
+            return None
+        start = self.data_start + entry.offset
+        return memoryview(self.data)[start : start + entry.size]
+
+    def read(self, name: str) -> Union[memoryview, bytes]:
+        """
+        Read an asset
+
+        Args:
+            name (str): The path relative to the assets directory
+
+        Raises:
+            FileNotFoundError: If the asset doesn't exist
+
+        Returns:
+            Union[memoryview, bytes]: A view of the archive, or the contents of the loose file
+        """
+        view = self.view(name)
+        if view is not None:
+            return view
+        with open(self.path(name), "rb") as file:
+            return file.read()
+
+    def open(self, name: str) -> BinaryIO:
+        """
+        Open an asset as a file
+
+        Args:
+            name (str): The path relative to the assets directory
+
+        Returns:
+            BinaryIO
+        """
+        view = self.view(name)
+        if view is not None:
+            return io.BufferedReader(AssetReader(view))  # type: ignore
+        return open(self.path(name), "rb")
+
+    def load_texture(self, name: str, flipped_horizontally: bool = False) -> "Texture":
+        """
+        Load an image as a texture. Textures are cached, so each image is only decoded once
+
+        Args:
+            name (str): The path relative to the assets directory
+            flipped_horizontally (bool, optional): Mirror the image. Defaults to False.
+
+        Returns:
+            Texture
+        """
+        # Imported here so that building the archive doesn't need a display
+        from arcade import Texture
+
+        key = f"{asset_name(name)}{'-flipped' if flipped_horizontally else ''}"
+        texture = self.textures.get(key)
+        if texture is None:
+            # The file is closed as well as the image, Image.open only closes files it opened itself
+            with self.open(name) as file, Image.open(file) as image:
+                image = image.convert("RGBA")
+            if flipped_horizontally:
+                image = ImageOps.mirror(image)
+            texture = Texture(key, image)
+            self.textures[key] = texture
+        return texture
+
+    def verify(self) -> List[str]:
+        """
+        Check the archive against the loose files
+
+        Returns:
+            List[str]: The assets that have changed, or are missing from the archive or the assets directory
+        """
+        changed = []
+        packed = set(self.index)
+        for root, directories, file_names in os.walk(self.directory):
+            relative_root = os.path.relpath(root, self.directory)
+            directories[:] = [
+                name
+                for name in directories
+                if asset_name(os.path.join(relative_root, name))
+                not in LOOSE_DIRECTORIES
+            ]
+            for file_name in file_names:
+                name = asset_name(os.path.join(relative_root, file_name))
+                entry = self.index.get(name)
+                packed.discard(name)
+                with open(os.path.join(root, file_name), "rb") as file:
+                    digest = hashlib.sha256(file.read()).hexdigest()
+                if entry is None or entry.digest != digest:
+                    changed.append(name)
+        return sorted(changed + list(packed))
+
+
+assets = Assets(ASSETS_DIRECTORY, ASSET_ARCHIVE_PATH)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Pack the assets into one archive, so the game starts faster"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="List the assets that have changed since the archive was built",
+    )
+    args = parser.parse_args()
+
+    if args.check:
+        changed = assets.verify()
+        for name in changed:
+            print(name)
+        print(f"{len(changed)} assets have changed")
+        return
+    count = build_archive(ASSETS_DIRECTORY, ASSET_ARCHIVE_PATH)
+    print(f"Packed {count} assets into {ASSET_ARCHIVE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+import hashlib
+import logging
+import math
+import os
+import shutil
+
+from concurrent.futures import ThreadPoolExecutor
+from string import hexdigits
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from arcade import SpriteList, get_window
+from arcade.gl.geometry import quad_2d
+from PIL import Image
+
+from hot_reload import read_tileset_ranges
+
+logger = logging.getLogger(__name__)
+
+# The width and height of a page, in pixels
+PAGE_SIZE = 2048
+# Part of the cache key, so pages baked by an older version of the game aren't used
+BAKE_VERSION = 3
+# Seconds the map has to stay the same after an edit before its pages are baked again
+REBAKE_DELAY = 1.0
+
+PAGE_VERTEX_SHADER = """
+#version 330
+
+uniform Projection {
+    uniform mat4 matrix;
+} proj;
+
+in vec2 in_vert;
+in vec2 in_uv;
+out vec2 v_uv;
+
+void main() {
+    gl_Position = proj.matrix * vec4(in_vert, 0.0, 1.0);
+    // The images are uploaded from the top row, textures start from the bottom
+    v_uv = vec2(in_uv.x, 1.0 - in_uv.y);
+}
+"""
+
+PAGE_FRAGMENT_SHADER = """
+#version 330
+
+uniform sampler2D page;
+in vec2 v_uv;
+out vec4 f_color;
+
+void main() {
+    f_color = texture(page, v_uv);
+}
+"""
+
+
+def map_hash(map_path: str) -> str:
+    """
+    Hash a map and the tilesheets it uses, so the pages are baked again when any of them change
+
+    Args:
+        map_path (str): Path to the tmx file
+
+    Returns:
+        str: The hash, as hex
+    """
+    digest = hashlib.sha256(str(BAKE_VERSION).encode())
+    paths = [map_path]
+    for tileset in read_tileset_ranges(map_path):
+        paths.append(tileset.path)
+        if tileset.image_path:
+            paths.append(tileset.image_path)
+    for path in paths:
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def map_directory_name(map_path: str) -> str:
+    """
+    The directory the pages of every version of a map are kept under, from its name and where it is
+
+    Args:
+        map_path (str): Path to the tmx file
+
+    Returns:
+        str
+    """
+    name = os.path.splitext(os.path.basename(map_path))[0]
+    path_hash = hashlib.sha256(os.path.abspath(map_path).encode()).hexdigest()
+    return f"{name}_{path_hash[:12]}"
+
+
+def page_cells(width: float, height: float) -> List[Tuple[int, int]]:
+    """
+    The column and row of every page a map covers
+
+    Args:
+        width (float): The width of the map, in pixels
+        height (float): The height of the map, in pixels
+
+    Returns:
+        List[Tuple[int, int]]
+    """
+    return [
+        (column, row)
+        for column in range(math.ceil(width / PAGE_SIZE))
+        for row in range(math.ceil(height / PAGE_SIZE))
+    ]
+
+
+def create_page_framebuffer() -> Any:
+    ctx = get_window().ctx
+    return ctx.framebuffer(
+        color_attachments=[ctx.texture((PAGE_SIZE, PAGE_SIZE), components=4)]
+    )
+
+
+def bake_page(
+    framebuffer: Any,
+    sprites: SpriteList,
+    column: int,
+    row: int,
+    width: float,
+    height: float,
+) -> Optional[Tuple[Tuple[int, int], Image.Image]]:
+    """
+    Draw the sprites into a page
+
+    Args:
+        framebuffer (Framebuffer): From `create_page_framebuffer`
+        sprites (SpriteList)
+        column (int)
+        row (int)
+        width (float): The width of the map, in pixels
+        height (float): The height of the map, in pixels
+
+    Returns:
+        Optional[Tuple[Tuple[int, int], Image.Image]]: The page cropped to what's in it, with the left and bottom
+            of the cropped image in the map, or None if the page is empty
+    """
+    ctx = get_window().ctx
+    left = column * PAGE_SIZE
+    bottom = row * PAGE_SIZE
+    projection = ctx.projection_2d
+    # Cleared outside of the with, as clearing binds the framebuffer again and replaces the
+    # framebuffer that is bound when the with ends, which would leave it bound for the next frames
+    framebuffer.clear()
+    try:
+        with framebuffer:
+            ctx.projection_2d = (left, left + PAGE_SIZE, bottom, bottom + PAGE_SIZE)
+            sprites.draw()
+    finally:
+        ctx.projection_2d = projection
+    image = Image.frombytes(
+        "RGBA",
+        (PAGE_SIZE, PAGE_SIZE),
+        bytes(framebuffer.read(components=4)),
+    ).transpose(Image.FLIP_TOP_BOTTOM)
+    # Pages at the edges only cover the rest of the map
+    page_width = min(PAGE_SIZE, math.ceil(width - left))
+    page_height = min(PAGE_SIZE, math.ceil(height - bottom))
+    bounds = image.crop((0, PAGE_SIZE - page_height, page_width, PAGE_SIZE)).getbbox()
+    if bounds is None:
+        return None
+    crop_left, crop_top, crop_right, crop_bottom = bounds
+    crop_top += PAGE_SIZE - page_height
+    crop_bottom += PAGE_SIZE - page_height
+    return (left + crop_left, bottom + PAGE_SIZE - crop_bottom), image.crop(
+        (crop_left, crop_top, crop_right, crop_bottom)
+    )
+
+
+class PageTuple(NamedTuple):
+    # The page's image on the GPU, and the quad it's drawn on
+    texture: Any
+    geometry: Any
+
+
+class PendingBake:
+    """
+    Pages being baked again after the map was edited, one page each update so the game doesn't stall
+    """
+
+    def __init__(
+        self,
+        cache_directory: str,
+        sprites: SpriteList,
+        width: float,
+        height: float,
+    ) -> None:
+        self.cache_directory = cache_directory
+        self.sprites = sprites
+        self.width = width
+        self.height = height
+        self.time_until_start = REBAKE_DELAY
+        self.cells = page_cells(width, height)
+        self.images: Dict[Tuple[int, int], Image.Image] = {}
+        # Created when baking starts, so edits in quick succession don't create one each
+        self.framebuffer: Any = None
+
+
+class BakedLayers:
+    """
+    The tiles that never change, drawn once into large images called pages so that each frame only
+    draws the few pages the viewport covers, rather than every tile. Pages are saved to disk on a worker thread,
+    keyed on the hash of the map, so a map is only baked the first time it's played. Only the pages of the
+    latest version of each map are kept on disk. When a map is edited, its pages are baked again a page
+    per update, once the edits stop.
+    Pages are cropped to the tiles in them, and are only kept as textures on the GPU. They're read
+    from the disk one at a time, and baked pages are only kept as images until they're saved.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        Create the pages, `load` must be called before they are drawn
+
+        Args:
+            directory (str): Where baked pages are saved
+        """
+        self.directory = directory
+        # By column and row
+        self.pages: Dict[Tuple[int, int], PageTuple] = {}
+        # Created with the first page, once there's a window
+        self.program: Any = None
+        # Pages are saved one map at a time, and are kept here by their directory until they're saved
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.unsaved: Dict[str, Dict[Tuple[int, int], Image.Image]] = {}
+        self.executor.submit(self.remove_old_layout)
+        self.pending: Optional[PendingBake] = None
+
+    def remove_old_layout(self) -> None:
+        """
+        Remove pages baked before they were kept by map, which were saved straight under the directory by their hash
+        """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if len(name) == 64 and all(character in hexdigits for character in name):
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def clear(self) -> None:
+        self.pages = {}
+        self.pending = None
+
+    def add_page(self, left: int, bottom: int, image: Image.Image) -> None:
+        """
+        Upload a page to the GPU
+
+        Args:
+            left (int): The left of the image in the map, in pixels
+            bottom (int): The bottom of the image in the map, in pixels
+            image (Image.Image): The page, cropped to what's in it
+        """
+        ctx = get_window().ctx
+        if self.program is None:
+            self.program = ctx.program(
+                vertex_shader=PAGE_VERTEX_SHADER,
+                fragment_shader=PAGE_FRAGMENT_SHADER,
+            )
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+        width, height = image.size
+        texture = ctx.texture((width, height), components=4, data=image.tobytes())
+        geometry = quad_2d((width, height), (left + width / 2, bottom + height / 2))
+        self.pages[left // PAGE_SIZE, bottom // PAGE_SIZE] = PageTuple(
+            texture, geometry
+        )
+
+    def draw_page(self, page: PageTuple) -> None:
+        ctx = get_window().ctx
+        ctx.enable(ctx.BLEND)
+        ctx.blend_func = ctx.BLEND_DEFAULT
+        page.texture.use(0)
+        page.geometry.render(self.program)
+
+    def load(
+        self, map_path: str, sprites: SpriteList, width: float, height: float
+    ) -> None:
+        """
+        Load the pages of a map from the disk, baking them if they haven't been yet
+
+        Args:
+            map_path (str): Path to the tmx file, used for the cache key
+            sprites (SpriteList): The sprites to bake
+            width (float): The width of the map, in pixels
+            height (float): The height of the map, in pixels
+        """
+        self.pending = None
+        cache_directory = self.cache_directory(map_path)
+        images = self.unsaved.get(cache_directory)
+        if images is None:
+            if self.read_pages(cache_directory):
+                return
+            images = self.bake(sprites, width, height)
+            self.save_pages_later(cache_directory, images)
+        self.pages = {}
+        for (left, bottom), image in images.items():
+            self.add_page(left, bottom, image)
+
+    def cache_directory(self, map_path: str) -> str:
+        return os.path.join(
+            self.directory, map_directory_name(map_path), map_hash(map_path)
+        )
+
+    def rebake(
+        self, map_path: str, sprites: SpriteList, width: float, height: float
+    ) -> None:
+        """
+        Bake the pages again after the map was edited. The pages are removed straight away, so the sprites are
+        drawn instead until `update` has baked the new pages
+
+        Args:
+            map_path (str): Path to the tmx file, used for the cache key
+            sprites (SpriteList): The sprites to bake
+            width (float): The width of the map, in pixels
+            height (float): The height of the map, in pixels
+        """
+        self.pages = {}
+        self.pending = PendingBake(
+            self.cache_directory(map_path), sprites, width, height
+        )
+
+    def update(self, delta_time: float) -> None:
+        """
+        Bake the next page of a pending bake, once the map has stayed the same for long enough
+
+        Args:
+            delta_time (float): The time since the last update
+        """
+        pending = self.pending
+        if pending is None:
+            return
+        pending.time_until_start -= delta_time
+        if pending.time_until_start > 0:
+            return
+        if pending.cells:
+            if pending.framebuffer is None:
+                pending.framebuffer = create_page_framebuffer()
+            column, row = pending.cells.pop()
+            page = bake_page(
+                pending.framebuffer,
+                pending.sprites,
+                column,
+                row,
+                pending.width,
+                pending.height,
+            )
+            if page is not None:
+                position, image = page
+                pending.images[position] = image
+            return
+
+        self.pending = None
+        logger.info("Baked %d pages again", len(pending.images))
+        self.save_pages_later(pending.cache_directory, pending.images)
+        for (left, bottom), image in pending.images.items():
+            self.add_page(left, bottom, image)
+
+    def bake(
+        self, sprites: SpriteList, width: float, height: float
+    ) -> Dict[Tuple[int, int], Image.Image]:
+        """
+        Draw the sprites into pages, using an offscreen framebuffer
+
+        Args:
+            sprites (SpriteList)
+            width (float): The width of the map, in pixels
+            height (float): The height of the map, in pixels
+
+        Returns:
+            Dict[Tuple[int, int], Image.Image]: Each page that has something in it cropped to what's in it,
+                by the left and bottom of the cropped image in the map
+        """
+        framebuffer = create_page_framebuffer()
+        images = {}
+        for column, row in page_cells(width, height):
+            page = bake_page(framebuffer, sprites, column, row, width, height)
+            if page is not None:
+                position, image = page
+                images[position] = image
+        logger.info("Baked %d pages", len(images))
+        return images
+
+    def read_pages(self, cache_directory: str) -> bool:
+        """
+        Read baked pages from the disk, and upload them
+
+        Args:
+            cache_directory (str): The directory of the map's pages
+
+        Returns:
+            bool: If the pages were read, False if the map hasn't been baked
+        """
+        if not os.path.isdir(cache_directory):
+            return False
+        self.pages = {}
+        try:
+            for file_name in os.listdir(cache_directory):
+                left, bottom = os.path.splitext(file_name)[0].split("_")
+                with Image.open(os.path.join(cache_directory, file_name)) as image:
+                    self.add_page(int(left), int(bottom), image)
+        except (OSError, ValueError) as error:
+            logger.warning("Could not read the baked pages, baking again: %s", error)
+            self.pages = {}
+            return False
+        return True
+
+    def save_pages_later(
+        self, cache_directory: str, images: Dict[Tuple[int, int], Image.Image]
+    ) -> None:
+        """
+        Save baked pages on the worker thread, so encoding them doesn't hold up the game
+
+        Args:
+            cache_directory (str): The directory of the map's pages
+            images (Dict[Tuple[int, int], Image.Image]): The pages from `bake`
+        """
+        self.unsaved[cache_directory] = images
+        future = self.executor.submit(self.save_pages, cache_directory, images)
+        future.add_done_callback(lambda _: self.unsaved.pop(cache_directory, None))
+
+    def save_pages(
+        self, cache_directory: str, images: Dict[Tuple[int, int], Image.Image]
+    ) -> None:
+        """
+        Save baked pages, and remove the pages of older versions of the map.
+        They are written to a temporary directory first, so a directory of pages is never half written
+
+        Args:
+            cache_directory (str): The directory of the map's pages
+            images (Dict[Tuple[int, int], Image.Image]): The pages from `bake`
+        """
+        temporary_directory = f"{cache_directory}.tmp"
+        try:
+            shutil.rmtree(temporary_directory, ignore_errors=True)
+            os.makedirs(temporary_directory)
+            for (left, bottom), image in images.items():
+                image.save(os.path.join(temporary_directory, f"{left}_{bottom}.png"))
+            # Pages that couldn't be read are replaced
+            shutil.rmtree(cache_directory, ignore_errors=True)
+            os.replace(temporary_directory, cache_directory)
+            # Only one map is saved at a time, so everything else for the map is out of date
+            map_directory = os.path.dirname(cache_directory)
+            for name in os.listdir(map_directory):
+                path = os.path.join(map_directory, name)
+                if path != cache_directory:
+                    shutil.rmtree(path, ignore_errors=True)
+        except OSError as error:
+            logger.warning("Could not save the baked pages: %s", error)
+
+    def visible(
+        self, view_left: float, view_bottom: float, width: float, height: float
+    ) -> List[PageTuple]:
+        """
+        The pages that can be seen
+
+        Args:
+            view_left (float)
+            view_bottom (float)
+            width (float): The width of the viewport
+            height (float): The height of the viewport
+
+        Returns:
+            List[PageTuple]
+        """
+        first_column = math.floor(view_left / PAGE_SIZE)
+        last_column = math.floor((view_left + width) / PAGE_SIZE)
+        first_row = math.floor(view_bottom / PAGE_SIZE)
+        last_row = math.floor((view_bottom + height) / PAGE_SIZE)
+        return [
+            self.pages[column, row]
+            for column in range(first_column, last_column + 1)
+            for row in range(first_row, last_row + 1)
+            if (column, row) in self.pages
+        ]
@@ -0,0 +1,182 @@
+from typing import Callable, List, Optional, Tuple
+
+from arcade import Sprite, set_viewport
+
+# Called with the new (left, bottom) of the viewport
+CameraListener = Callable[[int, int], None]
+
+
+class Camera:
+    """
+    The camera owns the viewport. It follows a sprite once the sprite leaves the dead zone in the middle of the screen,
+    easing towards it rather than jumping, and is kept within the bounds of the map.
+    The viewport is only set when the camera actually moves, and systems that depend on the position of the
+    viewport can subscribe to be told when that happens.
+    """
+
+    def __init__(
+        self, width: int, height: int, margin: int, smoothing: float = 1
+    ) -> None:
+        """
+        Create the camera
+
+        Args:
+            width (int): The width of the viewport
+            height (int): The height of the viewport
+            margin (int): The distance from the edge of the viewport to the dead zone
+            smoothing (float, optional): The fraction of the distance to the target that is moved every 1/60th of a second. 1 moves straight to the target. Defaults to 1.
+        """
+        self.width = width
+        self.height = height
+        self.margin = margin
+        self.smoothing = smoothing
+
+        # The exact position of the camera, this is snapped to pixels when applied
+        self.left: float = 0
+        self.bottom: float = 0
+
+        # The size of the map in pixels, if None the camera is only kept above and right of 0
+        self.bounds: Optional[Tuple[float, float]] = None
+
+        # The last viewport that was set
+        self.applied: Optional[Tuple[int, int]] = None
+
+        self.listeners: List[CameraListener] = []
+
+    @property
+    def view_left(self) -> int:
+        return int(self.left)
+
+    @property
+    def view_bottom(self) -> int:
+        return int(self.bottom)
+
+    def subscribe(self, listener: CameraListener) -> None:
+        """
+        Call `listener` with the new left and bottom whenever the viewport changes
+
+        Args:
+            listener (CameraListener)
+        """
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener: CameraListener) -> None:
+        self.listeners.remove(listener)
+
+    def set_bounds(self, width: float, height: float) -> None:
+        """
+        Set the size of the map that the camera should stay within
+
+        Args:
+            width (float): Width of the map in pixels
+            height (float): Height of the map in pixels
+        """
+        self.bounds = (width, height)
+
+    def clamp(self, left: float, bottom: float) -> Tuple[float, float]:
+        """
+        Keep a position for the camera within the map
+
+        Args:
+            left (float)
+            bottom (float)
+
+        Returns:
+            Tuple[float, float]: The clamped left and bottom
+        """
+        if self.bounds is not None:
+            left = min(left, self.bounds[0] - self.width)
+            bottom = min(bottom, self.bounds[1] - self.height)
+        return max(left, 0), max(bottom, 0)
+
+    def target_for(self, sprite: Sprite) -> Tuple[float, float]:
+        """
+        Work out where the camera needs to be so that the sprite is within the dead zone
+
+        Args:
+            sprite (Sprite): The sprite being followed
+
+        Returns:
+            Tuple[float, float]: The target left and bottom
+        """
+        left = self.left
+        bottom = self.bottom
+
+        if sprite.left < left + self.margin:
+            left = sprite.left - self.margin
+        elif sprite.right > left + self.width - self.margin:
+            left = sprite.right - self.width + self.margin
+
+        if sprite.bottom < bottom + self.margin:
+            bottom = sprite.bottom - self.margin
+        elif sprite.top > bottom + self.height - self.margin:
+            bottom = sprite.top - self.height + self.margin
+
+        return self.clamp(left, bottom)
+
+    def follow(self, sprite: Sprite, delta_time: float = 1 / 60) -> None:
+        """
+        Move the camera towards the sprite
+
+        Args:
+            sprite (Sprite): The sprite to follow
+            delta_time (float, optional): The time since the last update. Defaults to 1/60.
+        """
+        target_left, target_bottom = self.target_for(sprite)
+        if target_left == self.left and target_bottom == self.bottom:
+            return
+
+        if self.smoothing >= 1:
+            amount = 1.0
+        else:
+            # Frame rate independent easing
+            amount = 1 - (1 - self.smoothing) ** (delta_time * 60)
+        self.left += (target_left - self.left) * amount
+        self.bottom += (target_bottom - self.bottom) * amount
+
+        # Stop easing once the camera is within a pixel of the target
+        if abs(target_left - self.left) < 1:
+            self.left = target_left
+        if abs(target_bottom - self.bottom) < 1:
+            self.bottom = target_bottom
+        self.apply()
+
+    def look_at(self, sprite: Sprite) -> None:
+        """
+        Centre the camera on the sprite straight away, without easing
+
+        Args:
+            sprite (Sprite): The sprite to look at
+        """
+        self.left, self.bottom = self.clamp(
+            sprite.center_x - self.width / 2, sprite.center_y - self.height / 2
+        )
+        self.apply()
+
+    def reset(self) -> None:
+        """
+        Move the camera back to the origin, used by the views that don't scroll.
+        The bounds are kept, as they belong to the level being played and are still needed if it's retried.
+        Loading a level sets new bounds.
+        """
+        self.left = 0
+        self.bottom = 0
+        self.apply(force=True)
+
+    def apply(self, force: bool = False) -> None:
+        """
+        Set the viewport if the camera has moved to a different pixel, and tell the listeners
+
+        Args:
+            force (bool, optional): Set the viewport even if it hasn't moved. Defaults to False.
+        """
+        # Ensure that the viewport will map exactly onto pixels on the sprites
+        position = (self.view_left, self.view_bottom)
+        if position == self.applied and not force:
+            return
+        self.applied = position
+
+        left, bottom = position
+        set_viewport(left, left + self.width, bottom, bottom + self.height)
+        for listener in self.listeners:
+            listener(left, bottom)
@@ -0,0 +1,193 @@
+from enum import IntEnum
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from arcade import Sprite
+
+from metrics import registry
+from physics import BoxTuple, MovementTuple, sprite_box, sweep, swept_box
+
+narrow_tests = registry.counter(
+    "game_collision_narrow_tests_total",
+    "Triggers the player's movement was tested against after the broad phase",
+)
+
+
+class TriggerKind(IntEnum):
+    # In the order they're sent when touched at the same time, so dying beats winning,
+    # and a battery can power the flag it was collected with
+    DEATH = 0
+    BATTERY = 1
+    WIN = 2
+
+
+class CollisionEvent(IntEnum):
+    # The player started touching the trigger
+    ENTER = 0
+    # The player was already touching the trigger, and still is
+    STAY = 1
+    # The player stopped touching the trigger
+    EXIT = 2
+
+
+class TriggerTuple(NamedTuple):
+    kind: TriggerKind
+    sprite: Sprite
+    box: BoxTuple
+
+
+class CollisionEventTuple(NamedTuple):
+    event: CollisionEvent
+    trigger: TriggerTuple
+    # The fraction of the movement before the player first touched the trigger, exits are at 1
+    time: float
+
+
+# Returns True to stop the rest of the update's events being sent, such as when the level ends
+CollisionListener = Callable[[CollisionEventTuple], bool]
+
+
+class CollisionEvents:
+    """
+    Finds what the player touches once per update, and tells the subscribers of each kind of trigger
+    when the player starts touching, keeps touching, and stops touching each one.
+
+    Triggers are stored in a grid by the cells they cover, so only the triggers near the player's movement
+    are tested. The movement is swept, so triggers the player moves past are still touched.
+    It's swept along the same path the physics engine moved the player, one axis at a time.
+    """
+
+    def __init__(self, cell_size: float) -> None:
+        """
+        Create an empty set of triggers
+
+        Args:
+            cell_size (float): The size of a cell, this should be the size of a tile after scaling
+        """
+        self.cell_size = cell_size
+        self.cells: Dict[int, List[TriggerTuple]] = {}
+        # Every trigger, by the id of its sprite
+        self.triggers: Dict[int, TriggerTuple] = {}
+        # The triggers the player was touching after the last update, by the id of their sprite
+        self.touching: Dict[int, TriggerTuple] = {}
+        self.listeners: Dict[TriggerKind, List[CollisionListener]] = {
+            kind: [] for kind in TriggerKind
+        }
+
+    def cell_keys(self, box: BoxTuple) -> List[int]:
+        size = self.cell_size
+        # Columns are less than 2^16 in any realistic map, so they can be packed with the row
+        return [
+            (row << 16) + column
+            for column in range(int(box.left // size), int(box.right // size) + 1)
+            for row in range(int(box.bottom // size), int(box.top // size) + 1)
+        ]
+
+    def subscribe(self, kind: TriggerKind, listener: CollisionListener) -> None:
+        """
+        Call `listener` with every event for a kind of trigger
+
+        Args:
+            kind (TriggerKind)
+            listener (CollisionListener)
+        """
+        self.listeners[kind].append(listener)
+
+    def add(self, kind: TriggerKind, sprite: Sprite) -> None:
+        """
+        Add a trigger. Triggers don't move, a sprite that moves must be removed and added again
+
+        Args:
+            kind (TriggerKind)
+            sprite (Sprite)
+        """
+        if id(sprite) in self.triggers:
+            return
+        trigger = TriggerTuple(kind, sprite, sprite_box(sprite))
+        self.triggers[id(sprite)] = trigger
+        for key in self.cell_keys(trigger.box):
+            self.cells.setdefault(key, []).append(trigger)
+
+    def remove(self, sprite: Sprite) -> None:
+        """
+        Remove a trigger. No exit event is sent for it
+
+        Args:
+            sprite (Sprite)
+        """
+        trigger = self.triggers.pop(id(sprite), None)
+        if trigger is None:
+            return
+        self.touching.pop(id(sprite), None)
+        for key in self.cell_keys(trigger.box):
+            cell = self.cells.get(key)
+            if cell is not None and trigger in cell:
+                cell.remove(trigger)
+
+    def clear(self, kind: Optional[TriggerKind] = None) -> None:
+        """
+        Remove every trigger of a kind
+
+        Args:
+            kind (Optional[TriggerKind], optional): The kind to remove. Defaults to every kind.
+        """
+        if kind is None:
+            self.cells = {}
+            self.triggers = {}
+            self.touching = {}
+            return
+        for trigger in list(self.triggers.values()):
+            if trigger.kind == kind:
+                self.remove(trigger.sprite)
+
+    def forget_contacts(self) -> None:
+        """
+        Forget what the player was touching, for when it's moved without an update such as going back to a checkpoint
+        """
+        self.touching = {}
+
+    def update(self, movements: Sequence[MovementTuple]) -> None:
+        """
+        Find what the player touched as it moved, and send the events in the order they happened
+
+        Args:
+            movements (Sequence[MovementTuple]): The player's movement this update, as each leg it moved along in order
+        """
+        current: Dict[int, TriggerTuple] = {}
+        events: List[CollisionEventTuple] = []
+        for leg, movement in enumerate(movements):
+            box, change_x, change_y = movement
+            tested = set()
+            for key in self.cell_keys(swept_box(*movement)):
+                for trigger in self.cells.get(key, ()):
+                    sprite_id = id(trigger.sprite)
+                    # Triggers touched on an earlier leg were touched first then
+                    if sprite_id in tested or sprite_id in current:
+                        continue
+                    tested.add(sprite_id)
+                    time = sweep(box, change_x, change_y, trigger.box)
+                    if time is None:
+                        continue
+                    current[sprite_id] = trigger
+                    kind_of_event = (
+                        CollisionEvent.STAY
+                        if sprite_id in self.touching
+                        else CollisionEvent.ENTER
+                    )
+                    # The time is over the whole movement, so every hit on a leg is after those on earlier legs
+                    events.append(
+                        CollisionEventTuple(
+                            kind_of_event, trigger, (leg + time) / len(movements)
+                        )
+                    )
+            narrow_tests.inc(len(tested))
+
+        for sprite_id, trigger in self.touching.items():
+            if sprite_id not in current:
+                events.append(CollisionEventTuple(CollisionEvent.EXIT, trigger, 1))
+        self.touching = current
+
+        events.sort(key=lambda event: (event.time, event.trigger.kind))
+        for event in events:
+            for listener in self.listeners[event.trigger.kind]:
+                if listener(event):
+                    return
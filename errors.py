@@ -1,2 +1,6 @@
 class IncorrectNumberOfMarkers(Exception):
     pass
+
+
+class UnsupportedLayer(Exception):
+    pass
@@ -0,0 +1,214 @@
+import os
+import struct
+
+from collections import deque
+from typing import BinaryIO, Deque, Optional, Tuple
+
+# A track file starts with this header, followed by a varint pair for each sample
+HEADER = struct.Struct("<4sBHIf")
+MAGIC = b"GHST"
+VERSION = 1
+
+# Seconds between each sample of the player's position
+SAMPLE_INTERVAL = 0.05
+
+
+def zigzag(value: int) -> int:
+    """
+    Map signed integers to unsigned ones so small negative numbers stay small, 0, -1, 1, -2 become 0, 1, 2, 3
+
+    Args:
+        value (int)
+
+    Returns:
+        int
+    """
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value: int) -> int:
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    """
+    Append an unsigned integer, 7 bits per byte with the top bit set on every byte but the last
+
+    Args:
+        buffer (bytearray)
+        value (int)
+    """
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def ghost_path(directory: str, level: int) -> str:
+    return os.path.join(directory, f"level_{level}.ghost")
+
+
+class GhostRecorder:
+    """
+    Records the player's position every `SAMPLE_INTERVAL` seconds. Positions are rounded to whole pixels and stored
+    as the difference from the last sample, which is rarely more than a few pixels, so most samples take two bytes.
+    """
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self.samples = 0
+        self.last_x = 0
+        self.last_y = 0
+
+    def reset(self) -> None:
+        self.data = bytearray()
+        self.samples = 0
+        self.last_x = 0
+        self.last_y = 0
+
+    def update(self, level_time: float, x: float, y: float) -> None:
+        """
+        Record a sample if enough time has passed since the last one
+
+        Args:
+            level_time (float): Seconds since the level started
+            x (float): The player's x
+            y (float): The player's y
+        """
+        while self.samples * SAMPLE_INTERVAL <= level_time:
+            new_x = round(x)
+            new_y = round(y)
+            write_varint(self.data, zigzag(new_x - self.last_x))
+            write_varint(self.data, zigzag(new_y - self.last_y))
+            self.last_x = new_x
+            self.last_y = new_y
+            self.samples += 1
+
+    def save(self, path: str, seconds: float) -> None:
+        """
+        Write the track. It's written to a temporary file first so a ghost being played is never half written
+
+        Args:
+            path (str): The track file
+            seconds (float): How long the run took
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(
+                HEADER.pack(
+                    MAGIC, VERSION, int(SAMPLE_INTERVAL * 1000), self.samples, seconds
+                )
+            )
+            file.write(self.data)
+        os.replace(temporary_path, path)
+
+
+class GhostPlayer:
+    """
+    Plays back a track file. The file is read a small block at a time, and only a few samples ahead
+    of the current time are decoded, so a track is never fully loaded into memory.
+    """
+
+    def __init__(self, path: str, read_ahead: int = 16, block_size: int = 256) -> None:
+        """
+        Open a track
+
+        Args:
+            path (str): The track file
+            read_ahead (int, optional): How many samples are decoded ahead of time. Defaults to 16.
+            block_size (int, optional): How many bytes are read from the file at a time. Defaults to 256.
+
+        Raises:
+            ValueError: If the file isn't a track
+        """
+        self.file: BinaryIO = open(path, "rb", buffering=0)
+        magic, version, interval_ms, samples, seconds = HEADER.unpack(
+            self.file.read(HEADER.size)
+        )
+        if magic != MAGIC or version != VERSION:
+            self.file.close()
+            raise ValueError(f"{path} is not a ghost track")
+        self.interval = interval_ms / 1000
+        self.sample_count = samples
+        # How long the run took
+        self.seconds = seconds
+        self.read_ahead = read_ahead
+        self.block_size = block_size
+        self.rewind()
+
+    def rewind(self) -> None:
+        """
+        Go back to the start of the track
+        """
+        self.file.seek(HEADER.size)
+        self.block = b""
+        self.offset = 0
+        self.decoded = 0
+        self.x = 0
+        self.y = 0
+        # The decoded samples, the first is the sample at `first_index`
+        self.buffer: Deque[Tuple[int, int]] = deque()
+        self.first_index = 0
+
+    def read_varint(self) -> Optional[int]:
+        value = 0
+        shift = 0
+        while True:
+            if self.offset == len(self.block):
+                self.block = self.file.read(self.block_size)
+                self.offset = 0
+                if not self.block:
+                    return None
+            byte = self.block[self.offset]
+            self.offset += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def fill(self) -> None:
+        """
+        Decode samples until the read ahead buffer is full, or the track has ended
+        """
+        while len(self.buffer) < self.read_ahead and self.decoded < self.sample_count:
+            delta_x = self.read_varint()
+            delta_y = self.read_varint()
+            if delta_x is None or delta_y is None:
+                # The file is shorter than its header says
+                self.sample_count = self.decoded
+                return
+            self.x += unzigzag(delta_x)
+            self.y += unzigzag(delta_y)
+            self.buffer.append((self.x, self.y))
+            self.decoded += 1
+
+    def position_at(self, level_time: float) -> Optional[Tuple[float, float]]:
+        """
+        Get the ghost's position, between the samples either side of the time. Time should only go forwards,
+        `rewind` must be called to go back
+
+        Args:
+            level_time (float): Seconds since the level started
+
+        Returns:
+            Optional[Tuple[float, float]]: The position, or None if the track has ended
+        """
+        index = int(level_time / self.interval)
+        self.fill()
+        # Drop the samples that have been passed
+        while self.first_index < index and self.buffer:
+            self.buffer.popleft()
+            self.first_index += 1
+            self.fill()
+        if self.first_index < index or not self.buffer:
+            return None
+        if len(self.buffer) == 1:
+            return self.buffer[0]
+
+        (x, y), (next_x, next_y) = self.buffer[0], self.buffer[1]
+        fraction = level_time / self.interval - index
+        return x + (next_x - x) * fraction, y + (next_y - y) * fraction
+
+    def close(self) -> None:
+        self.file.close()
@@ -0,0 +1,250 @@
+import json
+import os
+
+from glob import glob
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from PIL import Image
+
+from assets import assets
+from hot_reload import GID_MASK, read_tileset_ranges
+from static_values import ASSETS_DIRECTORY, GAME_DIRECTORY
+
+if TYPE_CHECKING:
+    from arcade import Sprite
+
+    from tile_grid import TileGrid
+
+# Precomputed hit boxes for the character images and every tile in the tilesheets, so the game doesn't trace the
+# outline of each texture. Run `python hit_boxes.py` to rebuild the file after changing any of the images
+HIT_BOX_NAME = "hit_boxes.json"
+HIT_BOX_PATH = os.path.join(ASSETS_DIRECTORY, HIT_BOX_NAME)
+CHARACTER_IMAGES = os.path.join(ASSETS_DIRECTORY, "characters", "**", "*.png")
+TILESHEETS = os.path.join(ASSETS_DIRECTORY, "tilesheets", "*.tsx")
+
+# The flags stored in the top bits of a gid
+FLIPPED_HORIZONTALLY = 0x80000000
+FLIPPED_VERTICALLY = 0x40000000
+FLIPPED_DIAGONALLY = 0x20000000
+
+Point = Tuple[float, float]
+PointList = List[Point]
+
+
+def hit_box_key(path: str, tile_id: Optional[int] = None) -> str:
+    """
+    The key a hit box is stored under, the path relative to the game's directory, and the tile's id for tilesheets
+
+    Args:
+        path (str): The path to the image or tilesheet
+        tile_id (Optional[int], optional): The id of the tile in the tilesheet. Defaults to None.
+
+    Returns:
+        str
+    """
+    if os.path.isabs(path):
+        path = os.path.relpath(path, GAME_DIRECTORY)
+    key = os.path.normpath(path).replace(os.sep, "/")
+    if tile_id is None:
+        return key
+    return f"{key}#{tile_id}"
+
+
+def cross(origin: Point, a: Point, b: Point) -> float:
+    return (a[0] - origin[0]) * (b[1] - origin[1]) - (a[1] - origin[1]) * (
+        b[0] - origin[0]
+    )
+
+
+def convex_hull(points: Iterable[Point]) -> PointList:
+    """
+    The convex hull of some points, anticlockwise and without points that lie on an edge
+
+    Args:
+        points (Iterable[Point])
+
+    Returns:
+        PointList
+    """
+    unique = sorted(set(points))
+    if len(unique) < 3:
+        return unique
+
+    lower: PointList = []
+    for point in unique:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], point) <= 0:
+            lower.pop()
+        lower.append(point)
+    upper: PointList = []
+    for point in reversed(unique):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], point) <= 0:
+            upper.pop()
+        upper.append(point)
+    return lower[:-1] + upper[:-1]
+
+
+def flip_hit_box(points: PointList, gid: int) -> Optional[PointList]:
+    """
+    Flip a tile's hit box in the same way as the tile
+
+    Args:
+        points (PointList): The hit box of the unflipped tile
+        gid (int): The gid, including the flip flags
+
+    Returns:
+        Optional[PointList]: The flipped hit box, or None for diagonally flipped tiles, which aren't supported
+    """
+    if gid & FLIPPED_DIAGONALLY:
+        return None
+    x_sign = -1 if gid & FLIPPED_HORIZONTALLY else 1
+    y_sign = -1 if gid & FLIPPED_VERTICALLY else 1
+    return [(x * x_sign, y * y_sign) for x, y in points]
+
+
+def load_hit_boxes(name: str = HIT_BOX_NAME) -> Dict[str, PointList]:
+    """
+    Load the precomputed hit boxes
+
+    Args:
+        name (str, optional): The asset to load. Defaults to HIT_BOX_NAME.
+
+    Returns:
+        Dict[str, PointList]: The hit boxes by their key, empty if they haven't been built
+    """
+    try:
+        data = json.loads(bytes(assets.read(name)))
+    except FileNotFoundError:
+        return {}
+    return {
+        key: [(float(x), float(y)) for x, y in points] for key, points in data.items()
+    }
+
+
+def gid_hit_boxes(
+    hit_boxes: Dict[str, PointList], map_path: str
+) -> Dict[int, PointList]:
+    """
+    Find the hit box of each gid used by a map
+
+    Args:
+        hit_boxes (Dict[str, PointList]): The hit boxes from `load_hit_boxes`
+        map_path (str): Path to the tmx file
+
+    Returns:
+        Dict[int, PointList]: The hit boxes by gid, without any flip flags
+    """
+    by_gid: Dict[int, PointList] = {}
+    if not hit_boxes:
+        return by_gid
+    for tileset in read_tileset_ranges(map_path):
+        for gid in range(tileset.first_gid, tileset.end_gid):
+            points = hit_boxes.get(hit_box_key(tileset.path, gid - tileset.first_gid))
+            if points is not None:
+                by_gid[gid] = points
+    return by_gid
+
+
+def tile_hit_box(by_gid: Dict[int, PointList], gid: int) -> Optional[PointList]:
+    """
+    Get the hit box for a gid that may have flip flags
+
+    Args:
+        by_gid (Dict[int, PointList]): The hit boxes from `gid_hit_boxes`
+        gid (int)
+
+    Returns:
+        Optional[PointList]: The hit box, or None if there isn't one
+    """
+    points = by_gid.get(gid & GID_MASK)
+    if points is None or gid <= GID_MASK:
+        return points
+    return flip_hit_box(points, gid)
+
+
+def apply_tile_hit_boxes(
+    sprites: Iterable["Sprite"], grid: "TileGrid", by_gid: Dict[int, PointList]
+) -> None:
+    """
+    Set the hit boxes of the sprites from a layer, finding each sprite's gid from where it is in the grid
+
+    Args:
+        sprites (Iterable[Sprite]): The sprites created from the layer
+        grid (TileGrid): The layer's grid
+        by_gid (Dict[int, PointList]): The hit boxes from `gid_hit_boxes`
+    """
+    for sprite in sprites:
+        points = tile_hit_box(by_gid, grid.gid_at(*grid.cell_at(*sprite.position)))
+        if points is not None:
+            sprite.set_hit_box(points)
+
+
+def trace_hit_box(image: "Image.Image") -> PointList:
+    """
+    The convex outline of the opaque pixels of an image, relative to its centre with y up, the same
+    as arcade's hit boxes. Only Pillow is needed, so the hit boxes can be built without a display
+
+    Args:
+        image (Image.Image)
+
+    Returns:
+        PointList: The outline, empty if the image is fully transparent
+    """
+    alpha = image.getchannel("A")
+    width, height = image.size
+    points: PointList = []
+    for row in range(height):
+        # The first and last opaque pixel of the row
+        bounds = alpha.crop((0, row, width, row + 1)).getbbox()
+        if bounds is None:
+            continue
+        left, _, right, _ = bounds
+        for x in (left, right):
+            for y in (row, row + 1):
+                points.append((x - width / 2, height / 2 - y))
+    return convex_hull(points)
+
+
+def build_hit_boxes() -> Dict[str, PointList]:
+    """
+    Trace the hit box of every character image and every tile in the tilesheets
+
+    Returns:
+        Dict[str, PointList]
+    """
+    hit_boxes = {}
+    for path in sorted(glob(CHARACTER_IMAGES, recursive=True)):
+        with Image.open(path) as image:
+            hit_boxes[hit_box_key(path)] = trace_hit_box(image.convert("RGBA"))
+
+    for path in sorted(glob(TILESHEETS)):
+        root = ElementTree.parse(path).getroot()
+        tile_width = int(root.get("tilewidth", 0))
+        tile_height = int(root.get("tileheight", 0))
+        columns = int(root.get("columns", 0))
+        spacing = int(root.get("spacing", 0))
+        margin = int(root.get("margin", 0))
+        image_element = root.find("image")
+        if image_element is None or not columns:
+            # Collections of single images aren't used by the maps
+            continue
+        image_path = os.path.join(
+            os.path.dirname(path), image_element.get("source", "")
+        )
+        with Image.open(image_path) as sheet:
+            sheet = sheet.convert("RGBA")
+            for tile_id in range(int(root.get("tilecount", 0))):
+                left = margin + (tile_id % columns) * (tile_width + spacing)
+                top = margin + (tile_id // columns) * (tile_height + spacing)
+                tile = sheet.crop((left, top, left + tile_width, top + tile_height))
+                points = trace_hit_box(tile)
+                if points:
+                    hit_boxes[hit_box_key(path, tile_id)] = points
+    return hit_boxes
+
+
+if __name__ == "__main__":
+    hit_boxes = build_hit_boxes()
+    with open(HIT_BOX_PATH, "w", encoding="utf-8") as file:
+        json.dump(hit_boxes, file, indent=1, sort_keys=True)
+    print(f"Wrote {len(hit_boxes)} hit boxes to {HIT_BOX_PATH}")
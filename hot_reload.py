@@ -0,0 +1,158 @@
+import os
+
+from typing import Dict, List, NamedTuple, Optional
+from xml.etree import ElementTree
+
+# Gids have flags for flipping stored in the highest bits
+GID_MASK = 0x0FFFFFFF
+
+
+class TilesetRangeTuple(NamedTuple):
+    """
+    The gids a tilesheet covers in a map, from `first_gid` up to but not including `end_gid`
+    """
+
+    path: str
+    image_path: Optional[str]
+    first_gid: int
+    end_gid: int
+
+
+class ChangesTuple(NamedTuple):
+    """
+    What has changed since the last poll
+    """
+
+    map_changed: bool
+    # The ranges of the tilesheets that changed
+    tilesets: List[TilesetRangeTuple]
+
+
+def read_tileset_ranges(map_path: str) -> List[TilesetRangeTuple]:
+    """
+    Read which tilesheets a map uses, and the gids each one covers
+
+    Args:
+        map_path (str): Path to the tmx file
+
+    Returns:
+        List[TilesetRangeTuple]
+    """
+    directory = os.path.dirname(map_path)
+    ranges = []
+    for tileset in ElementTree.parse(map_path).getroot().iter("tileset"):
+        first_gid = int(tileset.get("firstgid", 1))
+        source = tileset.get("source")
+        if source is None:
+            # Embedded tilesets are part of the map file
+            continue
+        path = os.path.normpath(os.path.join(directory, source))
+        root = ElementTree.parse(path).getroot()
+        tile_count = int(root.get("tilecount", 0))
+        image = root.find("image")
+        image_source = image.get("source") if image is not None else None
+        image_path = (
+            os.path.normpath(os.path.join(os.path.dirname(path), image_source))
+            if image_source
+            else None
+        )
+        ranges.append(
+            TilesetRangeTuple(path, image_path, first_gid, first_gid + tile_count)
+        )
+    return ranges
+
+
+class AssetWatcher:
+    """
+    Watches a map and the tilesheets it uses for changes, by checking the modified time of the files.
+    Polling is used rather than an OS file watcher so that it works the same on every platform.
+    Only a few files are watched, so they're checked every frame, which is one `os.stat` of each.
+    """
+
+    def __init__(self, map_path: str) -> None:
+        """
+        Start watching a map
+
+        Args:
+            map_path (str): Path to the tmx file
+        """
+        self.map_path = map_path
+        self.tilesets: List[TilesetRangeTuple] = []
+        self.modified_times: Dict[str, float] = {}
+        self.watch(map_path)
+
+    def modified_time(self, path: str) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            # The file might be part way through being saved
+            return None
+
+    def watch(self, map_path: str) -> None:
+        """
+        Watch a different map, and forget about the previous one
+
+        Args:
+            map_path (str): Path to the tmx file
+        """
+        self.map_path = map_path
+        self.tilesets = read_tileset_ranges(map_path)
+        self.modified_times = {}
+        for path in [map_path] + self.tileset_paths():
+            modified_time = self.modified_time(path)
+            if modified_time is not None:
+                self.modified_times[path] = modified_time
+
+    def tileset_paths(self) -> List[str]:
+        """
+        Every tilesheet file, and the images they use
+
+        Returns:
+            List[str]
+        """
+        paths = []
+        for tileset in self.tilesets:
+            paths.append(tileset.path)
+            if tileset.image_path:
+                paths.append(tileset.image_path)
+        return paths
+
+    def has_changed(self, path: str) -> bool:
+        modified_time = self.modified_time(path)
+        if modified_time is None or modified_time == self.modified_times.get(path):
+            return False
+        self.modified_times[path] = modified_time
+        return True
+
+    def tileset_changed(self, tileset: TilesetRangeTuple) -> bool:
+        # Both are checked, so that the stored modified times are kept up to date
+        tileset_changed = self.has_changed(tileset.path)
+        image_changed = tileset.image_path is not None and self.has_changed(
+            tileset.image_path
+        )
+        return tileset_changed or image_changed
+
+    def poll(self) -> Optional[ChangesTuple]:
+        """
+        Check the files for changes
+
+        Returns:
+            Optional[ChangesTuple]: What changed, or None if nothing did
+        """
+        map_changed = self.has_changed(self.map_path)
+        if map_changed:
+            # The map may now use different tilesheets
+            try:
+                self.tilesets = read_tileset_ranges(self.map_path)
+            except (ElementTree.ParseError, OSError):
+                # Still being saved, so try again next poll
+                del self.modified_times[self.map_path]
+                return None
+            for path in self.tileset_paths():
+                self.modified_times.setdefault(path, self.modified_time(path) or 0)
+        changed_tilesets = [
+            tileset for tileset in self.tilesets if self.tileset_changed(tileset)
+        ]
+        if not map_changed and not changed_tilesets:
+            return None
+        return ChangesTuple(map_changed, changed_tilesets)
@@ -0,0 +1,202 @@
+from enum import IntFlag
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from arcade import key as keys
+
+from metrics import registry
+
+# Bucket boundaries, in seconds. A frame at 60 fps is 0.0167 seconds
+INPUT_LATENCY_BUCKETS = (0.001, 0.002, 0.004, 0.008, 0.012, 0.0167, 0.025, 0.05)
+
+
+class Action(IntFlag):
+    """
+    Each action is a bit, so every held action fits in one int
+    """
+
+    LEFT = 1
+    RIGHT = 2
+    JUMP = 4
+
+
+DEFAULT_BINDINGS: Dict[int, Action] = {
+    keys.LEFT: Action.LEFT,
+    keys.A: Action.LEFT,
+    keys.RIGHT: Action.RIGHT,
+    keys.D: Action.RIGHT,
+    keys.UP: Action.JUMP,
+    keys.W: Action.JUMP,
+}
+
+
+class InputTickTuple(NamedTuple):
+    # -1 for left, 1 for right, or 0
+    direction: int
+    # If jump was pressed since the last tick
+    jump: bool
+
+
+def parse_bindings(text: str) -> Dict[int, Action]:
+    """
+    Read key bindings written as `action=key` pairs, eg `left=J,right=L,jump=SPACE`. Actions that aren't given keep their default keys
+
+    Args:
+        text (str)
+
+    Raises:
+        ValueError: If an action or key doesn't exist
+
+    Returns:
+        Dict[int, Action]: The action of each key
+    """
+    bound: Dict[Action, List[int]] = {}
+    for pair in text.split(","):
+        action_name, _, key_name = pair.partition("=")
+        try:
+            action = Action[action_name.strip().upper()]
+        except KeyError:
+            raise ValueError(f"There is no action called {action_name!r}") from None
+        key = getattr(keys, key_name.strip().upper(), None)
+        if not isinstance(key, int):
+            raise ValueError(f"There is no key called {key_name!r}")
+        bound.setdefault(action, []).append(key)
+
+    bindings = {
+        key: action for key, action in DEFAULT_BINDINGS.items() if action not in bound
+    }
+    for action, action_keys in bound.items():
+        for key in action_keys:
+            bindings[key] = action
+    return bindings
+
+
+class InputState:
+    """
+    The keys that are held, read once per update rather than acting on each key event.
+    Holding both directions doesn't move the player, and letting go of one moves in the other direction.
+
+    The time from each key event to the update that uses it, and from that update to the next frame drawn,
+    are recorded so input latency can be checked.
+    """
+
+    def __init__(self, bindings: Optional[Dict[int, Action]] = None) -> None:
+        """
+        Create the input state
+
+        Args:
+            bindings (Optional[Dict[int, Action]], optional): The action of each key. Defaults to `DEFAULT_BINDINGS`.
+        """
+        self.bindings = dict(DEFAULT_BINDINGS if bindings is None else bindings)
+        self.held_keys: Set[int] = set()
+        # The held actions, one bit each
+        self.held = Action(0)
+        # Set when jump is pressed, and cleared by the next tick, so a tap between ticks isn't missed
+        self.jump_pressed = False
+        # The times of the key events the next tick will use
+        self.event_times: List[float] = []
+        # The time of the last tick that used a key event, until a frame is drawn
+        self.tick_time: Optional[float] = None
+
+        self.event_to_tick = registry.histogram(
+            "game_input_event_to_tick_seconds",
+            "Time from a key event to the update that uses it",
+            INPUT_LATENCY_BUCKETS,
+        )
+        self.tick_to_frame = registry.histogram(
+            "game_input_tick_to_frame_seconds",
+            "Time from an update that used a key event to the next frame drawn",
+            INPUT_LATENCY_BUCKETS,
+        )
+
+    def rebind(self, key: int, action: Optional[Action]) -> None:
+        """
+        Change what a key does
+
+        Args:
+            key (int)
+            action (Optional[Action]): The new action, or None to unbind the key
+        """
+        if action is None:
+            self.bindings.pop(key, None)
+        else:
+            self.bindings[key] = action
+        self.update_held()
+
+    def update_held(self) -> None:
+        held = Action(0)
+        for key in self.held_keys:
+            held |= self.bindings.get(key, Action(0))
+        self.held = held
+
+    def press(self, key: int, time: float) -> None:
+        """
+        Record a key being pressed
+
+        Args:
+            key (int)
+            time (float): When the event happened, from `perf_counter`
+        """
+        action = self.bindings.get(key)
+        if action is None:
+            return
+        self.held_keys.add(key)
+        self.held |= action
+        if action == Action.JUMP:
+            self.jump_pressed = True
+        self.event_times.append(time)
+
+    def release(self, key: int, time: float) -> None:
+        """
+        Record a key being released
+
+        Args:
+            key (int)
+            time (float): When the event happened, from `perf_counter`
+        """
+        if key not in self.held_keys:
+            return
+        self.held_keys.discard(key)
+        self.update_held()
+        self.event_times.append(time)
+
+    def release_all(self) -> None:
+        """
+        Forget the held keys, for when the releases won't be seen, such as when the view changes
+        """
+        self.held_keys.clear()
+        self.held = Action(0)
+        self.jump_pressed = False
+        self.event_times = []
+
+    def tick(self, time: float) -> InputTickTuple:
+        """
+        Resolve the input for an update
+
+        Args:
+            time (float): When the update started, from `perf_counter`
+
+        Returns:
+            InputTickTuple
+        """
+        if self.event_times:
+            for event_time in self.event_times:
+                self.event_to_tick.observe(time - event_time)
+            self.event_times = []
+            if self.tick_time is None:
+                self.tick_time = time
+
+        direction = int(Action.RIGHT in self.held) - int(Action.LEFT in self.held)
+        jump = self.jump_pressed
+        self.jump_pressed = False
+        return InputTickTuple(direction, jump)
+
+    def frame_drawn(self, time: float) -> None:
+        """
+        Record a frame being drawn
+
+        Args:
+            time (float): When the frame finished drawing, from `perf_counter`
+        """
+        if self.tick_time is not None:
+            self.tick_to_frame.observe(time - self.tick_time)
+            self.tick_time = None
@@ -35,6 +35,9 @@ class Label:
         self.original_font_size = 16
         self.color = color
         self.anchor_x = anchor_x
+        # Seconds between changes to the shown value, 0 shows every change straight away
+        self.refresh_interval: float = 0
+        self.time_since_refresh: float = 0
 
     def format_value(self, new_value: Union[str, int, float]) -> str:
         """Formats the format string with the string provided and returns that.
@@ -49,11 +52,15 @@ class Label:
 
     def set_value(self, new_value: Union[str, int, float]) -> None:
         """
-        Formats and sets the new value
+        Formats and sets the new value. If there is a refresh interval, the value is only changed
+        once the interval has passed since the last change
 
         Args:
             new_value (Union[str, int, float]): New value to set
         """
+        if self.time_since_refresh < self.refresh_interval:
+            return
+        self.time_since_refresh = 0
         self.value = self.format_value(new_value)
 
     def draw(self, x: int, y: int) -> None:
@@ -89,6 +96,7 @@ class Label:
         Args:
             delta_time (float): The time since the last update
         """
+        self.time_since_refresh += delta_time
         if self.flash_duration_left == 0:
             return
         ratio_left = delta_time / self.flash_duration_left
@@ -152,7 +160,7 @@ class EphemeralLabel(Label):
             new_value (Union[str, int, float]): The new value to display
         """
         self.visible_till = self.visible_duration
-        self.set_value(new_value)
+        self.value = self.format_value(new_value)
 
     def draw(self, x: int, y: int) -> None:
         if self.visible:
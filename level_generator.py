@@ -0,0 +1,654 @@
+import argparse
+import heapq
+import logging
+import math
+import multiprocessing
+import os
+import random
+import time
+
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from physics.base import GROUND_PROBE_DISTANCE
+from static_values import (
+    ASSETS_DIRECTORY,
+    BATTERY_LAYER_NAME,
+    BOOSTED_PLAYER_JUMP_SPEED,
+    DEATH_LAYER_NAME,
+    GRAVITY,
+    MAPS_DIRECTORY,
+    MOVING_UP_LAYER_NAME,
+    PLAYER_JUMP_SPEED,
+    PLAYER_MOVEMENT_SPEED,
+    SPRING_LAYER_NAME,
+    START_MARKER_LAYER_NAME,
+    TILE_HEIGHT,
+    TILE_WIDTH,
+    WALL_LAYER_NAME,
+    WIN_LAYER_NAME,
+    count_levels,
+)
+from tile_grid import TileGrid
+
+logger = logging.getLogger(__name__)
+
+TILESHEETS_DIRECTORY = os.path.join(ASSETS_DIRECTORY, "tilesheets")
+# The tilesheets every level uses, with the first gid of each
+TILESETS = (
+    (1, "ice_with_water_tileset.tsx"),
+    (33, "extras_tilesheet.tsx"),
+    (97, "ice_with_water_tileset_springboard.tsx"),
+    (113, "ice_with_water_tileset_spikes.tsx"),
+)
+
+# Gids from the tilesheets, the same tiles the hand made levels use
+WALL_TOP_LEFT_GID = 1
+WALL_TOP_GID = 2
+WALL_TOP_RIGHT_GID = 3
+WALL_LEFT_GID = 9
+WALL_FILL_GID = 10
+WALL_RIGHT_GID = 11
+PLATFORM_LEFT_GID = 25
+PLATFORM_GID = 26
+PLATFORM_RIGHT_GID = 27
+BATTERY_GID = 33
+FLAG_GID = 35
+SPRINGBOARD_GID = 98
+SPIKES_GID = 119
+MARKER_GID = 2
+
+# The tile layers of a level, in the order they are written
+TILE_LAYER_NAMES = (
+    WALL_LAYER_NAME,
+    DEATH_LAYER_NAME,
+    WIN_LAYER_NAME,
+    SPRING_LAYER_NAME,
+    BATTERY_LAYER_NAME,
+    START_MARKER_LAYER_NAME,
+)
+
+# The size of the levels, in tiles
+LEVEL_ROWS = 20
+MIN_LEVEL_COLUMNS = 40
+MAX_LEVEL_COLUMNS = 90
+# The highest the ground is, leaving room above it to jump
+MAX_GROUND_ROW = LEVEL_ROWS - 6
+
+# The size of a tile and the player in the game, after scaling
+TILE_SIZE = TILE_WIDTH * 0.5
+PLAYER_WIDTH = 64
+PLAYER_HEIGHT = 128
+# Small enough that an edge exactly on a tile boundary is counted as being in the tile before it
+EPSILON = 1e-6
+# A jump or fall that hasn't landed after this many frames is given up on
+MAX_MOVE_FRAMES = 300
+# Frames the direction is held for in each jump that's tried, the direction is then let go at the next tile
+JUMP_HOLD_FRAMES = (16, MAX_MOVE_FRAMES)
+# How far past the middle of a tile the player can walk while still standing on it
+LEDGE_OFFSET = TILE_SIZE - PLAYER_MOVEMENT_SPEED
+# The least power a battery gives is 8 seconds, which is used up at half a second a second, at 60 frames a second
+POWER_FRAMES = 8 * 2 * 60
+
+# The codes of the cells checked by `LevelCheck`
+SOLID = 1
+DEATH = 2
+# Empty cells around the level in `LevelCheck`, so the player can be checked a little outside it
+CHECK_BORDER = 8
+
+# A tile the player stands on, the column and row of the bottom of its body
+NodeTuple = Tuple[int, int]
+
+
+class GeneratedLevelTuple(NamedTuple):
+    seed: int
+    # Candidates generated before one was valid
+    attempts: int
+    tmx: str
+
+
+class LevelCheck:
+    """
+    Fast check of whether a level can be finished, without loading it into the game.
+    The places the player can stand are searched from the start, moving between them by walking and
+    jumping with the same rules as the tile physics engine, to find if a battery can be collected
+    and the flag reached before the power runs out.
+    It only validates generated levels. Rising tiles are ignored, so a level that needs the player to ride a
+    rising tile is rejected. The generator never places rising tiles, but the hand made levels 2 and 3 use them
+    and fail the check.
+    """
+
+    def __init__(self, layers: Dict[str, TileGrid]) -> None:
+        self.layers = layers
+        walls = layers[WALL_LAYER_NAME]
+        self.columns = walls.columns
+        self.rows = walls.rows
+        self.spring = layers[SPRING_LAYER_NAME]
+
+        # The solid and death tiles, in one flat array with a border of empty cells
+        self.stride = self.columns + 2 * CHECK_BORDER
+        self.codes = bytearray(self.stride * (self.rows + 2 * CHECK_BORDER))
+        for name, code in (
+            (WALL_LAYER_NAME, SOLID),
+            (SPRING_LAYER_NAME, SOLID),
+            (START_MARKER_LAYER_NAME, SOLID),
+            (DEATH_LAYER_NAME, DEATH),
+        ):
+            for column, row, _ in layers[name].cells():
+                self.codes[self.index(column, row)] |= code
+
+        # The moves from each node, found when the node is first reached
+        self.moves: Dict[NodeTuple, List[Tuple[NodeTuple, int]]] = {}
+
+    def index(self, column: int, row: int) -> int:
+        return (row + CHECK_BORDER) * self.stride + column + CHECK_BORDER
+
+    def in_level(self, x: float, bottom: float) -> bool:
+        """
+        If the player is close enough to the level to be checked against its tiles
+
+        Args:
+            x (float): The player's center x
+            bottom (float): The player's bottom
+
+        Returns:
+            bool
+        """
+        border = (CHECK_BORDER - 2) * TILE_SIZE
+        return (
+            -border < x < self.columns * TILE_SIZE + border
+            and -border < bottom < self.rows * TILE_SIZE + border
+        )
+
+    def move(
+        self,
+        start: NodeTuple,
+        direction: int,
+        jump_speed: float,
+        hold_frames: int,
+        offset: float = 0,
+    ) -> Optional[Tuple[NodeTuple, int]]:
+        """
+        Simulate the player from a node, until they stand in the middle of a tile again
+
+        Args:
+            start (NodeTuple): The node the player starts at
+            direction (int): -1 for left, 1 for right, or 0
+            jump_speed (float): The speed the player jumps with, 0 to walk
+            hold_frames (int): Frames the direction is held for, it's held longer if needed to line up with a tile
+            offset (float, optional): Pixels the player starts from the middle of the tile, in the direction. Defaults to 0.
+
+        Returns:
+            Optional[Tuple[NodeTuple, int]]: The node the player ends up at and the frames it took,
+            or None if they died, left the level or didn't land
+        """
+        codes = self.codes
+        index = self.index
+        column, row = start
+        x = (column + 0.5) * TILE_SIZE + direction * offset
+        bottom = row * TILE_SIZE
+        change_y = jump_speed
+        airborne = jump_speed > 0
+        # Frames taken to walk to the offset
+        start_frame = int(offset / PLAYER_MOVEMENT_SPEED)
+        for frame in range(start_frame + 1, MAX_MOVE_FRAMES):
+            if not self.in_level(x, bottom):
+                return None
+            first_column = math.floor((x - PLAYER_WIDTH / 2) / TILE_SIZE)
+            last_column = math.floor((x + PLAYER_WIDTH / 2 - EPSILON) / TILE_SIZE)
+            first_row = math.floor(bottom / TILE_SIZE)
+            last_row = math.floor((bottom + PLAYER_HEIGHT - EPSILON) / TILE_SIZE)
+            body_rows = (first_row, first_row + 1, last_row)
+
+            # The same checks as `GameView.on_update`, before the physics engine moves the player
+            if (
+                any(
+                    codes[index(body_column, body_row)] & DEATH
+                    for body_row in body_rows
+                    for body_column in (first_column, last_column)
+                )
+                or bottom + PLAYER_HEIGHT / 2 < PLAYER_HEIGHT - 300
+                or x <= PLAYER_WIDTH / 2
+            ):
+                return None
+
+            centered = (x - TILE_SIZE / 2) % TILE_SIZE == 0
+            change_x = (
+                direction * PLAYER_MOVEMENT_SPEED
+                if frame <= hold_frames or not centered
+                else 0
+            )
+
+            change_y = max(change_y - GRAVITY, EPSILON - TILE_SIZE)
+            bottom += change_y
+            first_row = math.floor(bottom / TILE_SIZE)
+            last_row = math.floor((bottom + PLAYER_HEIGHT - EPSILON) / TILE_SIZE)
+            edge_row = first_row if change_y <= 0 else last_row
+            if (
+                codes[index(first_column, edge_row)]
+                | codes[index(last_column, edge_row)]
+            ) & SOLID:
+                if change_y <= 0:
+                    bottom = (first_row + 1) * TILE_SIZE
+                else:
+                    bottom = last_row * TILE_SIZE - PLAYER_HEIGHT
+                change_y = 0
+
+            if change_x:
+                x += change_x
+                first_row = math.floor(bottom / TILE_SIZE)
+                last_row = math.floor((bottom + PLAYER_HEIGHT - EPSILON) / TILE_SIZE)
+                edge = (x + direction * (PLAYER_WIDTH / 2 - EPSILON)) / TILE_SIZE
+                edge_column = math.floor(edge)
+                if any(
+                    codes[index(edge_column, body_row)] & SOLID
+                    for body_row in (first_row, first_row + 1, last_row)
+                ):
+                    x = (edge_column - direction + 0.5) * TILE_SIZE
+                first_column = math.floor((x - PLAYER_WIDTH / 2) / TILE_SIZE)
+                last_column = math.floor((x + PLAYER_WIDTH / 2 - EPSILON) / TILE_SIZE)
+
+            probe_row = math.floor((bottom - GROUND_PROBE_DISTANCE) / TILE_SIZE)
+            grounded = (
+                change_y == 0
+                and (
+                    codes[index(first_column, probe_row)]
+                    | codes[index(last_column, probe_row)]
+                )
+                & SOLID
+            )
+            if not grounded:
+                airborne = True
+                continue
+            if (x - TILE_SIZE / 2) % TILE_SIZE != 0:
+                continue
+            node = (math.floor(x / TILE_SIZE), round(bottom / TILE_SIZE))
+            if node != start:
+                return node, frame
+            if airborne:
+                # Jumped straight back to where they started
+                return None
+        return None
+
+    def moves_from(self, node: NodeTuple) -> List[Tuple[NodeTuple, int]]:
+        """
+        The nodes that can be reached from a node in one walk or jump, with the frames each takes
+
+        Args:
+            node (NodeTuple)
+
+        Returns:
+            List[Tuple[NodeTuple, int]]
+        """
+        moves = self.moves.get(node)
+        if moves is not None:
+            return moves
+
+        column, row = node
+        jump_speed = (
+            BOOSTED_PLAYER_JUMP_SPEED
+            if self.spring.occupied(column, row - 1)
+            else PLAYER_JUMP_SPEED
+        )
+        moves = []
+        for direction in (-1, 1):
+            attempts = [(0.0, 1, 0.0)]
+            attempts.extend((jump_speed, frames, 0.0) for frames in JUMP_HOLD_FRAMES)
+            if not self.codes[self.index(column + direction, row - 1)] & SOLID:
+                # At a ledge, the player can walk until they are almost off it before jumping
+                attempts.append((jump_speed, MAX_MOVE_FRAMES, LEDGE_OFFSET))
+            for speed, hold_frames, offset in attempts:
+                result = self.move(node, direction, speed, hold_frames, offset)
+                if result is not None:
+                    moves.append(result)
+        result = self.move(node, 0, jump_speed, 0)
+        if result is not None:
+            moves.append(result)
+        self.moves[node] = moves
+        return moves
+
+    def frames_from(self, sources: List[NodeTuple]) -> Dict[NodeTuple, int]:
+        """
+        The least frames needed to reach every node that can be reached from any of the sources
+
+        Args:
+            sources (List[NodeTuple])
+
+        Returns:
+            Dict[NodeTuple, int]
+        """
+        frames = {source: 0 for source in sources}
+        queue = [(0, source) for source in sources]
+        heapq.heapify(queue)
+        while queue:
+            cost, node = heapq.heappop(queue)
+            if cost > frames[node]:
+                continue
+            for next_node, move_frames in self.moves_from(node):
+                next_cost = cost + move_frames
+                if next_cost < frames.get(next_node, next_cost + 1):
+                    frames[next_node] = next_cost
+                    heapq.heappush(queue, (next_cost, next_node))
+        return frames
+
+    def touching(self, grid: TileGrid, nodes: Iterable[NodeTuple]) -> List[NodeTuple]:
+        """
+        The nodes where the player overlaps an occupied cell of a grid
+
+        Args:
+            grid (TileGrid)
+            nodes (Iterable[NodeTuple])
+
+        Returns:
+            List[NodeTuple]
+        """
+        return [
+            (column, row)
+            for column, row in nodes
+            if grid.occupied(column, row) or grid.occupied(column, row + 1)
+        ]
+
+    def start_node(self) -> Optional[NodeTuple]:
+        """
+        Where the player lands after starting at the marker, the same as `GameView.set_player_start_position`
+
+        Returns:
+            Optional[NodeTuple]: The node, or None if there isn't exactly one marker or the player doesn't land
+        """
+        markers = list(self.layers[START_MARKER_LAYER_NAME].cells())
+        if len(markers) != 1:
+            return None
+        column, row, _ = markers[0]
+        marker_y = (row + 0.5) * TILE_SIZE
+        start_x = (column + 0.5) * TILE_SIZE + TILE_HEIGHT / 2 + PLAYER_HEIGHT / 2
+        start_y = 100 + marker_y - TILE_WIDTH / 2 + PLAYER_WIDTH / 2
+        # The start is lined up with a tile, falling from it lands on the first solid tile below
+        start_column = math.floor(start_x / TILE_SIZE)
+        start_row = math.ceil((start_y - PLAYER_HEIGHT / 2) / TILE_SIZE)
+        for landing_row in range(start_row, -1, -1):
+            if self.codes[self.index(start_column, landing_row - 1)] & SOLID:
+                return start_column, landing_row
+        return None
+
+    def is_valid(self) -> bool:
+        """
+        If the level can be finished
+
+        Returns:
+            bool
+        """
+        start = self.start_node()
+        if start is None:
+            return False
+        battery_nodes = self.touching(
+            self.layers[BATTERY_LAYER_NAME], self.frames_from([start])
+        )
+        if not battery_nodes:
+            return False
+
+        # The flag must be reached from a battery before its power runs out
+        frames = self.frames_from(battery_nodes)
+        return any(
+            frames[node] <= POWER_FRAMES
+            for node in self.touching(self.layers[WIN_LAYER_NAME], frames)
+        )
+
+
+def new_layers(columns: int, rows: int) -> Dict[str, TileGrid]:
+    return {name: TileGrid(columns, rows, TILE_SIZE) for name in TILE_LAYER_NAMES}
+
+
+def add_ground(walls: TileGrid, first_column: int, last_column: int, top: int) -> None:
+    """
+    Fill the columns from the bottom of the level up to a row, with edges on the outside tiles
+
+    Args:
+        walls (TileGrid)
+        first_column (int)
+        last_column (int)
+        top (int): The row of the top tiles
+    """
+    for column in range(first_column, last_column + 1):
+        left = column == first_column
+        right = column == last_column
+        for row in range(top + 1):
+            if row == top:
+                gid = (
+                    WALL_TOP_LEFT_GID
+                    if left and not right
+                    else WALL_TOP_RIGHT_GID
+                    if right and not left
+                    else WALL_TOP_GID
+                )
+            else:
+                gid = (
+                    WALL_LEFT_GID
+                    if left and not right
+                    else WALL_RIGHT_GID
+                    if right and not left
+                    else WALL_FILL_GID
+                )
+            walls.set_gid(column, row, gid)
+
+
+def generate_layers(rng: random.Random) -> Dict[str, TileGrid]:
+    """
+    Generate a candidate level, a row of ground sections with gaps and steps between them.
+    Some candidates can't be finished, they are found with `LevelCheck`
+
+    Args:
+        rng (random.Random)
+
+    Returns:
+        Dict[str, TileGrid]: A grid for each tile layer
+    """
+    columns = rng.randint(MIN_LEVEL_COLUMNS, MAX_LEVEL_COLUMNS)
+    layers = new_layers(columns, LEVEL_ROWS)
+    walls = layers[WALL_LAYER_NAME]
+
+    # The start, the player lands two tiles to the right of the marker
+    top = rng.randint(2, MAX_GROUND_ROW // 2)
+    end = rng.randint(6, 10)
+    add_ground(walls, 0, end, top)
+    walls.set_gid(1, top, 0)
+    layers[START_MARKER_LAYER_NAME].set_gid(1, top, MARKER_GID)
+
+    battery_count = 0
+    while True:
+        gap = rng.choice((0, 0, 1, 1, 2, 3))
+        for column in range(end + 1, min(end + 1 + gap, columns)):
+            layers[DEATH_LAYER_NAME].set_gid(column, 0, SPIKES_GID)
+
+        step = rng.choice((-3, -2, -1, 0, 0, 1, 1, 2, 3))
+        if step >= 2:
+            # Too high to jump, unless there's a springboard to jump from
+            if rng.random() < 0.8:
+                walls.set_gid(end, top, 0)
+                layers[SPRING_LAYER_NAME].set_gid(end, top, SPRINGBOARD_GID)
+        top = min(max(top + step, 1), MAX_GROUND_ROW)
+
+        start = end + 1 + gap
+        end = start + rng.randint(3, 10)
+        if end >= columns - 1:
+            break
+        add_ground(walls, start, end, top)
+
+        if rng.random() < 0.3:
+            column = rng.randint(start, end)
+            layers[BATTERY_LAYER_NAME].set_gid(column, top + 1, BATTERY_GID)
+            battery_count += 1
+        elif end - start >= 5 and top + 4 < LEVEL_ROWS - 2 and rng.random() < 0.3:
+            # A platform above the ground, with a battery on it
+            platform_start = rng.randint(start, end - 3)
+            platform_row = top + rng.randint(3, 4)
+            walls.set_gid(platform_start, platform_row, PLATFORM_LEFT_GID)
+            walls.set_gid(platform_start + 1, platform_row, PLATFORM_GID)
+            walls.set_gid(platform_start + 2, platform_row, PLATFORM_RIGHT_GID)
+            layers[BATTERY_LAYER_NAME].set_gid(
+                platform_start + 1, platform_row + 1, BATTERY_GID
+            )
+            battery_count += 1
+
+    # The end, with the flag at the far side
+    start = min(start, columns - 5)
+    add_ground(walls, start, columns - 1, top)
+    layers[WIN_LAYER_NAME].set_gid(columns - 2, top + 1, FLAG_GID)
+    if battery_count == 0 or rng.random() < 0.5:
+        layers[BATTERY_LAYER_NAME].set_gid(start + 1, top + 1, BATTERY_GID)
+    return layers
+
+
+def layer_csv(grid: TileGrid) -> str:
+    """
+    The gids of a layer in the TMX csv format, top row first
+
+    Args:
+        grid (TileGrid)
+
+    Returns:
+        str
+    """
+    lines = []
+    for row in range(grid.rows - 1, -1, -1):
+        start = row * grid.columns
+        lines.append(",".join(map(str, grid.gids[start : start + grid.columns])))
+    return ",\n".join(lines)
+
+
+def tileset_source(name: str, directory: str) -> str:
+    """
+    The path of a tilesheet as a map in a directory refers to it
+
+    Args:
+        name (str): The tilesheet's file name
+        directory (str): The directory the map is written to
+
+    Returns:
+        str: The path relative to the directory, or the absolute path where there isn't one, such as on another drive
+    """
+    path = os.path.join(TILESHEETS_DIRECTORY, name)
+    try:
+        return os.path.relpath(path, directory).replace(os.sep, "/")
+    except ValueError:
+        return os.path.abspath(path)
+
+
+def to_tmx(layers: Dict[str, TileGrid], directory: str = MAPS_DIRECTORY) -> str:
+    """
+    Write a level in the same format Tiled saves the hand made levels in
+
+    Args:
+        layers (Dict[str, TileGrid])
+        directory (str, optional): The directory the map is written to, as the tilesheets are found relative to it.
+            Defaults to MAPS_DIRECTORY.
+
+    Returns:
+        str: The contents of the TMX file
+    """
+    walls = layers[WALL_LAYER_NAME]
+    size = f'width="{walls.columns}" height="{walls.rows}"'
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<map version="1.5" tiledversion="1.7.1" orientation="orthogonal"'
+        f' renderorder="right-down" {size} tilewidth="{TILE_WIDTH}"'
+        f' tileheight="{TILE_HEIGHT}" infinite="0"'
+        f' nextlayerid="{len(TILE_LAYER_NAMES) + 2}" nextobjectid="1">',
+    ]
+    for first_gid, name in TILESETS:
+        source = tileset_source(name, directory)
+        lines.append(f' <tileset firstgid="{first_gid}" source="{source}"/>')
+    for layer_id, name in enumerate(TILE_LAYER_NAMES, start=1):
+        lines.append(f' <layer id="{layer_id}" name="{name}" {size}>')
+        lines.append('  <data encoding="csv">')
+        lines.append(layer_csv(layers[name]))
+        lines.append("</data>")
+        lines.append(" </layer>")
+    lines.append(
+        f' <objectgroup id="{len(TILE_LAYER_NAMES) + 1}"'
+        f' name="{MOVING_UP_LAYER_NAME}"/>'
+    )
+    lines.append("</map>")
+    return "\n".join(lines) + "\n"
+
+
+def generate_level(seed: int, directory: str = MAPS_DIRECTORY) -> GeneratedLevelTuple:
+    """
+    Generate candidates until one can be finished. The same seed always gives the same level
+
+    Args:
+        seed (int)
+        directory (str, optional): The directory the level is written to. Defaults to MAPS_DIRECTORY.
+
+    Returns:
+        GeneratedLevelTuple
+    """
+    rng = random.Random(seed)
+    attempts = 0
+    while True:
+        attempts += 1
+        layers = generate_layers(rng)
+        if LevelCheck(layers).is_valid():
+            return GeneratedLevelTuple(seed, attempts, to_tmx(layers, directory))
+
+
+def generate_levels(
+    count: int,
+    seed: int,
+    workers: Optional[int] = None,
+    directory: str = MAPS_DIRECTORY,
+) -> Iterator[GeneratedLevelTuple]:
+    """
+    Generate levels on every core
+
+    Args:
+        count (int): How many levels to generate
+        seed (int): The seed of the first level, each level after uses the next seed
+        workers (Optional[int], optional): Processes to use. Defaults to the number of cores.
+        directory (str, optional): The directory the levels are written to. Defaults to MAPS_DIRECTORY.
+
+    Yields:
+        GeneratedLevelTuple: The levels, in order of their seeds
+    """
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(
+            partial(generate_level, directory=directory), range(seed, seed + count)
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate levels, numbered after the existing levels"
+    )
+    parser.add_argument("count", type=int, help="How many levels to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--directory", default=MAPS_DIRECTORY)
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Counted in the directory being written to, which may not be the game's maps directory
+    first_level = count_levels(arguments.directory) + 1
+    start_time = time.perf_counter()
+    attempts = 0
+    for index, level in enumerate(
+        generate_levels(
+            arguments.count, arguments.seed, arguments.workers, arguments.directory
+        )
+    ):
+        path = os.path.join(arguments.directory, f"level_{first_level + index}.tmx")
+        with open(path, "w") as file:
+            file.write(level.tmx)
+        attempts += level.attempts
+        logger.info("Wrote %s from seed %d", path, level.seed)
+
+    minutes = (time.perf_counter() - start_time) / 60
+    logger.info(
+        "Generated %d levels from %d candidates, %.0f levels a minute",
+        arguments.count,
+        attempts,
+        arguments.count / minutes,
+    )
+
+
+if __name__ == "__main__":
+    main()
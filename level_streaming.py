@@ -0,0 +1,251 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from arcade import Sprite
+from arcade.tilemap import _create_sprite_from_tile, _get_tile_by_gid
+
+from hit_boxes import PointList, tile_hit_box
+from tile_grid import TileGrid
+
+if TYPE_CHECKING:
+    from pytiled_parser.objects import TileMap
+
+ChunkKey = Tuple[int, int]
+# The sprites in a chunk, by the layer they are from
+ChunkSprites = Dict[str, List[Sprite]]
+# Called with the layer name and the sprites that were loaded or unloaded
+ChunkListener = Callable[[str, List[Sprite]], None]
+
+
+class LevelStreamer:
+    """
+    Streams a large map in chunks, so that only the tiles near the camera have sprites.
+    The map's layers are kept as compact tile grids, along with a template sprite for each tile used, so the parsed map
+    isn't kept once the streamer is created. The sprites for a chunk are created by a worker thread
+    when the camera gets near it, including the chunks just ahead of where the camera is moving.
+    The sprites are only handed to the game, through the listeners, on the main thread, and chunks that
+    are far away are unloaded so that memory and the number of sprites stay the same however large the map is.
+    """
+
+    def __init__(
+        self,
+        map_object: "TileMap",
+        layer_names: Iterable[str],
+        scaling: float,
+        chunk_size: int,
+        radius: int,
+        hit_boxes: Optional[Dict[int, PointList]] = None,
+    ) -> None:
+        """
+        Read the layers into tile grids, create the template sprites and start the worker
+
+        Args:
+            map_object (TileMap): The map read with `read_tmx`
+            layer_names (Iterable[str]): The layers to stream
+            scaling (float): The scaling to create the sprites with
+            chunk_size (int): The width and height of a chunk in tiles
+            radius (int): How many chunks around the camera's chunk are kept loaded
+            hit_boxes (Optional[Dict[int, PointList]], optional): Precomputed hit boxes by gid. Defaults to None.
+        """
+        self.scaling = scaling
+        self.chunk_size = chunk_size
+        self.radius = radius
+        self.grids = {
+            layer_name: TileGrid.from_layer(map_object, layer_name, scaling)
+            for layer_name in layer_names
+        }
+        self.tile_size = map_object.tile_size.width * scaling
+        self.columns: int = map_object.map_size.width
+        self.rows: int = map_object.map_size.height
+        self.hit_boxes = hit_boxes or {}
+
+        # Sprites for each gid, which new sprites take their texture and hit box from.
+        # These are all created now, so the worker only reads them and the map doesn't need to be kept
+        gids = set().union(*(set(grid.gids) for grid in self.grids.values()))
+        gids.discard(0)
+        self.templates: Dict[int, Sprite] = {
+            gid: self.create_template(map_object, gid) for gid in gids
+        }
+
+        self.loaded: Dict[ChunkKey, ChunkSprites] = {}
+        self.pending: Dict[ChunkKey, "Future[ChunkSprites]"] = {}
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        self.load_listeners: List[ChunkListener] = []
+        self.unload_listeners: List[ChunkListener] = []
+
+    def subscribe(self, on_load: ChunkListener, on_unload: ChunkListener) -> None:
+        """
+        Be told when sprites are loaded and unloaded
+
+        Args:
+            on_load (ChunkListener): Called with the sprites of each layer when a chunk is loaded
+            on_unload (ChunkListener): Called with the sprites of each layer when a chunk is unloaded
+        """
+        self.load_listeners.append(on_load)
+        self.unload_listeners.append(on_unload)
+
+    def create_template(self, map_object: "TileMap", gid: int) -> Sprite:
+        """
+        Create the template sprite for a gid
+
+        Args:
+            map_object (TileMap): The map read with `read_tmx`
+            gid (int)
+
+        Returns:
+            Sprite
+        """
+        tile = _get_tile_by_gid(map_object, gid)
+        template: Sprite = _create_sprite_from_tile(
+            map_object,
+            tile,
+            scaling=self.scaling,
+            # The outline doesn't need to be traced if the hit box was precomputed
+            hit_box_algorithm="None" if self.hit_boxes else "Simple",
+        )
+        return template
+
+    def create_sprite(self, gid: int, column: int, row: int) -> Sprite:
+        """
+        Create the sprite for a tile, in the same way `process_layer` does
+
+        Args:
+            gid (int): The tile's gid
+            column (int): The column of the tile
+            row (int): The row of the tile, counted from the bottom
+
+        Returns:
+            Sprite
+        """
+        template = self.templates[gid]
+        sprite = Sprite(scale=template.scale)
+        sprite.texture = template.texture
+        points = tile_hit_box(self.hit_boxes, gid)
+        sprite.set_hit_box(points if points is not None else template.get_hit_box())
+        sprite.center_x = column * self.tile_size + sprite.width / 2
+        sprite.center_y = row * self.tile_size + sprite.height / 2
+        return sprite
+
+    def build_chunk(self, key: ChunkKey) -> ChunkSprites:
+        """
+        Create the sprites for a chunk, this is run on the worker
+
+        Args:
+            key (ChunkKey): The chunk's column and row
+
+        Returns:
+            ChunkSprites
+        """
+        chunk_column, chunk_row = key
+        first_column = chunk_column * self.chunk_size
+        first_row = chunk_row * self.chunk_size
+        chunk: ChunkSprites = {}
+        for layer_name, grid in self.grids.items():
+            sprites = []
+            for row in range(first_row, min(first_row + self.chunk_size, self.rows)):
+                for column in range(
+                    first_column, min(first_column + self.chunk_size, self.columns)
+                ):
+                    gid = grid.gid_at(column, row)
+                    if gid:
+                        sprites.append(self.create_sprite(gid, column, row))
+            chunk[layer_name] = sprites
+        return chunk
+
+    def chunk_at(self, x: float, y: float) -> ChunkKey:
+        chunk_pixels = self.chunk_size * self.tile_size
+        return int(x // chunk_pixels), int(y // chunk_pixels)
+
+    def in_bounds(self, key: ChunkKey) -> bool:
+        return (
+            0 <= key[0] * self.chunk_size < self.columns
+            and 0 <= key[1] * self.chunk_size < self.rows
+        )
+
+    def around(self, center: ChunkKey, radius: int) -> Set[ChunkKey]:
+        return {
+            (center[0] + column, center[1] + row)
+            for column in range(-radius, radius + 1)
+            for row in range(-radius, radius + 1)
+            if self.in_bounds((center[0] + column, center[1] + row))
+        }
+
+    def ahead(
+        self, center: ChunkKey, change_x: float, change_y: float
+    ) -> Set[ChunkKey]:
+        """
+        The chunks just outside the loaded area, in the direction of movement
+
+        Args:
+            center (ChunkKey): The chunk the camera is in
+            change_x (float): The horizontal movement
+            change_y (float): The vertical movement
+
+        Returns:
+            Set[ChunkKey]
+        """
+        distance = self.radius + 1
+        chunks = set()
+        for offset in range(-self.radius, self.radius + 1):
+            if change_x:
+                column = center[0] + (distance if change_x > 0 else -distance)
+                chunks.add((column, center[1] + offset))
+            if change_y:
+                row = center[1] + (distance if change_y > 0 else -distance)
+                chunks.add((center[0] + offset, row))
+        return {chunk for chunk in chunks if self.in_bounds(chunk)}
+
+    def attach(self, key: ChunkKey, chunk: ChunkSprites) -> None:
+        self.loaded[key] = chunk
+        for layer_name, sprites in chunk.items():
+            for listener in self.load_listeners:
+                listener(layer_name, sprites)
+
+    def detach(self, key: ChunkKey) -> None:
+        chunk = self.loaded.pop(key)
+        for layer_name, sprites in chunk.items():
+            for listener in self.unload_listeners:
+                listener(layer_name, sprites)
+
+    def update(self, x: float, y: float, change_x: float, change_y: float) -> None:
+        """
+        Load the chunks around a point, start loading the ones ahead of it and unload those that are far away
+
+        Args:
+            x (float): The x of the centre of the camera
+            y (float): The y of the centre of the camera
+            change_x (float): How the camera is moving horizontally
+            change_y (float): How the camera is moving vertically
+        """
+        center = self.chunk_at(x, y)
+        wanted = self.around(center, self.radius)
+        # Chunks are only unloaded once they're further away than the prefetched chunks,
+        # so moving back and forth over a chunk's edge doesn't load and unload it again
+        keep = self.around(center, self.radius + 1)
+
+        for key in wanted | self.ahead(center, change_x, change_y):
+            if key not in self.loaded and key not in self.pending:
+                self.pending[key] = self.executor.submit(self.build_chunk, key)
+
+        nearby = self.around(center, 1)
+        for key, future in list(self.pending.items()):
+            if key not in keep:
+                future.cancel()
+                del self.pending[key]
+            elif future.done() or key in nearby:
+                # The chunks right next to the camera are needed now, so wait for them
+                del self.pending[key]
+                self.attach(key, future.result())
+
+        for key in [key for key in self.loaded if key not in keep]:
+            self.detach(key)
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker and unload every chunk
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.pending = {}
+        for key in list(self.loaded):
+            self.detach(key)
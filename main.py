@@ -1,25 +1,44 @@
-import os
+import logging
 
 from arcade import Window, run
 
-from static_values import HEIGHT, TITLE, WIDTH
-from views import GameOverView, GameView, GameWonView, InstructionView
-
-# Change the file path to the directory `main.py` is in. This ensures that asset path's will work
-file_path = os.path.dirname(os.path.abspath(__file__))
-os.chdir(file_path)
+from camera import Camera
+from metrics import start_exporter
+from run_history import RunHistory
+from static_values import (
+    CAMERA_SMOOTHING,
+    HEIGHT,
+    METRICS_FLUSH_INTERVAL,
+    RUN_HISTORY_PATH,
+    TITLE,
+    VIEWPORT_MARGIN,
+    WIDTH,
+)
+from views import GameOverView, GameView, GameWonView, InstructionView, LeaderboardView
 
 
 class GameWindow(Window):
     def __init__(self, width: int, height: int, title: str) -> None:
         super().__init__(width=width, height=height, title=title)
+        # The camera is shared between the views, so it must be created first
+        self.camera = Camera(width, height, VIEWPORT_MARGIN, CAMERA_SMOOTHING)
+        self.run_history = RunHistory(RUN_HISTORY_PATH)
         self.instruction_view = InstructionView()
         self.game_view = GameView()
         self.game_over_view = GameOverView()
         self.winning_view = GameWonView()
+        self.leaderboard_view = LeaderboardView()
 
 
 if __name__ == "__main__":
+    # Shows when the quality is changed, along with any other messages
+    logging.basicConfig(level=logging.INFO)
+    exporter = start_exporter(METRICS_FLUSH_INTERVAL)
     window = GameWindow(WIDTH, HEIGHT, TITLE)
     window.show_view(window.instruction_view)
     run()
+    # Save any runs that haven't been written yet
+    window.run_history.close()
+    if exporter is not None:
+        exporter.stop()
+        exporter.join()
@@ -0,0 +1,132 @@
+import logging
+import mmap
+import tracemalloc
+
+from typing import NamedTuple, Optional
+
+from arcade import get_window
+
+logger = logging.getLogger(__name__)
+
+# Frames kept for each allocation, more finds the caller better but makes the game slower
+TRACEBACK_FRAMES = 4
+# How many of the sites that grew the most are written for each transition
+REPORT_TOP = 15
+# Allocations made by the profiler itself aren't reported
+PROFILER_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class MemorySampleTuple(NamedTuple):
+    label: str
+    # Bytes allocated by python, bytes the process is using, and live OpenGL textures
+    traced: int
+    resident: int
+    textures: int
+    snapshot: tracemalloc.Snapshot
+
+
+def resident_memory() -> int:
+    """
+    How much memory the process is using, including images and what the graphics driver keeps in memory
+
+    Returns:
+        int: The bytes, or 0 where it can't be read, which is anywhere but Linux
+    """
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as file:
+            return int(file.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def gpu_texture_count() -> int:
+    """
+    How many OpenGL textures exist
+
+    Returns:
+        int: The count, or 0 if there is no window
+    """
+    try:
+        created, freed = get_window().ctx.stats.texture
+    except RuntimeError:
+        return 0
+    return int(created - freed)
+
+
+class MemoryProfiler:
+    """
+    Snapshots memory with `tracemalloc` at each transition, such as a level being set up or the player dying,
+    and writes what grew since the last transition to a report. Only the last snapshot is kept, so the
+    profiler doesn't grow itself.
+    """
+
+    def __init__(self, report_path: str, top: int = REPORT_TOP) -> None:
+        """
+        Start tracing allocations
+
+        Args:
+            report_path (str): The file the report is appended to
+            top (int, optional): How many sites are written for each transition. Defaults to REPORT_TOP.
+        """
+        self.report_path = report_path
+        self.top = top
+        self.previous: Optional[MemorySampleTuple] = None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEBACK_FRAMES)
+
+    def sample(self, label: str) -> MemorySampleTuple:
+        """
+        Snapshot memory, and report the growth since the last sample
+
+        Args:
+            label (str): What happened, eg `death level 1`
+
+        Returns:
+            MemorySampleTuple
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces(PROFILER_FILTERS)
+        traced, _ = tracemalloc.get_traced_memory()
+        sample = MemorySampleTuple(
+            label, traced, resident_memory(), gpu_texture_count(), snapshot
+        )
+        if self.previous is not None:
+            self.report(self.previous, sample)
+        self.previous = sample
+        return sample
+
+    def report(self, before: MemorySampleTuple, after: MemorySampleTuple) -> None:
+        """
+        Write the sites that grew the most between two samples
+
+        Args:
+            before (MemorySampleTuple)
+            after (MemorySampleTuple)
+        """
+        summary = (
+            f"{before.label} -> {after.label}: {after.traced - before.traced:+d} bytes, "
+            f"{after.resident - before.resident:+d} resident bytes, "
+            f"{after.textures - before.textures:+d} textures"
+        )
+        logger.info(summary)
+        lines = [summary]
+        growth = [
+            stat
+            for stat in after.snapshot.compare_to(before.snapshot, "lineno")
+            if stat.size_diff > 0
+        ]
+        growth.sort(key=lambda stat: stat.size_diff, reverse=True)
+        for stat in growth[: self.top]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"  {stat.size_diff:+d} bytes, {stat.count_diff:+d} blocks "
+                f"at {frame.filename}:{frame.lineno}"
+            )
+        try:
+            with open(self.report_path, "a", encoding="utf-8") as file:
+                file.write("\n".join(lines) + "\n")
+        except OSError as error:
+            logger.warning("Could not write the memory report: %s", error)
@@ -0,0 +1,187 @@
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+import weakref
+
+from typing import Any, Dict, List
+
+# Frames played between each death, so the rising tiles, power and particles all run
+FRAMES_PER_CYCLE = 30
+# Cycles before the baseline is measured, so caches that fill once aren't counted as growth
+WARMUP_CYCLES = 50
+
+
+def use_headless_pyglet() -> None:
+    """
+    Make pyglet render without a display, this must be done before arcade is imported
+    """
+    import pyglet
+
+    pyglet.options["headless"] = True
+    # Importing pyglet.gl first avoids a circular import between pyglet's headless canvas and context, and
+    # pyglet's X input, which arcade imports, expects the xlib window module to be loaded
+    import pyglet.gl
+    import pyglet.window.xlib
+
+    from pyglet.gl.headless import HeadlessContext
+
+    # Headless contexts can't set vsync, which arcade does when creating the window
+    HeadlessContext.set_vsync = lambda self, vsync: None
+
+
+def level_sprite_lists(game_view: Any) -> Dict[str, Any]:
+    """
+    The sprite lists the game view and its physics engine hold, by where they're held
+
+    Args:
+        game_view (GameView)
+
+    Returns:
+        Dict[str, SpriteList]
+    """
+    from arcade import SpriteList
+
+    sprite_lists = {}
+    for owner_name, owner in (
+        ("game_view", game_view),
+        ("physics_engine", game_view.physics_engine),
+    ):
+        for name, value in vars(owner).items():
+            if isinstance(value, SpriteList):
+                sprite_lists[f"{owner_name}.{name}"] = value
+    return sprite_lists
+
+
+def stale_sprite_lists(
+    game_view: Any, previous: Dict[str, "weakref.ref[Any]"]
+) -> List[str]:
+    """
+    Where the sprite lists of the level before the last setup are still held
+
+    Args:
+        game_view (GameView)
+        previous (Dict[str, weakref.ref[SpriteList]]): The sprite lists from before the setup
+
+    Returns:
+        List[str]: What holds each one, empty if they were all freed
+    """
+    gc.collect()
+    current = level_sprite_lists(game_view)
+    stale = []
+    reported = set()
+    for name, reference in previous.items():
+        sprite_list = reference()
+        # Lists that weren't replaced by the setup are still the level's
+        if sprite_list is None or current.get(name) is sprite_list:
+            continue
+        if id(sprite_list) in reported:
+            continue
+        reported.add(id(sprite_list))
+        holders = [
+            held_name for held_name, held in current.items() if held is sprite_list
+        ]
+        # Sprites remember their lists, so a sprite left in the contact list keeps its old list alive
+        if any(sprite_list in sprite.sprite_lists for sprite in game_view.contact_list):
+            holders.append("game_view.contact_list's sprites")
+        stale.append(f"{name}, held by {', '.join(holders) or 'something else'}")
+    return stale
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Die and retry a level many times, and fail if memory keeps growing"
+    )
+    parser.add_argument("--cycles", type=int, default=1000)
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument(
+        "--tolerance",
+        type=int,
+        default=256,
+        help="KiB that python's memory can grow by after the warm up",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Render without a display, this needs EGL",
+    )
+    parser.add_argument(
+        "--report", help="Also write a memory report of every death and setup here"
+    )
+    args = parser.parse_args()
+
+    if args.headless:
+        use_headless_pyglet()
+    if args.report:
+        os.environ["GAME_MEMORY_PROFILE"] = args.report
+
+    # Imported after the options are set, as creating the window depends on them
+    from main import GameWindow
+    from memory_profile import TRACEBACK_FRAMES, gpu_texture_count
+    from static_values import HEIGHT, TITLE, WIDTH
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEBACK_FRAMES)
+    window = GameWindow(WIDTH, HEIGHT, TITLE)
+    window.set_visible(False)
+    game_view = window.game_view
+    game_view.setup(args.level)
+    window.show_view(game_view)
+
+    warmup_cycles = min(WARMUP_CYCLES, args.cycles // 2)
+    # Cycles alternate between restoring and setting up, which leave different textures loaded until the next
+    # draw, so the baseline is taken after the same kind of cycle as the last one
+    if (args.cycles - 1 - warmup_cycles) % 2:
+        warmup_cycles -= 1
+    baseline_memory = baseline_textures = 0
+    stale: List[str] = []
+    for cycle in range(args.cycles):
+        for _ in range(FRAMES_PER_CYCLE):
+            game_view.on_update(1 / 60)
+            game_view.on_draw()
+            if window.current_view is not game_view:
+                # The player died or finished the level on its own
+                break
+        if window.current_view is game_view:
+            game_view.death()
+        if cycle % 2:
+            # The same as clicking on the game over view, which restores the checkpoint
+            game_view.restart(args.level)
+        else:
+            # The same as choosing the level again, which loads it from the map
+            previous = {
+                name: weakref.ref(sprite_list)
+                for name, sprite_list in level_sprite_lists(game_view).items()
+            }
+            game_view.setup(args.level)
+            stale = stale or stale_sprite_lists(game_view, previous)
+        window.show_view(game_view)
+
+        if cycle == warmup_cycles:
+            gc.collect()
+            baseline_memory = tracemalloc.get_traced_memory()[0]
+            baseline_textures = gpu_texture_count()
+
+    gc.collect()
+    memory_growth = tracemalloc.get_traced_memory()[0] - baseline_memory
+    texture_growth = gpu_texture_count() - baseline_textures
+    window.run_history.close()
+    window.close()
+
+    print(
+        f"After {args.cycles} deaths memory grew by {memory_growth / 1024:.1f} KiB, "
+        f"and by {texture_growth} textures"
+    )
+    if not stale:
+        print("No sprite lists were kept from a previous level")
+    for name in stale:
+        print(f"The previous level's {name}")
+    if memory_growth > args.tolerance * 1024 or texture_growth > 0 or stale:
+        print("Memory is not flat")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
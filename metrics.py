@@ -0,0 +1,317 @@
+import logging
+import os
+import socket
+import threading
+import time
+
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+LabelsTuple = Tuple[Tuple[str, str], ...]
+
+# Bucket boundaries, in seconds
+FRAME_TIME_BUCKETS = (
+    0.004,
+    0.008,
+    0.012,
+    0.016,
+    0.020,
+    0.025,
+    0.033,
+    0.050,
+    0.100,
+    0.250,
+)
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def format_labels(labels: LabelsTuple) -> str:
+    """
+    Format labels in the prometheus text format, eg `{level="1"}`
+
+    Args:
+        labels (LabelsTuple)
+
+    Returns:
+        str: The formatted labels, or an empty string if there are none
+    """
+    if not labels:
+        return ""
+    inner = ",".join(f'{key}="{value}"' for key, value in labels)
+    return f"{{{inner}}}"
+
+
+class Counter:
+    """
+    A value that only goes up. Incrementing is a single addition so it can be used on the hot path.
+    """
+
+    __slots__ = ("name", "labels", "value")
+
+    def __init__(self, name: str, labels: LabelsTuple) -> None:
+        self.name = name
+        self.labels = labels
+        self.value: float = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{format_labels(self.labels)} {self.value}"]
+
+
+class Histogram:
+    """
+    Counts observations into fixed buckets, so percentiles can be estimated without storing every value.
+    """
+
+    __slots__ = ("name", "labels", "buckets", "counts", "sum", "count")
+
+    def __init__(
+        self, name: str, labels: LabelsTuple, buckets: Sequence[float]
+    ) -> None:
+        self.name = name
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # The last count is for values above every bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum: float = 0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def percentile(self, percent: float) -> float:
+        """
+        Estimate a percentile from the buckets, interpolating within the bucket it falls in
+
+        Args:
+            percent (float): The percentile, from 0 to 100
+
+        Returns:
+            float: The estimated value, or 0 if nothing has been observed
+        """
+        counts = list(self.counts)
+        total = sum(counts)
+        if total == 0:
+            return 0
+        rank = total * percent / 100
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0
+                if index == len(self.buckets):
+                    # Above the highest bucket, so the best estimate is that bucket
+                    return lower
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = []
+        cumulative = 0
+        counts = list(self.counts)
+        for bucket, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = format_labels(self.labels + (("le", str(bucket)),))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        cumulative += counts[-1]
+        labels = format_labels(self.labels + (("le", "+Inf"),))
+        lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{format_labels(self.labels)} {self.sum}")
+        lines.append(f"{self.name}_count{format_labels(self.labels)} {cumulative}")
+        return lines
+
+
+Metric = Union[Counter, Histogram]
+
+
+class MetricsRegistry:
+    """
+    Holds every metric. Getting a metric creates it the first time, and after that returns the same object,
+    so the metric can be fetched once and kept for use on the hot path.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: Dict[Tuple[str, LabelsTuple], Metric] = {}
+        self.descriptions: Dict[str, Tuple[str, str]] = {}
+        self.lock = threading.Lock()
+
+    def _get(
+        self,
+        kind: str,
+        name: str,
+        description: str,
+        labels: Dict[str, Union[str, int]],
+        buckets: Sequence[float] = (),
+    ) -> Metric:
+        labels_tuple = tuple(sorted((key, str(value)) for key, value in labels.items()))
+        key = (name, labels_tuple)
+        metric = self.metrics.get(key)
+        if metric is not None:
+            return metric
+        with self.lock:
+            metric = (
+                Counter(name, labels_tuple)
+                if kind == "counter"
+                else Histogram(name, labels_tuple, buckets)
+            )
+            self.metrics[key] = metric
+            self.descriptions[name] = (kind, description)
+        return metric
+
+    def counter(
+        self, name: str, description: str, **labels: Union[str, int]
+    ) -> Counter:
+        metric = self._get("counter", name, description, labels)
+        assert isinstance(metric, Counter)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        buckets: Sequence[float] = DURATION_BUCKETS,
+        **labels: Union[str, int],
+    ) -> Histogram:
+        metric = self._get("histogram", name, description, labels, buckets)
+        assert isinstance(metric, Histogram)
+        return metric
+
+    def render(self) -> str:
+        """
+        Render every metric in the prometheus text format
+
+        Returns:
+            str
+        """
+        with self.lock:
+            metrics = sorted(self.metrics.items())
+            descriptions = dict(self.descriptions)
+
+        lines = []
+        last_name = None
+        for (name, _), metric in metrics:
+            if name != last_name:
+                kind, description = descriptions[name]
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                last_name = name
+            lines.extend(metric.render())
+            if isinstance(metric, Histogram) and metric.buckets == FRAME_TIME_BUCKETS:
+                # Estimated percentiles for the frame time, so the file can be read without a prometheus server
+                for percent in (50, 90, 99):
+                    quantile = str(percent / 100)
+                    labels = format_labels(metric.labels + (("quantile", quantile),))
+                    estimate = metric.percentile(percent)
+                    lines.append(f"{name}_estimate{labels} {estimate}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter(threading.Thread):
+    """
+    Background thread that periodically writes the metrics to a file, rotating it when it gets too large,
+    or sends them to a unix socket if the target starts with `unix:`
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        target: str,
+        interval: float,
+        max_bytes: int = 1_000_000,
+        backups: int = 3,
+    ) -> None:
+        """
+        Create the exporter, `start()` must be called for it to run
+
+        Args:
+            registry (MetricsRegistry): The registry to export
+            target (str): A file path, or `unix:<path>` for a unix socket
+            interval (float): Seconds between each flush
+            max_bytes (int, optional): The size the file is rotated at. Defaults to 1_000_000.
+            backups (int, optional): How many rotated files to keep. Defaults to 3.
+        """
+        super().__init__(name="metrics-exporter", daemon=True)
+        self.registry = registry
+        self.target = target
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.stopped = threading.Event()
+
+    def rotate(self) -> None:
+        """
+        Move `file` to `file.1`, `file.1` to `file.2`, and so on, dropping the oldest
+        """
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.target}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.target}.{index + 1}")
+        os.replace(self.target, f"{self.target}.1")
+
+    def write_file(self, text: str) -> None:
+        if (
+            os.path.exists(self.target)
+            and os.path.getsize(self.target) + len(text) > self.max_bytes
+        ):
+            self.rotate()
+        with open(self.target, "a", encoding="utf-8") as file:
+            file.write(f"# Flushed at {time.time():.3f}\n")
+            file.write(text)
+
+    def write_socket(self, text: str) -> None:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(self.interval)
+            connection.connect(self.target[len("unix:") :])
+            connection.sendall(text.encode("utf-8"))
+
+    def flush(self) -> None:
+        """
+        Write the current value of every metric to the target
+        """
+        text = self.registry.render()
+        try:
+            if self.target.startswith("unix:"):
+                self.write_socket(text)
+            else:
+                self.write_file(text)
+        except OSError as error:
+            logger.warning("Could not export metrics to %s: %s", self.target, error)
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.flush()
+        # Make sure the last values are written when the game closes
+        self.flush()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+# The registry used by the game
+registry = MetricsRegistry()
+
+
+def start_exporter(interval: float) -> Optional[MetricsExporter]:
+    """
+    Start exporting the game's metrics if the `GAME_METRICS` environment variable is set.
+    It should be a file path, or `unix:<path>` to send them to a unix socket.
+
+    Args:
+        interval (float): Seconds between each flush
+
+    Returns:
+        Optional[MetricsExporter]: The running exporter, or None if metrics are not being exported
+    """
+    target = os.environ.get("GAME_METRICS")
+    if not target:
+        return None
+    exporter = MetricsExporter(registry, target, interval)
+    exporter.start()
+    return exporter
@@ -0,0 +1,202 @@
+import math
+
+from typing import TYPE_CHECKING, Dict, Set, Tuple
+
+import numpy as np
+
+from arcade import Sprite, SpriteList, SpriteSolidColor, Texture
+from arcade.color import WHITE
+from PIL import Image
+
+from tile_grid import TileGrid
+
+if TYPE_CHECKING:
+    from pytiled_parser.objects import TileMap
+
+ColorTuple = Tuple[int, int, int]
+
+# Behind the tiles, so the minimap can be seen over the level
+BACKGROUND_COLOR = (0, 0, 0, 140)
+PLAYER_MARKER_SIZE = 6
+
+
+class Minimap:
+    """
+    A small map of the whole level in a corner of the screen. It's built once per level straight from
+    the layers of the tmx file, one pixel per tile, or per block of tiles on maps too large to fit.
+    Only the pixels of batteries that are collected or revived are changed after that, and the texture
+    is only made again on frames where one has changed. Each frame draws the map and the player's marker.
+    """
+
+    def __init__(
+        self, x_offset: int, y_offset: int, max_width: int, max_height: int
+    ) -> None:
+        """
+        Create the minimap, `build` must be called before it's drawn
+
+        Args:
+            x_offset (int): The left of the minimap, from the left of the screen
+            y_offset (int): The top of the minimap, from the bottom of the screen
+            max_width (int): The most pixels wide the minimap can be
+            max_height (int): The most pixels high the minimap can be
+        """
+        self.x_offset = x_offset
+        self.y_offset = y_offset
+        self.max_width = max_width
+        self.max_height = max_height
+
+        # How many tiles wide and high each pixel of the texture is
+        self.step = 1
+        self.tile_size: float = 1
+        # Screen pixels per pixel of the texture
+        self.scale: float = 1
+        # The colour index of each pixel without batteries, and the colours, rows are from the bottom
+        self.base = np.zeros((1, 1), np.uint8)
+        self.palette = np.zeros((1, 4), np.uint8)
+        self.battery_index = 0
+        # How many batteries each pixel has, and how many of them are dormant
+        self.battery_counts = np.zeros((1, 1), np.int32)
+        self.dormant_counts = np.zeros((1, 1), np.int32)
+        # The column and row of each dormant battery
+        self.dormant: Set[Tuple[int, int]] = set()
+        self.pixels = np.zeros((1, 1, 4), np.uint8)
+        self.version = 0
+        self.changed = False
+
+        self.map_sprite = Sprite()
+        self.player_marker = SpriteSolidColor(
+            PLAYER_MARKER_SIZE, PLAYER_MARKER_SIZE, WHITE
+        )
+        self.sprite_list = SpriteList()
+        self.sprite_list.append(self.map_sprite)
+        self.sprite_list.append(self.player_marker)
+
+    def cell_counts(self, grid: TileGrid) -> np.ndarray:
+        """
+        Count the occupied cells of a layer in each pixel
+
+        Args:
+            grid (TileGrid)
+
+        Returns:
+            np.ndarray: The counts, by row and column of the pixel
+        """
+        height, width = self.base.shape
+        gids = np.frombuffer(grid.gids, np.uint32).reshape(grid.rows, grid.columns)
+        rows, columns = np.nonzero(gids)
+        counts = np.zeros((height, width), np.int32)
+        np.add.at(counts, (rows // self.step, columns // self.step), 1)
+        return counts
+
+    def build(
+        self,
+        map_object: "TileMap",
+        scaling: float,
+        layer_colors: Dict[str, ColorTuple],
+        battery_layer_name: str,
+    ) -> None:
+        """
+        Create the minimap of a level
+
+        Args:
+            map_object (TileMap): The map read with `read_tmx`
+            scaling (float): The scaling the layers' sprites are created with
+            layer_colors (Dict[str, ColorTuple]): The colour of each layer, later layers are drawn over earlier ones
+            battery_layer_name (str): The layer of the batteries, which can change
+        """
+        columns = map_object.map_size.width
+        rows = map_object.map_size.height
+        self.tile_size = map_object.tile_size.width * scaling
+        self.step = max(
+            1, math.ceil(max(columns / self.max_width, rows / self.max_height))
+        )
+        width = math.ceil(columns / self.step)
+        height = math.ceil(rows / self.step)
+        self.scale = min(self.max_width / width, self.max_height / height)
+
+        self.base = np.zeros((height, width), np.uint8)
+        self.palette = np.array(
+            [BACKGROUND_COLOR] + [(*color, 255) for color in layer_colors.values()],
+            np.uint8,
+        )
+        for index, layer_name in enumerate(layer_colors, 1):
+            counts = self.cell_counts(TileGrid.from_layer(map_object, layer_name, 1))
+            if layer_name == battery_layer_name:
+                self.battery_index = index
+                self.battery_counts = counts
+            else:
+                self.base[counts > 0] = index
+        self.dormant_counts = np.zeros((height, width), np.int32)
+        self.dormant = set()
+
+        batteries = (self.battery_counts > 0) & (self.base < self.battery_index)
+        self.pixels = self.palette[np.where(batteries, self.battery_index, self.base)]
+        self.changed = True
+
+    def set_battery(self, sprite: Sprite, available: bool) -> None:
+        """
+        Show or hide a battery
+
+        Args:
+            sprite (Sprite): The battery
+            available (bool): If the battery can be collected, rather than dormant
+        """
+        cell = (
+            int(sprite.center_x // self.tile_size),
+            int(sprite.center_y // self.tile_size),
+        )
+        if available == (cell not in self.dormant):
+            return
+        if available:
+            self.dormant.discard(cell)
+        else:
+            self.dormant.add(cell)
+        row = cell[1] // self.step
+        column = cell[0] // self.step
+        if not (0 <= row < self.base.shape[0] and 0 <= column < self.base.shape[1]):
+            return
+        self.dormant_counts[row, column] += -1 if available else 1
+
+        index = self.base[row, column]
+        if (
+            self.battery_counts[row, column] > self.dormant_counts[row, column]
+            and index < self.battery_index
+        ):
+            index = self.battery_index
+        self.pixels[row, column] = self.palette[index]
+        self.changed = True
+
+    def update_texture(self) -> None:
+        # The rows are stored from the bottom, images are from the top
+        image = Image.fromarray(np.ascontiguousarray(self.pixels[::-1]), "RGBA")
+        # Each version needs its own name, otherwise the sprite list keeps the old one
+        self.version += 1
+        self.map_sprite.texture = Texture(
+            f"minimap_{id(self)}_{self.version}", image, hit_box_algorithm="None"
+        )
+        self.map_sprite.scale = self.scale
+        self.changed = False
+
+    def draw(self, x: int, y: int, player: Sprite) -> None:
+        """
+        Draw the minimap
+
+        Args:
+            x (int): X offset (screen offset)
+            y (int): Y offset (screen offset)
+            player (Sprite): The player, shown as a marker
+        """
+        if self.changed:
+            self.update_texture()
+        left = x + self.x_offset
+        top = y + self.y_offset
+        self.map_sprite.left = left
+        self.map_sprite.top = top
+
+        pixels_per_world = self.scale / (self.tile_size * self.step)
+        self.player_marker.center_x = left + player.center_x * pixels_per_world
+        self.player_marker.center_y = (
+            top - self.map_sprite.height + player.center_y * pixels_per_world
+        )
+        # The tiles stay as sharp squares
+        self.sprite_list.draw(filter=True)
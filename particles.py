@@ -0,0 +1,333 @@
+import math
+
+from typing import Any, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from arcade import get_window
+from arcade.color import LIGHT_YELLOW, RED_ORANGE, WHITE, YELLOW
+from arcade.gl import BufferDescription
+
+# Enough for every effect at once, new particles replace the oldest when it's full
+PARTICLE_CAPACITY = 65536
+# The most particles one burst, or one update of snow, can emit
+MAX_EMIT = 4096
+
+PARTICLE_VERTEX_SHADER = """
+#version 330
+
+uniform Projection {
+    uniform mat4 matrix;
+} proj;
+
+in vec2 in_position;
+in float in_life;
+in float in_size;
+in vec4 in_color;
+out vec4 v_color;
+
+void main() {
+    gl_Position = proj.matrix * vec4(in_position, 0.0, 1.0);
+    // Dead particles have no size, so nothing is drawn for them
+    gl_PointSize = in_life > 0.0 ? in_size : 0.0;
+    // Fade out over the last half second
+    v_color = vec4(in_color.rgb, in_color.a * clamp(in_life * 2.0, 0.0, 1.0));
+}
+"""
+
+PARTICLE_FRAGMENT_SHADER = """
+#version 330
+
+in vec4 v_color;
+out vec4 f_color;
+
+void main() {
+    // Round points, rather than squares
+    vec2 offset = gl_PointCoord - vec2(0.5);
+    if (dot(offset, offset) > 0.25) {
+        discard;
+    }
+    f_color = v_color;
+}
+"""
+
+
+class EffectTuple(NamedTuple):
+    """
+    How the particles of an effect are emitted. Speeds are in pixels per second, and angles in degrees
+    """
+
+    amount: int
+    speed: Tuple[float, float]
+    # The direction the particles are thrown in, and how far either side of it they spread
+    angle: float
+    spread: float
+    # Seconds
+    life: Tuple[float, float]
+    size: Tuple[float, float]
+    color: Tuple[int, int, int]
+    # Pixels per second per second, negative is down
+    gravity: float
+
+
+BATTERY_BURST = EffectTuple(40, (120, 360), 90, 180, (0.4, 0.9), (3, 6), YELLOW, -600)
+DEATH_BURST = EffectTuple(
+    300, (200, 700), 90, 180, (0.8, 1.6), (3, 8), RED_ORANGE, -900
+)
+SPRINGBOARD_BURST = EffectTuple(
+    30, (60, 200), 90, 70, (0.3, 0.6), (4, 7), LIGHT_YELLOW, -300
+)
+SNOW = EffectTuple(0, (30, 70), 260, 30, (20, 30), (2, 5), WHITE, 0)
+
+
+class ParticleSystem:
+    """
+    Particles for effects, such as snow and bursts when batteries are collected. Every particle is a slot
+    in fixed size arrays used as a ring, so emitting never allocates and the oldest particles are replaced
+    when it's full. They're moved for all particles at once with numpy, into arrays made when the system
+    is created, and drawn as points in one draw call.
+    """
+
+    def __init__(
+        self, capacity: int = PARTICLE_CAPACITY, seed: Optional[int] = None
+    ) -> None:
+        """
+        Create the particle system
+
+        Args:
+            capacity (int, optional): The most live particles. Defaults to PARTICLE_CAPACITY.
+            seed (Optional[int], optional): Seed for the random numbers. Defaults to a random seed.
+        """
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        # The slot the next particle is put in, and how many slots have ever been used
+        self.head = 0
+        self.used = 0
+
+        self.position = np.zeros((capacity, 2), np.float32)
+        self.velocity = np.zeros((capacity, 2), np.float32)
+        self.gravity = np.zeros(capacity, np.float32)
+        # Seconds until the particle disappears, it's dead at 0 or less
+        self.life = np.zeros(capacity, np.float32)
+        self.size = np.zeros(capacity, np.float32)
+        self.color = np.zeros((capacity, 4), np.uint8)
+
+        # Reused every update and emit, so they don't allocate
+        self.step = np.zeros((capacity, 2), np.float32)
+        self.below = np.zeros(capacity, bool)
+        self.random = np.zeros(4 * MAX_EMIT, np.float32)
+
+        # Sizes and colours only change when particles are emitted, so they are only uploaded then
+        self.emitted = False
+        # How many snowflakes are owed, snow is emitted a fraction of a flake at a time
+        self.snow_owed: float = 0
+        # Created when first drawn, once there's a window
+        self.ctx: Any = None
+        self.program: Any = None
+        self.geometry: Any = None
+        self.buffers: Tuple[Any, ...] = ()
+
+    def clear(self) -> None:
+        self.life.fill(0)
+        self.head = 0
+        self.used = 0
+        self.snow_owed = 0
+
+    def random_rows(self, rows: int, count: int) -> np.ndarray:
+        """
+        Fill part of the reused random array, as rows of random numbers between 0 and 1
+
+        Args:
+            rows (int)
+            count (int): The length of each row
+
+        Returns:
+            np.ndarray
+        """
+        random = self.random[: rows * count].reshape(rows, count)
+        self.rng.random(dtype=np.float32, out=random)
+        return random
+
+    def emit_slots(self, start: int, count: int, effect: EffectTuple) -> None:
+        """
+        Fill a run of slots that doesn't wrap around the end of the arrays. The positions must be set after
+
+        Args:
+            start (int): The first slot
+            count (int): How many slots
+            effect (EffectTuple)
+        """
+        end = start + count
+        random = self.random_rows(4, count)
+        angle = random[0]
+        angle -= 0.5
+        angle *= math.radians(effect.spread)
+        angle += math.radians(effect.angle)
+        speed = random[1]
+        speed *= effect.speed[1] - effect.speed[0]
+        speed += effect.speed[0]
+        np.cos(angle, out=self.velocity[start:end, 0])
+        np.sin(angle, out=self.velocity[start:end, 1])
+        self.velocity[start:end, 0] *= speed
+        self.velocity[start:end, 1] *= speed
+
+        life = self.life[start:end]
+        np.multiply(random[2], effect.life[1] - effect.life[0], out=life)
+        life += effect.life[0]
+        size = self.size[start:end]
+        np.multiply(random[3], effect.size[1] - effect.size[0], out=size)
+        size += effect.size[0]
+
+        self.gravity[start:end] = effect.gravity
+        self.color[start:end, :3] = effect.color
+        self.color[start:end, 3] = 255
+
+    def allocate(self, count: int) -> Tuple[slice, slice]:
+        """
+        Take the next slots of the ring
+
+        Args:
+            count (int): How many slots, at most MAX_EMIT
+
+        Returns:
+            Tuple[slice, slice]: The slots up to the end of the arrays, and the slots that wrapped around to the start
+        """
+        start = self.head
+        first = min(count, self.capacity - start)
+        self.head = (start + count) % self.capacity
+        self.used = min(self.capacity, self.used + count)
+        self.emitted = True
+        return slice(start, start + first), slice(0, count - first)
+
+    def emit(
+        self, effect: EffectTuple, x: float, y: float, count: Optional[int] = None
+    ) -> None:
+        """
+        Emit a burst of particles from a point
+
+        Args:
+            effect (EffectTuple)
+            x (float)
+            y (float)
+            count (Optional[int], optional): How many particles. Defaults to the effect's count.
+        """
+        count = min(MAX_EMIT, effect.amount if count is None else count)
+        for slots in self.allocate(count):
+            if slots.stop > slots.start:
+                self.emit_slots(slots.start, slots.stop - slots.start, effect)
+                self.position[slots] = (x, y)
+
+    def snow(
+        self,
+        view_left: float,
+        view_bottom: float,
+        width: float,
+        height: float,
+        rate: float,
+        delta_time: float,
+        fill: bool = False,
+    ) -> None:
+        """
+        Emit snow across the top of the viewport. Snow that falls out of the bottom of the viewport is removed in `update`
+
+        Args:
+            view_left (float)
+            view_bottom (float)
+            width (float): The width of the viewport
+            height (float): The height of the viewport
+            rate (float): Snowflakes per second
+            delta_time (float)
+            fill (bool, optional): Spread the snow over the whole viewport, rather than the top, for when it starts. Defaults to False.
+        """
+        self.snow_owed += rate * delta_time
+        count = min(MAX_EMIT, int(self.snow_owed))
+        self.snow_owed -= count
+        if count == 0:
+            return
+        for slots in self.allocate(count):
+            slot_count = slots.stop - slots.start
+            if slot_count == 0:
+                continue
+            self.emit_slots(slots.start, slot_count, SNOW)
+            random = self.random_rows(2, slot_count)
+            x = self.position[slots, 0]
+            np.multiply(random[0], width, out=x)
+            x += view_left
+            y = self.position[slots, 1]
+            if fill:
+                np.multiply(random[1], height, out=y)
+                y += view_bottom
+            else:
+                # Just above the top, so it doesn't appear in view
+                y.fill(view_bottom + height + 8)
+
+    def update(self, delta_time: float, view_bottom: Optional[float] = None) -> None:
+        """
+        Move every particle, and age them
+
+        Args:
+            delta_time (float)
+            view_bottom (Optional[float], optional): Particles below this are removed. Defaults to keeping them.
+        """
+        used = self.used
+        if used == 0:
+            return
+        life = self.life[:used]
+        life -= delta_time
+        velocity = self.velocity[:used]
+        step = self.step[:used, 0]
+        np.multiply(self.gravity[:used], delta_time, out=step)
+        velocity[:, 1] += step
+        step = self.step[:used]
+        np.multiply(velocity, delta_time, out=step)
+        self.position[:used] += step
+        if view_bottom is not None:
+            below = self.below[:used]
+            np.less(self.position[:used, 1], view_bottom - 16, out=below)
+            np.putmask(life, below, 0)
+
+    def create_buffers(self) -> None:
+        ctx = get_window().ctx
+        self.ctx = ctx
+        self.program = ctx.program(
+            vertex_shader=PARTICLE_VERTEX_SHADER,
+            fragment_shader=PARTICLE_FRAGMENT_SHADER,
+        )
+        position = ctx.buffer(reserve=self.position.nbytes, usage="stream")
+        life = ctx.buffer(reserve=self.life.nbytes, usage="stream")
+        size = ctx.buffer(reserve=self.size.nbytes, usage="dynamic")
+        color = ctx.buffer(reserve=self.color.nbytes, usage="dynamic")
+        self.buffers = (position, life, size, color)
+        self.geometry = ctx.geometry(
+            [
+                BufferDescription(position, "2f", ["in_position"]),
+                BufferDescription(life, "1f", ["in_life"]),
+                BufferDescription(size, "1f", ["in_size"]),
+                BufferDescription(color, "4f1", ["in_color"], normalized=["in_color"]),
+            ],
+        )
+
+    def draw(self) -> None:
+        """
+        Draw every particle, in one draw call
+        """
+        used = self.used
+        if used == 0:
+            return
+        if self.geometry is None:
+            self.create_buffers()
+        position, life, size, color = self.buffers
+        position.write(self.position[:used])
+        life.write(self.life[:used])
+        if self.emitted:
+            size.write(self.size[:used])
+            color.write(self.color[:used])
+            self.emitted = False
+
+        ctx = self.ctx
+        ctx.enable(ctx.BLEND, ctx.PROGRAM_POINT_SIZE)
+        ctx.blend_func = ctx.BLEND_DEFAULT
+        # The mode is given here rather than when the geometry is created, as arcade takes a mode of 0,
+        # which POINTS is, as not being set and draws triangles instead
+        self.geometry.render(self.program, mode=ctx.POINTS, vertices=used)
+        ctx.disable(ctx.PROGRAM_POINT_SIZE)
@@ -0,0 +1,30 @@
+from .arcade_engine import ArcadePhysicsEngine
+from .base import NO_CONTACTS, ContactState, PhysicsEngine, SurfaceType
+from .tile_engine import (
+    BoxTuple,
+    CollisionGrid,
+    MovementTuple,
+    SweepHitTuple,
+    TilePhysicsEngine,
+    sprite_box,
+    sweep,
+    sweep_sprites,
+    swept_box,
+)
+
+__all__ = (
+    "ArcadePhysicsEngine",
+    "BoxTuple",
+    "CollisionGrid",
+    "ContactState",
+    "MovementTuple",
+    "NO_CONTACTS",
+    "PhysicsEngine",
+    "SurfaceType",
+    "SweepHitTuple",
+    "TilePhysicsEngine",
+    "sprite_box",
+    "sweep",
+    "sweep_sprites",
+    "swept_box",
+)
@@ -0,0 +1,128 @@
+from typing import TYPE_CHECKING, List
+
+from arcade import (
+    PhysicsEnginePlatformer,
+    Sprite,
+    SpriteList,
+    check_for_collision_with_list,
+)
+
+from physics.base import (
+    CONTACT_TOLERANCE,
+    GROUND_PROBE_DISTANCE,
+    ContactState,
+    PhysicsEngine,
+    SurfaceType,
+)
+from physics.tile_engine import BoxTuple, overlaps, sprite_box
+
+if TYPE_CHECKING:
+    from sprites.rising_tiles import RisingTileSystem
+
+
+class ArcadePhysicsEngine(PhysicsEngine):
+    """
+    Backend using arcade's platformer physics engine, which checks the player against every sprite in a sprite list.
+    The rising tiles aren't sprites, so the player is pushed out of them after arcade's engine has moved it
+    """
+
+    def __init__(
+        self,
+        player: Sprite,
+        contact_list: SpriteList,
+        spring_board_list: SpriteList,
+        rising_tiles: "RisingTileSystem",
+        gravity: float,
+    ) -> None:
+        """
+        Create the engine
+
+        Args:
+            player (Sprite): The sprite being moved
+            contact_list (SpriteList): Every sprite the player can stand on or walk into
+            spring_board_list (SpriteList): The springboards, these must also be in `contact_list`
+            rising_tiles (RisingTileSystem): The tiles that rise, these are solid too
+            gravity (float): How much the player's change_y is reduced each update
+        """
+        super().__init__(player, gravity)
+        self.contact_list = contact_list
+        self.rising_tiles = rising_tiles
+        self.spring_board_list = spring_board_list
+        self.engine = PhysicsEnginePlatformer(player, contact_list, gravity)
+
+    def surface_type(self, sprite: Sprite) -> SurfaceType:
+        if self.spring_board_list in sprite.sprite_lists:
+            return SurfaceType.SPRINGBOARD
+        return SurfaceType.WALL
+
+    def push_out_of_rising_tiles(self) -> List[BoxTuple]:
+        """
+        Move the player out of the rising tiles it overlaps, the shortest way. The tiles rise
+        into the player from below, so it's usually pushed on top of them
+
+        Returns:
+            List[BoxTuple]: The tiles the player was pushed out of
+        """
+        player = self.player
+        tiles = self.rising_tiles.overlapping(sprite_box(player))
+        for tile in tiles:
+            box = sprite_box(player)
+            if not overlaps(box, tile):
+                continue
+            up = tile.top - box.bottom
+            down = box.top - tile.bottom
+            left = box.right - tile.left
+            right = tile.right - box.left
+            shortest = min(up, down, left, right)
+            if shortest == up:
+                player.bottom = tile.top
+                player.change_y = max(player.change_y, 0)
+            elif shortest == down:
+                player.top = tile.bottom
+                player.change_y = min(player.change_y, 0)
+            elif shortest == left:
+                player.right = tile.left
+            else:
+                player.left = tile.right
+        return tiles
+
+    def update(self) -> None:
+        hits: List[Sprite] = self.engine.update() or []
+        player = self.player
+        boxes = [sprite_box(hit) for hit in hits] + self.push_out_of_rising_tiles()
+
+        # Anything the player was stopped by this update is next to it
+        ceiling = wall_left = wall_right = False
+        for hit in boxes:
+            if hit.bottom >= player.top - CONTACT_TOLERANCE:
+                ceiling = True
+            elif hit.right <= player.left + CONTACT_TOLERANCE:
+                wall_left = True
+            elif hit.left >= player.right - CONTACT_TOLERANCE:
+                wall_right = True
+
+        # The same check as `PhysicsEnginePlatformer.can_jump`, but the sprites found are kept
+        player.center_y -= GROUND_PROBE_DISTANCE
+        below = [
+            sprite_box(sprite, self.surface_type(sprite))
+            for sprite in check_for_collision_with_list(player, self.contact_list)
+        ]
+        player.center_y += GROUND_PROBE_DISTANCE
+        box = sprite_box(player)
+        below += self.rising_tiles.overlapping(
+            box._replace(bottom=box.bottom - GROUND_PROBE_DISTANCE, top=box.bottom)
+        )
+
+        surface = SurfaceType.NONE
+        if below:
+            # Use what's under the middle of the player, if there's nothing there it must be on an edge
+            under = [hit for hit in below if hit.left <= player.center_x <= hit.right]
+            surface = (under or below)[0].surface
+
+        self.contacts = ContactState(
+            grounded=len(below) > 0,
+            surface=surface,
+            ceiling=ceiling,
+            wall_left=wall_left,
+            wall_right=wall_right,
+        )
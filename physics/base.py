@@ -0,0 +1,62 @@
+from abc import ABC, abstractmethod
+from enum import IntEnum
+from typing import NamedTuple
+
+from arcade import Sprite
+
+# How far below the player to look for something to stand on
+GROUND_PROBE_DISTANCE = 5
+
+# How close something must be to the player to count as touching it
+CONTACT_TOLERANCE = 2
+
+
+class SurfaceType(IntEnum):
+    NONE = 0
+    WALL = 1
+    SPRINGBOARD = 2
+    RISING = 3
+
+
+class ContactState(NamedTuple):
+    """
+    What the player is touching, worked out once per update by the physics engine
+    """
+
+    grounded: bool
+    # What the player is standing on
+    surface: SurfaceType
+    ceiling: bool
+    wall_left: bool
+    wall_right: bool
+
+
+NO_CONTACTS = ContactState(False, SurfaceType.NONE, False, False, False)
+
+
+class PhysicsEngine(ABC):
+    """
+    The interface that the game uses to move the player. Different backends can be used to
+    resolve the movement, as long as they act the same from the player's point of view.
+    Each update publishes what the player is touching in `contacts`, so nothing else needs to check again.
+    """
+
+    def __init__(self, player: Sprite, gravity: float) -> None:
+        self.player = player
+        self.gravity = gravity
+        self.contacts = NO_CONTACTS
+
+    @abstractmethod
+    def update(self) -> None:
+        """
+        Apply gravity and move the player, stopping it at anything solid, then update `contacts`
+        """
+
+    def can_jump(self) -> bool:
+        """
+        If the player was standing on something at the end of the last update
+
+        Returns:
+            bool
+        """
+        return self.contacts.grounded
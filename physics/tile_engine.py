@@ -0,0 +1,376 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from arcade import Sprite
+
+from physics.base import GROUND_PROBE_DISTANCE, ContactState, PhysicsEngine, SurfaceType
+
+if TYPE_CHECKING:
+    from sprites.rising_tiles import RisingTileSystem
+
+
+class BoxTuple(NamedTuple):
+    """
+    An axis aligned bounding box, and what type of surface it is
+    """
+
+    left: float
+    bottom: float
+    right: float
+    top: float
+    surface: SurfaceType = SurfaceType.WALL
+
+
+class MovementTuple(NamedTuple):
+    """
+    A box before it moved, and how far it moved
+    """
+
+    box: BoxTuple
+    change_x: float
+    change_y: float
+
+
+class SweepHitTuple(NamedTuple):
+    """
+    A box that a moving box hit
+    """
+
+    # The fraction of the movement before the boxes first overlap, from 0 to 1
+    time: float
+    box: BoxTuple
+
+
+def sprite_box(sprite: Sprite, surface: SurfaceType = SurfaceType.WALL) -> BoxTuple:
+    return BoxTuple(sprite.left, sprite.bottom, sprite.right, sprite.top, surface)
+
+
+def overlaps(box: BoxTuple, other: BoxTuple) -> bool:
+    """
+    If two boxes overlap. Boxes that only touch along an edge do not overlap
+
+    Args:
+        box (BoxTuple)
+        other (BoxTuple)
+
+    Returns:
+        bool
+    """
+    return (
+        box.left < other.right
+        and box.right > other.left
+        and box.bottom < other.top
+        and box.top > other.bottom
+    )
+
+
+def swept_box(box: BoxTuple, change_x: float, change_y: float) -> BoxTuple:
+    """
+    The box covering everywhere a box passes through as it moves
+
+    Args:
+        box (BoxTuple)
+        change_x (float)
+        change_y (float)
+
+    Returns:
+        BoxTuple
+    """
+    return box._replace(
+        left=box.left + min(change_x, 0),
+        bottom=box.bottom + min(change_y, 0),
+        right=box.right + max(change_x, 0),
+        top=box.top + max(change_y, 0),
+    )
+
+
+def sweep(
+    box: BoxTuple, change_x: float, change_y: float, other: BoxTuple
+) -> Optional[float]:
+    """
+    Find when a moving box first hits another. A box moving into one it's touching along an edge
+    hits it straight away, but moving along the edge doesn't hit it
+
+    Args:
+        box (BoxTuple): The moving box, before it moves
+        change_x (float): How far it moves horizontally
+        change_y (float): How far it moves vertically
+        other (BoxTuple): The box that isn't moving
+
+    Returns:
+        Optional[float]: The fraction of the movement before they hit, 0 if they already overlap, or None if they don't hit
+    """
+    if overlaps(box, other):
+        return 0
+    entry: float = 0
+    leave: float = 1
+    axes: Tuple[Tuple[float, float, float, float, float], ...] = (
+        (box.left, box.right, other.left, other.right, change_x),
+        (box.bottom, box.top, other.bottom, other.top, change_y),
+    )
+    for low, high, other_low, other_high, change in axes:
+        if change == 0:
+            # Never overlapping on this axis, so they can't hit
+            if high <= other_low or low >= other_high:
+                return None
+            continue
+        if change > 0:
+            near = (other_low - high) / change
+            far = (other_high - low) / change
+        else:
+            near = (other_high - low) / change
+            far = (other_low - high) / change
+        entry = max(entry, near)
+        leave = min(leave, far)
+        if entry >= leave:
+            return None
+    return entry
+
+
+def sweep_boxes(
+    movement: MovementTuple, boxes: Iterable[BoxTuple]
+) -> List[SweepHitTuple]:
+    """
+    Find every box a moving box hits
+
+    Args:
+        movement (MovementTuple): The moving box
+        boxes (Iterable[BoxTuple]): The boxes that aren't moving
+
+    Returns:
+        List[SweepHitTuple]: The hits, first hit first
+    """
+    box, change_x, change_y = movement
+    hits = []
+    for other in boxes:
+        time = sweep(box, change_x, change_y, other)
+        if time is not None:
+            hits.append(SweepHitTuple(time, other))
+    hits.sort(key=lambda hit: hit.time)
+    return hits
+
+
+def sweep_sprites(
+    movement: MovementTuple, sprites: Iterable[Sprite]
+) -> List[Tuple[float, Sprite]]:
+    """
+    Find every sprite a moving box hits, using the bounding box of each sprite's hit box
+
+    Args:
+        movement (MovementTuple): The moving box
+        sprites (Iterable[Sprite]): The sprites, these aren't moving
+
+    Returns:
+        List[Tuple[float, Sprite]]: The time of each hit and the sprite, first hit first
+    """
+    bounds = swept_box(*movement)
+    hits = []
+    for sprite in sprites:
+        other = sprite_box(sprite)
+        if not overlaps(bounds, other):
+            continue
+        time = sweep(movement.box, movement.change_x, movement.change_y, other)
+        if time is not None:
+            hits.append((time, sprite))
+    hits.sort(key=lambda hit: hit[0])
+    return hits
+
+
+class CollisionGrid:
+    """
+    The solid tiles of a level, stored by the cell of the grid they are in.
+    Each cell holds the bounding box of the tile's hit box, so finding what's near a point only
+    needs the few cells around it to be looked at rather than every tile.
+    """
+
+    def __init__(self, tile_size: float) -> None:
+        """
+        Create an empty grid
+
+        Args:
+            tile_size (float): The size of a cell, this should be the size of a tile after scaling
+        """
+        self.tile_size = tile_size
+        self.cells: Dict[int, List[BoxTuple]] = {}
+
+    def cell_key(self, column: int, row: int) -> int:
+        # Columns are less than 2^16 in any realistic map, so they can be packed with the row
+        return (row << 16) + column
+
+    def add(self, box: BoxTuple) -> None:
+        """
+        Add a box to every cell that it covers
+
+        Args:
+            box (BoxTuple)
+        """
+        size = self.tile_size
+        for column in range(int(box.left // size), int(box.right // size) + 1):
+            for row in range(int(box.bottom // size), int(box.top // size) + 1):
+                self.cells.setdefault(self.cell_key(column, row), []).append(box)
+
+    def remove(self, box: BoxTuple) -> None:
+        """
+        Remove a box from every cell that it covers
+
+        Args:
+            box (BoxTuple)
+        """
+        size = self.tile_size
+        for column in range(int(box.left // size), int(box.right // size) + 1):
+            for row in range(int(box.bottom // size), int(box.top // size) + 1):
+                cell = self.cells.get(self.cell_key(column, row))
+                if cell is not None and box in cell:
+                    cell.remove(box)
+
+    def add_sprites(
+        self, sprites: Iterable[Sprite], surface: SurfaceType = SurfaceType.WALL
+    ) -> None:
+        """
+        Add sprites that don't move
+
+        Args:
+            sprites (Iterable[Sprite]): The sprites to add
+            surface (SurfaceType, optional): The type of surface they are. Defaults to SurfaceType.WALL.
+        """
+        for sprite in sprites:
+            self.add(sprite_box(sprite, surface))
+
+    def query(self, box: BoxTuple) -> List[BoxTuple]:
+        """
+        Find every stored box that overlaps with `box`
+
+        Args:
+            box (BoxTuple)
+
+        Returns:
+            List[BoxTuple]
+        """
+        size = self.tile_size
+        found: List[BoxTuple] = []
+        for column in range(int(box.left // size), int(box.right // size) + 1):
+            for row in range(int(box.bottom // size), int(box.top // size) + 1):
+                for other in self.cells.get(self.cell_key(column, row), ()):
+                    if other not in found and overlaps(box, other):
+                        found.append(other)
+        return found
+
+    def sweep(self, movement: MovementTuple) -> List[SweepHitTuple]:
+        """
+        Find every stored box that a moving box hits, however far it moves
+
+        Args:
+            movement (MovementTuple): The moving box
+
+        Returns:
+            List[SweepHitTuple]: The hits, first hit first
+        """
+        return sweep_boxes(movement, self.query(swept_box(*movement)))
+
+
+class TilePhysicsEngine(PhysicsEngine):
+    """
+    Backend that uses the tile grid. Movement is resolved one axis at a time, first vertically and then
+    horizontally, against only the tiles in the cells the player passes through. Each move is swept,
+    so the player stops at the first tile in the way however fast it's moving. The rising tiles
+    move every update, so rather than being in the grid they're found in the rising tile system's arrays.
+    """
+
+    def __init__(
+        self,
+        player: Sprite,
+        walls: CollisionGrid,
+        rising_tiles: "RisingTileSystem",
+        gravity: float,
+    ) -> None:
+        """
+        Create the engine
+
+        Args:
+            player (Sprite): The sprite being moved
+            walls (CollisionGrid): The solid tiles that don't move
+            rising_tiles (RisingTileSystem): The tiles that rise, these are solid too
+            gravity (float): How much the player's change_y is reduced each update
+        """
+        super().__init__(player, gravity)
+        self.walls = walls
+        self.rising_tiles = rising_tiles
+
+    def blocking(self, box: BoxTuple) -> List[BoxTuple]:
+        """
+        Find everything solid overlapping with a box
+
+        Args:
+            box (BoxTuple)
+
+        Returns:
+            List[BoxTuple]
+        """
+        return self.walls.query(box) + self.rising_tiles.overlapping(box)
+
+    def first_hits(self, movement: MovementTuple) -> List[BoxTuple]:
+        """
+        Find the solid boxes a moving box hits first
+
+        Args:
+            movement (MovementTuple)
+
+        Returns:
+            List[BoxTuple]: The boxes hit at the earliest time, or an empty list if nothing is hit
+        """
+        hits = self.walls.sweep(movement)
+        hits.extend(
+            sweep_boxes(movement, self.rising_tiles.overlapping(swept_box(*movement)))
+        )
+        if not hits:
+            return []
+        first_time = min(hit.time for hit in hits)
+        return [hit.box for hit in hits if hit.time == first_time]
+
+    def update(self) -> None:
+        player = self.player
+        player.change_y -= self.gravity
+        ceiling = wall_left = wall_right = False
+
+        # Move vertically, and stop at the first thing in the way
+        hits = self.first_hits(MovementTuple(sprite_box(player), 0, player.change_y))
+        player.center_y += player.change_y
+        if hits:
+            if player.change_y > 0:
+                player.top = min(hit.bottom for hit in hits)
+                ceiling = True
+            else:
+                player.bottom = max(hit.top for hit in hits)
+            player.change_y = 0
+
+        # Then horizontally
+        if player.change_x:
+            hits = self.first_hits(
+                MovementTuple(sprite_box(player), player.change_x, 0)
+            )
+            player.center_x += player.change_x
+            if hits:
+                if player.change_x > 0:
+                    player.right = min(hit.left for hit in hits)
+                    wall_right = True
+                else:
+                    player.left = max(hit.right for hit in hits)
+                    wall_left = True
+
+        # Look for something solid just below the player
+        box = sprite_box(player)
+        below = self.blocking(
+            box._replace(bottom=box.bottom - GROUND_PROBE_DISTANCE, top=box.bottom)
+        )
+        surface = SurfaceType.NONE
+        if below:
+            # Use what's under the middle of the player, if there's nothing there it must be on an edge
+            under = [hit for hit in below if hit.left <= player.center_x <= hit.right]
+            surface = (under or below)[0].surface
+
+        self.contacts = ContactState(
+            grounded=len(below) > 0,
+            surface=surface,
+            ceiling=ceiling,
+            wall_left=wall_left,
+            wall_right=wall_right,
+        )
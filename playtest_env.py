@@ -0,0 +1,511 @@
+import os
+
+from typing import NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from arcade.tilemap import get_tilemap_layer, read_tmx
+
+from errors import IncorrectNumberOfMarkers, UnsupportedLayer
+from physics.base import GROUND_PROBE_DISTANCE
+from static_values import (
+    BATTERY_LAYER_NAME,
+    BOOSTED_PLAYER_JUMP_SPEED,
+    DEATH_LAYER_NAME,
+    GRAVITY,
+    MAPS_DIRECTORY,
+    MOVING_UP_LAYER_NAME,
+    PLAYER_JUMP_SPEED,
+    PLAYER_MOVEMENT_SPEED,
+    SPRING_LAYER_NAME,
+    START_MARKER_LAYER_NAME,
+    TILE_HEIGHT,
+    TILE_WIDTH,
+    WALL_LAYER_NAME,
+    WIN_LAYER_NAME,
+)
+from tile_grid import TileGrid
+
+# The size of the player's textures
+PLAYER_WIDTH = 64
+PLAYER_HEIGHT = 128
+
+# Each step is one update at 60 updates a second
+STEP_TIME = 1 / 60
+
+# Small enough that an edge exactly on a tile boundary is counted as being in the tile before it
+EPSILON = 1e-6
+
+# The code of each type of tile in the observations
+EMPTY = 0
+SOLID = 1
+SPRING = 2
+DEATH = 3
+WIN = 4
+BATTERY = 5
+
+# The horizontal direction and if the player jumps, for each action
+NO_ACTION = 0
+LEFT = 1
+RIGHT = 2
+JUMP = 3
+LEFT_JUMP = 4
+RIGHT_JUMP = 5
+ACTION_DIRECTIONS = np.array([0, -1, 1, 0, -1, 1])
+ACTION_JUMPS = np.array([False, False, False, True, True, True])
+
+# The ranges of the "evened out" random values, from `PowerManager`
+POWER_RANGE = (36, 8)
+DORMANT_RANGE = (40, 15)
+
+
+class ObservationTuple(NamedTuple):
+    # The tiles around each player, row 0 is the bottom row. Shape (envs, size, size)
+    tiles: np.ndarray
+    # Seconds of power left. Shape (envs,)
+    power: np.ndarray
+    # change_x and change_y. Shape (envs, 2)
+    velocity: np.ndarray
+    # If the player is on the ground. Shape (envs,)
+    grounded: np.ndarray
+
+
+class StepTuple(NamedTuple):
+    observation: ObservationTuple
+    reward: np.ndarray
+    # Episodes that ended this step, they have already been reset
+    done: np.ndarray
+    won: np.ndarray
+
+
+def grid_array(grid: TileGrid) -> np.ndarray:
+    """
+    A boolean array of the occupied cells of a grid, indexed by row then column
+
+    Args:
+        grid (TileGrid)
+
+    Returns:
+        np.ndarray
+    """
+    gids = np.frombuffer(grid.gids, dtype=np.uint32)
+    solid: np.ndarray = gids.reshape(grid.rows, grid.columns) != 0
+    return solid
+
+
+class PlaytestEnv:
+    """
+    Runs a batch of independent episodes of a level in lockstep, without any views or sprites.
+    The level's tiles are read into arrays that every episode shares, and the rules of `GameView.on_update`,
+    `PowerManager` and `calculate_jump_speed` are applied to every episode at once with numpy.
+
+    Collisions are against whole tiles, the same as the tile physics engine, so they can be slightly
+    different to the arcade engine's hit boxes. Rising tiles aren't simulated, as they're removed when they
+    leave the viewport, which would need the camera of every episode, so levels with them can't be played.
+    Of the hand made levels, 2 and 3 have rising tiles.
+    """
+
+    def __init__(
+        self,
+        level: int,
+        env_count: int,
+        view_radius: int = 4,
+        max_steps: int = 60 * 60 * 3,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Load the level, and reset every episode
+
+        Args:
+            level (int): The level to play
+            env_count (int): How many episodes to run at once
+            view_radius (int, optional): How many tiles either side of the player are observed. Defaults to 4.
+            max_steps (int, optional): Steps before an episode is ended. Defaults to 3 minutes of steps.
+            seed (Optional[int], optional): Seed for the random power values. Defaults to None.
+
+        Raises:
+            IncorrectNumberOfMarkers: If the level doesn't have exactly one start marker
+            UnsupportedLayer: If the level has rising tiles
+        """
+        self.env_count = env_count
+        self.view_radius = view_radius
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+
+        self.tile_size = TILE_WIDTH * 0.5
+        map_object = read_tmx(os.path.join(MAPS_DIRECTORY, f"level_{level}.tmx"))
+
+        def layer(layer_name: str) -> np.ndarray:
+            return grid_array(TileGrid.from_layer(map_object, layer_name, 0.5))
+
+        # The maps keep the layer even when it's empty, so only a layer with tiles or objects in it is refused
+        rising = get_tilemap_layer(map_object, MOVING_UP_LAYER_NAME)
+        if getattr(rising, "tiled_objects", None) or layer(MOVING_UP_LAYER_NAME).any():
+            raise UnsupportedLayer(
+                f"Level {level} has rising tiles, which can't be simulated"
+            )
+
+        self.spring = layer(SPRING_LAYER_NAME)
+        marker = layer(START_MARKER_LAYER_NAME)
+        self.solid = layer(WALL_LAYER_NAME) | self.spring | marker
+        self.death = layer(DEATH_LAYER_NAME)
+        self.win = layer(WIN_LAYER_NAME)
+        self.rows, self.columns = self.solid.shape
+
+        marker_rows, marker_columns = np.nonzero(marker)
+        if len(marker_rows) != 1:
+            raise IncorrectNumberOfMarkers(
+                "There are too many markers in this level!"
+                f"Expected markers: 1, Markers: {len(marker_rows)}"
+            )
+        # The same position `GameView` starts the player at
+        marker_x = (marker_columns[0] + 0.5) * self.tile_size
+        marker_y = (marker_rows[0] + 0.5) * self.tile_size
+        self.start_x = marker_x + TILE_HEIGHT / 2 + PLAYER_HEIGHT / 2
+        self.start_y = 100 + marker_y - TILE_WIDTH / 2 + PLAYER_WIDTH / 2
+
+        self.battery_rows, self.battery_columns = np.nonzero(layer(BATTERY_LAYER_NAME))
+
+        # The static tiles for the observations, padded so the view never goes outside the array
+        codes = np.zeros(self.solid.shape, dtype=np.int8)
+        codes[self.solid] = SOLID
+        codes[self.spring] = SPRING
+        codes[self.death] = DEATH
+        codes[self.win] = WIN
+        self.codes = np.pad(codes, view_radius)
+        self.view_offsets = np.arange(-view_radius, view_radius + 1)
+
+        shape = (env_count,)
+        battery_shape = (env_count, len(self.battery_rows))
+        self.x = np.zeros(shape)
+        self.y = np.zeros(shape)
+        self.change_x = np.zeros(shape)
+        self.change_y = np.zeros(shape)
+        self.grounded = np.zeros(shape, dtype=bool)
+        self.on_spring = np.zeros(shape, dtype=bool)
+        self.steps = np.zeros(shape, dtype=np.int64)
+        # `PowerManager`
+        self.clock = np.zeros(shape)
+        self.power = np.zeros(shape)
+        self.dormant = np.zeros(battery_shape, dtype=bool)
+        self.live_time = np.zeros(battery_shape)
+        # The sum and count of the previous values of each `RandomManager`
+        self.power_totals = np.zeros(shape)
+        self.power_counts = np.zeros(shape)
+        self.dormant_totals = np.zeros(shape)
+        self.dormant_counts = np.zeros(shape)
+
+        self.reset()
+
+    def reset_envs(self, envs: Union[np.ndarray, slice]) -> None:
+        """
+        Start the given episodes again
+
+        Args:
+            envs (Union[np.ndarray, slice]): A mask or slice of the episodes to reset
+        """
+        self.x[envs] = self.start_x
+        self.y[envs] = self.start_y
+        for array in (
+            self.change_x,
+            self.change_y,
+            self.steps,
+            self.clock,
+            self.power,
+            self.power_totals,
+            self.power_counts,
+            self.dormant_totals,
+            self.dormant_counts,
+            self.live_time,
+        ):
+            array[envs] = 0
+        self.grounded[envs] = False
+        self.on_spring[envs] = False
+        self.dormant[envs] = False
+
+    def reset(self, seed: Optional[int] = None) -> ObservationTuple:
+        """
+        Reset every episode
+
+        Args:
+            seed (Optional[int], optional): A new seed for the random power values. Defaults to None.
+
+        Returns:
+            ObservationTuple
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.reset_envs(slice(None))
+        return self.observe()
+
+    def lookup(
+        self, grid: np.ndarray, rows: np.ndarray, columns: np.ndarray
+    ) -> np.ndarray:
+        """
+        Get the cells of a grid, cells outside of the grid are empty
+
+        Args:
+            grid (np.ndarray): A boolean grid
+            rows (np.ndarray)
+            columns (np.ndarray)
+
+        Returns:
+            np.ndarray
+        """
+        inside = (
+            (rows >= 0) & (rows < self.rows) & (columns >= 0) & (columns < self.columns)
+        )
+        cells: np.ndarray = (
+            grid[np.clip(rows, 0, self.rows - 1), np.clip(columns, 0, self.columns - 1)]
+            & inside
+        )
+        return cells
+
+    def player_cells(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The first and last column and row each player is in
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: The first column, last column, first row and last row
+        """
+        size = self.tile_size
+        left = self.x - PLAYER_WIDTH / 2
+        bottom = self.y - PLAYER_HEIGHT / 2
+        return (
+            np.floor(left / size).astype(np.int64),
+            np.floor((left + PLAYER_WIDTH - EPSILON) / size).astype(np.int64),
+            np.floor(bottom / size).astype(np.int64),
+            np.floor((bottom + PLAYER_HEIGHT - EPSILON) / size).astype(np.int64),
+        )
+
+    def touching(self, grid: np.ndarray) -> np.ndarray:
+        """
+        If each player overlaps an occupied cell of a grid
+
+        Args:
+            grid (np.ndarray): A boolean grid
+
+        Returns:
+            np.ndarray
+        """
+        first_column, last_column, first_row, last_row = self.player_cells()
+        # The player is two tiles tall, so is in at most three rows
+        touching = np.zeros(self.env_count, dtype=bool)
+        for row in (first_row, first_row + 1, last_row):
+            touching |= self.lookup(grid, row, first_column)
+            touching |= self.lookup(grid, row, last_column)
+        return touching
+
+    def random_values(
+        self,
+        envs: np.ndarray,
+        value_range: Tuple[float, float],
+        totals: np.ndarray,
+        counts: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Generate "evened out" values in the same way as `RandomManager.generate_value`, for some of the episodes
+
+        Args:
+            envs (np.ndarray): The indexes of the episodes to generate values for
+            value_range (Tuple[float, float]): The top and bottom of the range
+            totals (np.ndarray): The sum of the previous values of every episode, updated in place
+            counts (np.ndarray): The count of the previous values of every episode, updated in place
+
+        Returns:
+            np.ndarray: A value for each of `envs`
+        """
+        init_top, init_bottom = value_range
+        top = np.full(len(envs), float(init_top))
+        bottom = np.full(len(envs), float(init_bottom))
+
+        has_previous = counts[envs] > 0
+        average = totals[envs] / np.maximum(counts[envs], 1)
+        difference = (average - init_bottom) - (init_top - init_bottom) / 2
+        top -= np.where(has_previous & (difference > 0), difference, 0)
+        bottom -= np.where(has_previous & (difference <= 0), difference, 0)
+
+        low = (bottom * 100).astype(np.int64)
+        high = np.maximum((top * 100).astype(np.int64), low + 1)
+        values = self.rng.integers(low, high) / 100
+        totals[envs] += values
+        counts[envs] += 1
+        return values
+
+    def update_power(self) -> None:
+        """
+        `PowerManager.update`, revive the batteries that are ready and use up power
+        """
+        delta_time = STEP_TIME / 2
+        self.clock += delta_time
+        if self.dormant.any():
+            ready = self.dormant & (self.live_time <= self.clock[:, None])
+            self.dormant &= ~(ready & ~self.battery_overlaps())
+        self.power = np.where(self.power > 0, self.power - delta_time, self.power)
+
+    def battery_overlaps(self) -> np.ndarray:
+        """
+        If each player overlaps each battery
+
+        Returns:
+            np.ndarray: Shape (envs, batteries)
+        """
+        size = self.tile_size
+        left = (self.x - PLAYER_WIDTH / 2)[:, None]
+        bottom = (self.y - PLAYER_HEIGHT / 2)[:, None]
+        battery_left = self.battery_columns[None, :] * size
+        battery_bottom = self.battery_rows[None, :] * size
+        return (
+            (left < battery_left + size)
+            & (left + PLAYER_WIDTH > battery_left)
+            & (bottom < battery_bottom + size)
+            & (bottom + PLAYER_HEIGHT > battery_bottom)
+        )
+
+    def collect_batteries(self) -> None:
+        """
+        `PowerManager.check_collision`, collect the batteries the players are touching
+        """
+        if len(self.battery_rows) == 0:
+            return
+        hits = self.battery_overlaps() & ~self.dormant
+        if not hits.any():
+            return
+        # Each battery is handled in turn, as a player could touch more than one at once
+        for battery in np.flatnonzero(hits.any(axis=0)):
+            envs = np.flatnonzero(hits[:, battery])
+            self.dormant[envs, battery] = True
+            self.live_time[envs, battery] = self.clock[envs] + self.random_values(
+                envs, DORMANT_RANGE, self.dormant_totals, self.dormant_counts
+            )
+            self.power[envs] += self.random_values(
+                envs, POWER_RANGE, self.power_totals, self.power_counts
+            )
+
+    def update_physics(self) -> None:
+        """
+        The tile physics engine's update, moving vertically then horizontally against the solid tiles
+        """
+        size = self.tile_size
+        # Falling more than a tile in a step could pass through a tile
+        self.change_y = np.maximum(self.change_y - GRAVITY, EPSILON - size)
+
+        self.y += self.change_y
+        first_column, last_column, first_row, last_row = self.player_cells()
+        falling = self.change_y <= 0
+        below = self.lookup(self.solid, first_row, first_column) | self.lookup(
+            self.solid, first_row, last_column
+        )
+        above = self.lookup(self.solid, last_row, first_column) | self.lookup(
+            self.solid, last_row, last_column
+        )
+        landed = falling & below
+        hit_ceiling = ~falling & above
+        self.y = np.where(landed, (first_row + 1) * size + PLAYER_HEIGHT / 2, self.y)
+        self.y = np.where(hit_ceiling, last_row * size - PLAYER_HEIGHT / 2, self.y)
+        self.change_y = np.where(landed | hit_ceiling, 0, self.change_y)
+
+        self.x += self.change_x
+        first_column, last_column, first_row, last_row = self.player_cells()
+        moving_right = self.change_x > 0
+        moving_left = self.change_x < 0
+        edge_column = np.where(moving_right, last_column, first_column)
+        blocked = np.zeros(self.env_count, dtype=bool)
+        for row in (first_row, first_row + 1, last_row):
+            blocked |= self.lookup(self.solid, row, edge_column)
+        self.x = np.where(
+            moving_right & blocked, edge_column * size - PLAYER_WIDTH / 2, self.x
+        )
+        self.x = np.where(
+            moving_left & blocked, (edge_column + 1) * size + PLAYER_WIDTH / 2, self.x
+        )
+
+        # Look for something solid just below the player
+        first_column, last_column, _, _ = self.player_cells()
+        probe_row = np.floor(
+            (self.y - PLAYER_HEIGHT / 2 - GROUND_PROBE_DISTANCE) / size
+        ).astype(np.int64)
+        self.grounded = self.lookup(self.solid, probe_row, first_column) | self.lookup(
+            self.solid, probe_row, last_column
+        )
+        center_column = np.floor(self.x / size).astype(np.int64)
+        self.on_spring = self.lookup(self.spring, probe_row, center_column)
+
+    def observe(self) -> ObservationTuple:
+        """
+        The tiles around each player, with the batteries that haven't been collected, and the power left
+
+        Returns:
+            ObservationTuple
+        """
+        radius = self.view_radius
+        center_column = np.floor(self.x / self.tile_size).astype(np.int64)
+        center_row = np.floor(self.y / self.tile_size).astype(np.int64)
+        padded_rows, padded_columns = self.codes.shape
+        rows = np.clip(
+            center_row[:, None] + self.view_offsets + radius, 0, padded_rows - 1
+        )
+        columns = np.clip(
+            center_column[:, None] + self.view_offsets + radius, 0, padded_columns - 1
+        )
+        tiles = self.codes[rows[:, :, None], columns[:, None, :]]
+
+        if len(self.battery_rows):
+            relative_rows = self.battery_rows[None, :] - center_row[:, None]
+            relative_columns = self.battery_columns[None, :] - center_column[:, None]
+            visible = (
+                ~self.dormant
+                & (np.abs(relative_rows) <= radius)
+                & (np.abs(relative_columns) <= radius)
+            )
+            envs, batteries = np.nonzero(visible)
+            tiles[
+                envs,
+                relative_rows[envs, batteries] + radius,
+                relative_columns[envs, batteries] + radius,
+            ] = BATTERY
+
+        return ObservationTuple(
+            tiles=tiles,
+            power=np.maximum(self.power, 0),
+            velocity=np.stack((self.change_x, self.change_y), axis=1),
+            grounded=self.grounded.copy(),
+        )
+
+    def step(self, actions: Union[Sequence[int], np.ndarray]) -> StepTuple:
+        """
+        Update every episode by one step. Episodes that end are reset straight away
+
+        Args:
+            actions (Union[Sequence[int], np.ndarray]): An action for each episode
+
+        Returns:
+            StepTuple: The observations, a reward of 1 for winning and -1 for dying, and which episodes ended
+        """
+        actions = np.asarray(actions)
+        self.steps += 1
+
+        # `InputState.tick`, the direction is held for the step and jumping needs the ground
+        self.change_x = ACTION_DIRECTIONS[actions] * PLAYER_MOVEMENT_SPEED
+        jumping = ACTION_JUMPS[actions] & self.grounded
+        jump_speed = np.where(
+            self.on_spring, BOOSTED_PLAYER_JUMP_SPEED, PLAYER_JUMP_SPEED
+        )
+        self.change_y = np.where(jumping, jump_speed, self.change_y)
+
+        # `GameView.on_update`
+        self.update_power()
+        died = (
+            self.touching(self.death)
+            | (self.y < PLAYER_HEIGHT - 300)
+            | (self.x <= PLAYER_WIDTH / 2)
+        )
+        self.update_physics()
+        self.collect_batteries()
+        won = ~died & self.touching(self.win) & (self.power > 0)
+
+        reward = won.astype(np.float64) - died
+        done = died | won | (self.steps >= self.max_steps)
+        if done.any():
+            self.reset_envs(done)
+        return StepTuple(self.observe(), reward, done, won)
@@ -1,5 +1,5 @@
 from random import randrange
-from typing import List
+from typing import Tuple
 
 
 def get_random(start: float, stop: float) -> float:
@@ -31,22 +31,19 @@ class RandomManager:
         """
         self.init_top_range = top_range
         self.init_bottom_range = bottom_range
-        self.previous_values: List[float] = []
+        # Only the total and count of the previous values are needed for their average,
+        # so they are kept rather than every value, which would grow for as long as the game is played
+        self.previous_total: float = 0
+        self.previous_count = 0
 
     def get_average(self) -> float:
         """
-        Gets the averate of the values in `self.previous_values`
+        Gets the average of the previous values
 
         Returns:
-            float: [description]
+            float: The average
         """
-        total: float = 0
-        count = 0
-        for value in self.previous_values:
-            total += value
-            count += 1
-
-        return total / count
+        return self.previous_total / self.previous_count
 
     def generate_value(self) -> float:
         """
@@ -58,7 +55,7 @@ class RandomManager:
         top_range = self.init_top_range
         bottom_range = self.init_bottom_range
 
-        if len(self.previous_values) > 0:
+        if self.previous_count > 0:
             average = self.get_average()
             mid_point = (self.init_top_range - self.init_bottom_range) / 2
             difference = (average - self.init_bottom_range) - mid_point
@@ -68,5 +65,18 @@ class RandomManager:
                 bottom_range -= difference
 
         value = get_random(bottom_range, top_range)
-        self.previous_values.append(value)
+        self.previous_total += value
+        self.previous_count += 1
         return value
+
+    def snapshot(self) -> Tuple[float, int]:
+        """
+        The state of the generator, that can be given to `restore`
+
+        Returns:
+            Tuple[float, int]: The total and count of the previous values
+        """
+        return self.previous_total, self.previous_count
+
+    def restore(self, state: Tuple[float, int]) -> None:
+        self.previous_total, self.previous_count = state
@@ -1,22 +1,59 @@
 from math import floor
-from typing import List, NamedTuple
+from typing import Callable, List, NamedTuple, Tuple
 
 from arcade import Sprite, SpriteList
-from arcade.sprite_list import check_for_collision, check_for_collision_with_list
+from arcade.sprite_list import check_for_collision
 
+from collision_events import CollisionEvents, TriggerKind
 from label import Label
+from metrics import registry
+from particles import BATTERY_BURST, ParticleSystem
 from power.custom_random import RandomManager
+from render_queue import RenderLayer, RenderQueue
 from static_values import HEIGHT, WIDTH
 
+battery_pickups = registry.counter(
+    "game_battery_pickups_total", "Batteries collected by the player"
+)
+power_outs = registry.counter(
+    "game_power_outs_total", "Times the player's power ran out"
+)
+
 
 class DormantTuple(NamedTuple):
     live_time: float
     sprite: Sprite
 
 
+class PowerStateTuple(NamedTuple):
+    """
+    The state of the power manager. Batteries are stored by their position, so the state
+    doesn't hold on to any sprites
+    """
+
+    clock: float
+    power_time_remaining: float
+    # The live time, x and y of each dormant battery
+    dormant: Tuple[Tuple[float, float, float], ...]
+    batteries_collected: int
+    # The total and count of each generator's previous values
+    power_generator: Tuple[float, int]
+    dormant_generator: Tuple[float, int]
+
+
 class PowerManager:
-    def __init__(self, sprite_list: SpriteList, player: Sprite) -> None:
+    def __init__(
+        self,
+        sprite_list: SpriteList,
+        player: Sprite,
+        events: CollisionEvents,
+        particles: ParticleSystem,
+    ) -> None:
         self.player = player
+        # Bursts when a battery is collected
+        self.particles = particles
+        # The batteries that can be collected are kept as triggers, the game view collects them
+        self.events = events
         # Time passed
         self.clock: float = 0
 
@@ -29,6 +66,12 @@ class PowerManager:
         # How much time is left until the player has no power
         self.power_time_remaining: float = 0
 
+        # How many batteries have been collected, for the run history
+        self.batteries_collected = 0
+
+        # Called with each battery, and if it can be collected, whenever one is collected or revived
+        self.listeners: List[Callable[[Sprite, bool], None]] = []
+
         # "evened out" random generators
         self.random_power_generator = RandomManager(36, 8)
         self.random_dormant_generator = RandomManager(40, 15)
@@ -40,6 +83,7 @@ class PowerManager:
             x_offset=WIDTH - 50,
             y_offset=HEIGHT - 35,
         )
+        self.register_batteries()
 
     @property
     def has_power(self) -> bool:
@@ -70,6 +114,33 @@ class PowerManager:
                 return "No Power"
             return f"{whole}.0"
 
+    def subscribe(self, listener: Callable[[Sprite, bool], None]) -> None:
+        """
+        Call `listener` with each battery that is collected or revived, and if it can now be collected
+
+        Args:
+            listener (Callable[[Sprite, bool], None])
+        """
+        self.listeners.append(listener)
+
+    def announce_batteries(self) -> None:
+        """
+        Tell the listeners about every battery, for when many may have changed at once
+        """
+        for listener in self.listeners:
+            for dormant in self.dormant_sprites:
+                listener(dormant.sprite, False)
+            for sprite in self.sprite_list:
+                listener(sprite, True)
+
+    def register_batteries(self) -> None:
+        """
+        Make the batteries that can be collected the battery triggers, for when the list has changed
+        """
+        self.events.clear(TriggerKind.BATTERY)
+        for sprite in self.sprite_list:
+            self.events.add(TriggerKind.BATTERY, sprite)
+
     def hit(self, sprite: Sprite) -> None:
         """
         Process a 'hit', this is when the player comes into contact with a power sprite
@@ -79,34 +150,108 @@ class PowerManager:
             sprite (Sprite): [description]
         """
         self.sprite_list.remove(sprite)
+        self.events.remove(sprite)
         self.dormant_sprites.append(
             DormantTuple(
                 self.clock + self.random_dormant_generator.generate_value(), sprite
             )
         )
         self.power_time_remaining += self.random_power_generator.generate_value()
+        self.batteries_collected += 1
+        battery_pickups.inc()
+        self.particles.emit(BATTERY_BURST, sprite.center_x, sprite.center_y)
+        for listener in self.listeners:
+            listener(sprite, False)
 
     def revive(self, sprite: Sprite) -> None:
         self.sprite_list.append(sprite)
+        self.events.add(TriggerKind.BATTERY, sprite)
+        for listener in self.listeners:
+            listener(sprite, True)
 
-    def draw(self, x: int, y: int) -> None:
+    def replace_sprites(self, sprite_list: SpriteList) -> None:
         """
-        Draw related sprites
+        Use a new list of sprites, for when the map has been reloaded. Batteries that are dormant
+        stay dormant if there is still a battery in the same place.
 
         Args:
-            x (int): X offset (screen offset)
-            y (int): Y offset (screen offset)
+            sprite_list (SpriteList): The new sprites
         """
-        self.sprite_list.draw()
-        self.power_label.draw(x, y)
+        positions = {
+            (sprite.center_x, sprite.center_y): sprite for sprite in sprite_list
+        }
+        dormant_sprites = []
+        for dormant in self.dormant_sprites:
+            sprite = positions.get((dormant.sprite.center_x, dormant.sprite.center_y))
+            if sprite is not None:
+                sprite_list.remove(sprite)
+                dormant_sprites.append(DormantTuple(dormant.live_time, sprite))
+        self.dormant_sprites = dormant_sprites
+        self.sprite_list = sprite_list
+        self.register_batteries()
+
+    def snapshot(self) -> PowerStateTuple:
+        return PowerStateTuple(
+            self.clock,
+            self.power_time_remaining,
+            tuple(
+                (dormant.live_time, dormant.sprite.center_x, dormant.sprite.center_y)
+                for dormant in self.dormant_sprites
+            ),
+            self.batteries_collected,
+            self.random_power_generator.snapshot(),
+            self.random_dormant_generator.snapshot(),
+        )
 
-    def check_collision(self) -> None:
+    def restore(self, state: PowerStateTuple) -> None:
         """
-        Check for collisions with the player and the too draw list
+        Go back to a state from `snapshot`. Batteries that were collected since are put back,
+        and batteries that were dormant are made dormant again
+
+        Args:
+            state (PowerStateTuple)
+        """
+        batteries = {
+            (sprite.center_x, sprite.center_y): sprite for sprite in self.sprite_list
+        }
+        for dormant in self.dormant_sprites:
+            batteries[
+                (dormant.sprite.center_x, dormant.sprite.center_y)
+            ] = dormant.sprite
+
+        self.dormant_sprites = []
+        for live_time, x, y in state.dormant:
+            sprite = batteries.pop((x, y), None)
+            if sprite is None:
+                # The battery isn't loaded, or has been removed from the map
+                continue
+            if self.sprite_list in sprite.sprite_lists:
+                self.sprite_list.remove(sprite)
+            self.dormant_sprites.append(DormantTuple(live_time, sprite))
+        for sprite in batteries.values():
+            if self.sprite_list not in sprite.sprite_lists:
+                self.sprite_list.append(sprite)
+        self.register_batteries()
+        self.announce_batteries()
+
+        self.clock = state.clock
+        self.power_time_remaining = state.power_time_remaining
+        self.batteries_collected = state.batteries_collected
+        self.random_power_generator.restore(state.power_generator)
+        self.random_dormant_generator.restore(state.dormant_generator)
+        self.power_label.set_value(self.power_left)
+
+    def queue_draw(self, queue: RenderQueue, x: int, y: int) -> None:
+        """
+        Queue the related sprites to be drawn
+
+        Args:
+            queue (RenderQueue): The queue for the frame
+            x (int): X offset (screen offset)
+            y (int): Y offset (screen offset)
         """
-        collisions = check_for_collision_with_list(self.player, self.sprite_list)
-        for power in collisions:
-            self.hit(power)
+        queue.add(self.sprite_list, RenderLayer.ITEMS)
+        queue.add(lambda: self.power_label.draw(x, y), RenderLayer.HUD)
 
     def update(self, delta_time: float) -> None:
         self.power_label.update(
@@ -128,6 +273,8 @@ class PowerManager:
         # If there is power decrease it by the time
         if self.has_power:
             self.power_time_remaining -= delta_time
+            if not self.has_power:
+                power_outs.inc()
 
         # Update the label's value
         self.power_label.set_value(self.power_left)
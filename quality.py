@@ -0,0 +1,112 @@
+import logging
+
+from enum import IntEnum
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class QualityLevel(IntEnum):
+    """
+    Each level turns off everything the levels before it do, as well as its own feature
+    """
+
+    FULL = 0
+    # The HUD labels only change a few times a second
+    CACHED_HUD = 1
+    # The rising tiles are created less often
+    FEWER_RISING_TILES = 2
+    # The player uses a rectangle for its hit box
+    SIMPLE_HIT_BOXES = 3
+
+
+QualityListener = Callable[[QualityLevel], None]
+
+
+class QualityController:
+    """
+    Watches how long each frame takes to update and draw, and lowers the quality when the frames are
+    taking longer than the budget. The quality is raised again, one level at a time, once the frames
+    have been well within the budget for a while. Lowering is quick and raising is slow, so the
+    quality doesn't flip back and forth on a machine that's close to the budget.
+    """
+
+    def __init__(
+        self,
+        frame_budget: float,
+        headroom: float = 0.6,
+        smoothing: float = 0.1,
+        step_down_frames: int = 30,
+        step_up_frames: int = 180,
+    ) -> None:
+        """
+        Create the controller, at full quality
+
+        Args:
+            frame_budget (float): Seconds that updating and drawing a frame should take at most
+            headroom (float, optional): The fraction of the budget the frames must be under before the quality is raised. Defaults to 0.6.
+            smoothing (float, optional): How much each frame moves the average frame time. Defaults to 0.1.
+            step_down_frames (int, optional): Frames over the budget before the quality is lowered. Defaults to 30.
+            step_up_frames (int, optional): Frames within the headroom before the quality is raised. Defaults to 180.
+        """
+        self.frame_budget = frame_budget
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.step_down_frames = step_down_frames
+        self.step_up_frames = step_up_frames
+
+        self.level = QualityLevel.FULL
+        self.average_frame_time = 0.0
+        # Frames in a row that have been over the budget, or under the headroom
+        self.frames_over = 0
+        self.frames_under = 0
+        self.listeners: List[QualityListener] = []
+
+    def subscribe(self, listener: QualityListener) -> None:
+        """
+        Be told when the quality changes
+
+        Args:
+            listener (QualityListener): Called with the new level
+        """
+        self.listeners.append(listener)
+
+    def set_level(self, level: QualityLevel) -> None:
+        logger.info(
+            "Quality changed from %s to %s, average frame time %.1fms",
+            self.level.name,
+            level.name,
+            self.average_frame_time * 1000,
+        )
+        self.level = level
+        self.frames_over = 0
+        self.frames_under = 0
+        for listener in self.listeners:
+            listener(level)
+
+    def observe(self, frame_time: float) -> None:
+        """
+        Add the time a frame took, and change the quality if needed
+
+        Args:
+            frame_time (float): Seconds spent updating and drawing the frame
+        """
+        self.average_frame_time += (
+            frame_time - self.average_frame_time
+        ) * self.smoothing
+
+        if self.average_frame_time > self.frame_budget:
+            self.frames_over += 1
+            self.frames_under = 0
+        elif self.average_frame_time < self.frame_budget * self.headroom:
+            self.frames_under += 1
+            self.frames_over = 0
+        else:
+            self.frames_over = 0
+            self.frames_under = 0
+
+        lowest = max(QualityLevel)
+        if self.frames_over >= self.step_down_frames and self.level < lowest:
+            self.set_level(QualityLevel(self.level + 1))
+        elif self.frames_under >= self.step_up_frames and self.level > 0:
+            self.set_level(QualityLevel(self.level - 1))
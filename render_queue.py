@@ -0,0 +1,114 @@
+from enum import IntEnum
+from typing import Callable, List, NamedTuple, Union
+
+from arcade import Sprite, SpriteList
+
+
+class RenderLayer(IntEnum):
+    """
+    The layers are drawn from lowest to highest
+    """
+
+    RISING = 0
+    TILES = 1
+    ITEMS = 2
+    CHARACTERS = 3
+    HUD = 4
+
+
+class DrawRequestTuple(NamedTuple):
+    layer: RenderLayer
+    z: int
+    # The order the request was made in, so requests with the same layer and z are drawn in that order
+    order: int
+    item: Union[SpriteList, Sprite, Callable[[], None]]
+
+
+class DrawStatsTuple(NamedTuple):
+    draw_calls: int
+    texture_binds: int
+
+
+class RenderQueue:
+    """
+    Collects what should be drawn over a frame, then draws it all at once, sorted by layer and z.
+    Sprite lists are drawn as one batch each. Single sprites next to each other in the order are
+    collected into a shared list, so they are drawn as one batch instead of one by one.
+    Sprite lists are not merged with each other, even when they share a texture and blend state, as each
+    one keeps its own buffers and texture atlas and combining them would mean copying their sprites every frame.
+    """
+
+    def __init__(self) -> None:
+        self.requests: List[DrawRequestTuple] = []
+        # Reused for the single sprites, it's only changed when the sprites in it change
+        self.sprite_batch = SpriteList()
+        self.last_stats = DrawStatsTuple(0, 0)
+
+    def add(
+        self,
+        item: Union[SpriteList, Sprite, Callable[[], None]],
+        layer: RenderLayer,
+        z: int = 0,
+    ) -> None:
+        """
+        Queue something to be drawn
+
+        Args:
+            item (Union[SpriteList, Sprite, Callable[[], None]]): A sprite list, a sprite, or a function that draws something such as text
+            layer (RenderLayer): The layer to draw it in
+            z (int, optional): The order within the layer. Defaults to 0.
+        """
+        self.requests.append(DrawRequestTuple(layer, z, len(self.requests), item))
+
+    def draw_sprites(self, sprites: List[Sprite]) -> None:
+        if list(self.sprite_batch) != sprites:
+            for sprite in list(self.sprite_batch):
+                self.sprite_batch.remove(sprite)
+            for sprite in sprites:
+                self.sprite_batch.append(sprite)
+        self.sprite_batch.draw()
+
+    def flush(self) -> DrawStatsTuple:
+        """
+        Draw everything that was queued, and clear the queue
+
+        Returns:
+            DrawStatsTuple: How many draw calls and texture binds the frame took
+        """
+        draw_calls = 0
+        texture_binds = 0
+        pending_sprites: List[Sprite] = []
+
+        for request in sorted(self.requests):
+            item = request.item
+            if isinstance(item, Sprite):
+                pending_sprites.append(item)
+                continue
+            if pending_sprites:
+                self.draw_sprites(pending_sprites)
+                # The batch is a sprite list too, so it's bound once like the others
+                draw_calls += 1
+                texture_binds += 1
+                pending_sprites = []
+
+            if isinstance(item, SpriteList):
+                if len(item) == 0:
+                    continue
+                item.draw()
+                # A sprite list packs its textures together, so it's bound once
+                draw_calls += 1
+                texture_binds += 1
+            else:
+                # Text is drawn from its own texture
+                item()
+                draw_calls += 1
+                texture_binds += 1
+
+        if pending_sprites:
+            self.draw_sprites(pending_sprites)
+            draw_calls += 1
+            texture_binds += 1
+
+        self.requests = []
+        self.last_stats = DrawStatsTuple(draw_calls, texture_binds)
+        return self.last_stats
@@ -0,0 +1,61 @@
+import argparse
+import statistics
+import sys
+import time
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Time moving the rising tiles, and finding the ones near the player"
+    )
+    parser.add_argument("--tiles", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=600)
+    args = parser.parse_args()
+
+    from arcade import Sprite, SpriteSolidColor
+
+    from physics import sprite_box
+    from sprites.rising_tiles import RisingTileSystem
+    from static_values import HEIGHT, TILE_WIDTH, WIDTH
+
+    columns = WIDTH // TILE_WIDTH
+    rising_tiles = RisingTileSystem()
+    # Standing in the middle of the view, so some of the tiles are near it
+    player = SpriteSolidColor(TILE_WIDTH // 2, TILE_WIDTH, (0, 255, 0))
+    player.center_x = WIDTH / 2
+    player.center_y = HEIGHT / 2
+    texture = SpriteSolidColor(TILE_WIDTH, TILE_WIDTH, (0, 0, 255)).texture
+
+    def add_tile(index: int) -> None:
+        # Spread out over the view, and starting at different heights so they don't all leave at once
+        sprite = Sprite()
+        sprite.texture = texture
+        sprite.left = (index % (columns - 1)) * TILE_WIDTH
+        sprite.top = (index * 7) % HEIGHT
+        sprite.boundary_top = None
+        rising_tiles.add(sprite, change_y=3)
+
+    timings = []
+    added = 0
+    for _ in range(args.frames):
+        while rising_tiles.count < args.tiles:
+            add_tile(added)
+            added += 1
+        start = time.perf_counter()
+        rising_tiles.update(0, 0)
+        # What the physics engines ask for each update
+        rising_tiles.overlapping(sprite_box(player))
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    print(
+        f"{args.tiles} rising tiles: "
+        f"median {statistics.median(timings) * 1000:.2f} ms, "
+        f"p95 {timings[int(len(timings) * 0.95)] * 1000:.2f} ms per update, "
+        f"{added - rising_tiles.count} tiles removed"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
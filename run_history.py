@@ -0,0 +1,199 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from typing import List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    level INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    deaths INTEGER NOT NULL,
+    batteries INTEGER NOT NULL,
+    power_remaining REAL NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_level_seconds ON runs (level, seconds);
+"""
+
+
+class RunTuple(NamedTuple):
+    """
+    A level that was finished
+    """
+
+    level: int
+    # Time taken on the attempt that finished the level
+    seconds: float
+    # Deaths on the level before it was finished
+    deaths: int
+    batteries: int
+    power_remaining: float
+    finished_at: float
+
+
+class RunWriter(threading.Thread):
+    """
+    Background thread that writes the recorded runs to the database in batches,
+    so the game loop never waits on the disk
+    """
+
+    def __init__(self, path: str, interval: float) -> None:
+        """
+        Create the writer, `start()` must be called for it to run
+
+        Args:
+            path (str): The database file
+            interval (float): The longest time, in seconds, a run waits before it's written
+        """
+        super().__init__(name="run-history-writer", daemon=True)
+        self.path = path
+        self.interval = interval
+        self.runs: "queue.Queue[Optional[RunTuple]]" = queue.Queue()
+
+    def write(self, connection: sqlite3.Connection, runs: List[RunTuple]) -> None:
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO runs"
+                    " (level, seconds, deaths, batteries, power_remaining, finished_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    runs,
+                )
+        except sqlite3.Error as error:
+            logger.warning("Could not save %d runs: %s", len(runs), error)
+
+    def run(self) -> None:
+        connection = sqlite3.connect(self.path)
+        stopped = False
+        while not stopped:
+            batch: List[RunTuple] = []
+            try:
+                run = self.runs.get(timeout=self.interval)
+                # Collect everything else that's waiting, so it's written in one transaction
+                while True:
+                    if run is None:
+                        stopped = True
+                        break
+                    batch.append(run)
+                    run = self.runs.get_nowait()
+            except queue.Empty:
+                pass
+            if batch:
+                self.write(connection, batch)
+        connection.close()
+
+    def stop(self) -> None:
+        self.runs.put(None)
+
+
+class RunHistory:
+    """
+    Every finished level, stored in a local SQLite database. Runs are indexed by level and time,
+    so the fastest runs and percentiles of a level can be found without reading every run.
+    """
+
+    def __init__(self, path: str, interval: float = 1) -> None:
+        """
+        Open the database, creating it if needed, and start the writer
+
+        Args:
+            path (str): The database file
+            interval (float, optional): The longest time, in seconds, a run waits before it's written. Defaults to 1.
+        """
+        # Queries are made on this connection, from the main thread
+        self.connection = sqlite3.connect(path)
+        # Lets the writer write while the leaderboard is being read
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.writer = RunWriter(path, interval)
+        self.writer.start()
+
+    def record(
+        self,
+        level: int,
+        seconds: float,
+        deaths: int,
+        batteries: int,
+        power_remaining: float,
+    ) -> None:
+        """
+        Queue a finished level to be saved, this doesn't wait for the disk
+
+        Args:
+            level (int): The level that was finished
+            seconds (float): Time taken on the attempt that finished it
+            deaths (int): Deaths on the level before it was finished
+            batteries (int): Batteries collected
+            power_remaining (float): Power left when the level was finished
+        """
+        self.writer.runs.put(
+            RunTuple(level, seconds, deaths, batteries, power_remaining, time.time())
+        )
+
+    def top(self, level: int, count: int) -> List[RunTuple]:
+        """
+        The fastest runs of a level
+
+        Args:
+            level (int)
+            count (int): How many runs to return
+
+        Returns:
+            List[RunTuple]: The runs, fastest first
+        """
+        rows = self.connection.execute(
+            "SELECT level, seconds, deaths, batteries, power_remaining, finished_at"
+            " FROM runs WHERE level = ? ORDER BY seconds LIMIT ?",
+            (level, count),
+        ).fetchall()
+        return [RunTuple(*row) for row in rows]
+
+    def levels(self) -> List[int]:
+        """
+        The levels that have been finished at least once
+
+        Returns:
+            List[int]: The levels, in order
+        """
+        rows = self.connection.execute(
+            "SELECT DISTINCT level FROM runs ORDER BY level"
+        ).fetchall()
+        return [level for (level,) in rows]
+
+    def percentile(self, level: int, percent: float) -> Optional[float]:
+        """
+        The time a percentage of runs of a level were faster than
+
+        Args:
+            level (int)
+            percent (float): The percentile, from 0 to 100
+
+        Returns:
+            Optional[float]: The time, or None if the level hasn't been finished
+        """
+        (count,) = self.connection.execute(
+            "SELECT COUNT(*) FROM runs WHERE level = ?", (level,)
+        ).fetchone()
+        if count == 0:
+            return None
+        offset = min(int(count * percent / 100), count - 1)
+        (seconds,) = self.connection.execute(
+            "SELECT seconds FROM runs"
+            " WHERE level = ? ORDER BY seconds LIMIT 1 OFFSET ?",
+            (level, offset),
+        ).fetchone()
+        return float(seconds)
+
+    def close(self) -> None:
+        """
+        Write the runs that are waiting, and close the database
+        """
+        self.writer.stop()
+        self.writer.join()
+        self.connection.close()
@@ -1,9 +1,11 @@
 from enum import IntEnum
-from typing import List, NamedTuple
+from typing import List, NamedTuple, Optional
 
-import arcade
+from arcade import Sprite, Texture
 
-from arcade import PhysicsEnginePlatformer, Sprite, Texture
+from assets import assets
+from hit_boxes import PointList
+from physics import PhysicsEngine
 
 
 class FacingDirection(IntEnum):
@@ -17,12 +19,26 @@ class TexturePair(NamedTuple):
 
 
 def load_texture_pair(image_path: str) -> TexturePair:
-    """Returns an instance of TexturePair with the textures set"""
-    right_facing = arcade.load_texture(image_path)
-    left_facing = arcade.load_texture(image_path, flipped_horizontally=True)
+    """Returns an instance of TexturePair with the textures set, the path is relative to the assets directory"""
+    right_facing = assets.load_texture(image_path)
+    left_facing = assets.load_texture(image_path, flipped_horizontally=True)
     return TexturePair(right=right_facing, left=left_facing)
 
 
+class PlayerStateTuple(NamedTuple):
+    """
+    Everything needed to put the player back where it was
+    """
+
+    center_x: float
+    center_y: float
+    change_x: float
+    change_y: float
+    facing: FacingDirection
+    current_texture: int
+    last_x_position: float
+
+
 class Player(Sprite):
     """
     Class for managing the player's animations
@@ -38,9 +54,10 @@ class Player(Sprite):
         frames: int,
         image_path: str,
         distance_before_change_texture: int,
+        hit_box: Optional[PointList] = None,
     ) -> None:
-        """Setup the player"""
-        super().__init__(hit_box_algorithm="Detailed")
+        """Setup the player, `hit_box` is the precomputed hit box of the idle image"""
+        super().__init__()
 
         # Set passed through vars
         self.frames = frames
@@ -70,6 +87,66 @@ class Player(Sprite):
 
         self.texture = self.idle_texture_pair.right
 
+        # Without a precomputed hit box, the texture's is traced when it's first needed
+        self.precomputed_hit_box = hit_box
+        if hit_box is not None:
+            self.set_hit_box(hit_box)
+
+        # If the hit box is a rectangle, this is used on slow machines
+        self.simple_hit_box = False
+
+    def snapshot(self) -> PlayerStateTuple:
+        return PlayerStateTuple(
+            self.center_x,
+            self.center_y,
+            self.change_x,
+            self.change_y,
+            self.facing,
+            self.current_texture,
+            self.last_x_position,
+        )
+
+    def restore(self, state: PlayerStateTuple) -> None:
+        """
+        Put the player back into a state from `snapshot`
+
+        Args:
+            state (PlayerStateTuple)
+        """
+        self.center_x = state.center_x
+        self.center_y = state.center_y
+        self.change_x = state.change_x
+        self.change_y = state.change_y
+        self.facing = state.facing
+        self.current_texture = state.current_texture
+        self.last_x_position = state.last_x_position
+        # The animation will pick the right texture on the next update
+        self.texture = self.get_texture_from_pair(self.idle_texture_pair)
+
+    def use_simple_hit_box(self, simple: bool) -> None:
+        """
+        Use a rectangle the size of the player for the hit box, rather than the outline of the texture
+
+        Args:
+            simple (bool): If the rectangle should be used
+        """
+        self.simple_hit_box = simple
+        if simple:
+            half_width = self.texture.width / 2
+            half_height = self.texture.height / 2
+            self.set_hit_box(
+                [
+                    [-half_width, -half_height],
+                    [half_width, -half_height],
+                    [half_width, half_height],
+                    [-half_width, half_height],
+                ]
+            )
+        elif self.precomputed_hit_box is not None:
+            self.set_hit_box(self.precomputed_hit_box)
+        else:
+            self.set_hit_box(self.texture.hit_box_points)
+
     def get_texture_from_pair(self, texture_pair: TexturePair) -> Texture:
         """Selects which texture to use from the texture pair depending on the facing direction"""
         if self.facing == FacingDirection.RIGHT:
@@ -78,9 +155,18 @@ class Player(Sprite):
             return texture_pair.left
 
     def update_animation_with_physics(
-        self, physics_engine: PhysicsEnginePlatformer, delta_time: float = 1 / 60
+        self, physics_engine: PhysicsEngine, delta_time: float = 1 / 60
     ) -> None:
         """Handle being moved by the pymunk engine"""
+        self.update_animation_for_movement(physics_engine.contacts.grounded)
+
+    def update_animation_for_movement(self, grounded: bool) -> None:
+        """
+        Pick the texture from the direction and distance moved
+
+        Args:
+            grounded (bool): If the player is on the ground, otherwise the idle texture is used
+        """
         # Figure out if we need to face left or right
         if self.change_x < 0 and self.facing == FacingDirection.RIGHT:
             self.facing = FacingDirection.LEFT
@@ -90,7 +176,7 @@ class Player(Sprite):
         # Animation while jumping, this is set to the 'idle' texture
         # Check if the player is touching the ground
 
-        if not physics_engine.can_jump():
+        if not grounded:
             self.texture = self.get_texture_from_pair(self.idle_texture_pair)
 
             # Also reset the moving textures, and set the last position to the current position
@@ -0,0 +1,395 @@
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from arcade import Sprite, Texture, get_window
+from arcade.gl import BufferDescription
+from PIL import Image
+
+from physics.base import SurfaceType
+from physics.tile_engine import BoxTuple
+from static_values import HEIGHT, WIDTH
+
+RISING_TILE_VERTEX_SHADER = """
+#version 330
+
+uniform Projection {
+    uniform mat4 matrix;
+} proj;
+
+in vec2 in_vert;
+in vec2 in_uv;
+in vec2 in_position;
+in vec2 in_size;
+in vec4 in_uv_rect;
+out vec2 v_uv;
+
+void main() {
+    gl_Position = proj.matrix * vec4(in_position + in_vert * in_size, 0.0, 1.0);
+    // The images are uploaded from the top row, textures start from the bottom
+    v_uv = vec2(in_uv_rect.x + in_uv.x * in_uv_rect.z, in_uv_rect.y + (1.0 - in_uv.y) * in_uv_rect.w);
+}
+"""
+
+RISING_TILE_FRAGMENT_SHADER = """
+#version 330
+
+uniform sampler2D atlas;
+in vec2 v_uv;
+out vec4 f_color;
+
+void main() {
+    f_color = texture(atlas, v_uv);
+}
+"""
+
+
+def bordered(image: Image.Image) -> Image.Image:
+    """
+    Surround an image with a copy of its edge pixels, so the images next to it in an atlas
+    don't bleed into it, the same as arcade's sprite list atlases
+
+    Args:
+        image (Image.Image)
+
+    Returns:
+        Image.Image: The image, one pixel bigger on every side
+    """
+    pixels = np.asarray(image.convert("RGBA"))
+    return Image.fromarray(np.pad(pixels, ((1, 1), (1, 1), (0, 0)), mode="edge"))
+
+
+class RisingTilesStateTuple(NamedTuple):
+    """
+    Copies of the live part of the arrays, and the textures they index
+    """
+
+    position: np.ndarray
+    size: np.ndarray
+    hit_box: np.ndarray
+    change_y: np.ndarray
+    boundary_top: np.ndarray
+    texture_index: np.ndarray
+    textures: Tuple[Texture, ...]
+
+
+class RisingTileSystem:
+    """
+    Manages the tiles that rise up from the `rising_only` layer.
+    The positions, sizes and speeds of the tiles are stored in arrays so that moving them, checking if they
+    should be removed and finding the ones in the player's way is done for every tile at once.
+    There are no sprites, the tiles are drawn as instances of one quad from their own atlas, so the positions
+    are written to the GPU in one buffer each frame, and the physics engines collide with the boxes from `overlapping`.
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        """
+        Create the system
+
+        Args:
+            capacity (int, optional): How many tiles to allocate space for initially. Defaults to 64.
+        """
+        self.count = 0
+
+        self.position = np.zeros((capacity, 2), np.float32)
+        # The width and height the tile is drawn at
+        self.size = np.zeros((capacity, 2), np.float32)
+        # The left, bottom, right and top of the hit box, from the center
+        self.hit_box = np.zeros((capacity, 4))
+        self.change_y = np.zeros(capacity)
+        # Infinite when the tile has no top boundary, so nothing is ever above it
+        self.boundary_top = np.full(capacity, np.inf)
+        self.texture_index = np.zeros(capacity, np.int32)
+
+        # Each texture used by a tile, in the order they are in the atlas
+        self.textures: List[Texture] = []
+        self.texture_indices: Dict[str, int] = {}
+        # The left, bottom, width and height of each texture in the atlas, from 0 to 1
+        self.uv_rects = np.zeros((0, 4), np.float32)
+
+        # Sizes and textures only change when tiles are added or removed, so they are only uploaded then
+        self.changed = False
+        self.atlas_changed = False
+        # Created when first drawn, once there's a window
+        self.ctx: Any = None
+        self.program: Any = None
+        self.geometry: Any = None
+        self.atlas: Any = None
+        self.buffers: Tuple[Any, ...] = ()
+        self.buffer_capacity = 0
+
+    def _grow(self) -> None:
+        """
+        Double the size of the arrays
+        """
+        self.position = np.concatenate((self.position, np.zeros_like(self.position)))
+        self.size = np.concatenate((self.size, np.zeros_like(self.size)))
+        self.hit_box = np.concatenate((self.hit_box, np.zeros_like(self.hit_box)))
+        self.change_y = np.concatenate((self.change_y, np.zeros_like(self.change_y)))
+        self.boundary_top = np.concatenate(
+            (self.boundary_top, np.full_like(self.boundary_top, np.inf))
+        )
+        self.texture_index = np.concatenate(
+            (self.texture_index, np.zeros_like(self.texture_index))
+        )
+
+    def add_texture(self, texture: Texture) -> int:
+        """
+        Args:
+            texture (Texture)
+
+        Returns:
+            int: The index of the texture in the atlas, which is made again when it's next drawn if it's new
+        """
+        index = self.texture_indices.get(texture.name)
+        if index is None:
+            index = len(self.textures)
+            self.textures.append(texture)
+            self.texture_indices[texture.name] = index
+            self.atlas_changed = True
+        return index
+
+    def add(self, sprite: Sprite, change_y: float) -> None:
+        """
+        Start a tile rising, the sprite is only used for its position, size, hit box and texture
+
+        Args:
+            sprite (Sprite): Where the tile starts, and how it looks
+            change_y (float): How far the tile moves up each update
+        """
+        if self.count == len(self.change_y):
+            self._grow()
+        index = self.count
+        self.position[index] = sprite.position
+        self.size[index] = (sprite.width, sprite.height)
+        points = sprite.get_adjusted_hit_box()
+        x_points = [point[0] - sprite.center_x for point in points]
+        y_points = [point[1] - sprite.center_y for point in points]
+        self.hit_box[index] = (
+            min(x_points),
+            min(y_points),
+            max(x_points),
+            max(y_points),
+        )
+        self.change_y[index] = change_y
+        self.boundary_top[index] = sprite.boundary_top or np.inf
+        self.texture_index[index] = self.add_texture(sprite.texture)
+        self.count += 1
+        self.changed = True
+
+    def clear(self) -> None:
+        """
+        Remove every rising tile, and forget their textures
+        """
+        self.count = 0
+        self.textures = []
+        self.texture_indices = {}
+        self.atlas_changed = True
+
+    def snapshot(self) -> RisingTilesStateTuple:
+        count = self.count
+        return RisingTilesStateTuple(
+            self.position[:count].copy(),
+            self.size[:count].copy(),
+            self.hit_box[:count].copy(),
+            self.change_y[:count].copy(),
+            self.boundary_top[:count].copy(),
+            self.texture_index[:count].copy(),
+            tuple(self.textures),
+        )
+
+    def restore(self, state: RisingTilesStateTuple) -> None:
+        """
+        Replace every rising tile with the tiles from a state from `snapshot`
+
+        Args:
+            state (RisingTilesStateTuple)
+        """
+        self.clear()
+        for texture in state.textures:
+            self.add_texture(texture)
+        count = len(state.change_y)
+        while len(self.change_y) < count:
+            self._grow()
+        self.position[:count] = state.position
+        self.size[:count] = state.size
+        self.hit_box[:count] = state.hit_box
+        self.change_y[:count] = state.change_y
+        self.boundary_top[:count] = state.boundary_top
+        self.texture_index[:count] = state.texture_index
+        self.count = count
+        self.changed = True
+
+    def _remove(self, remove: np.ndarray) -> None:
+        """
+        Remove the tiles where `remove` is True, keeping the order of the remaining tiles
+
+        Args:
+            remove (np.ndarray): Boolean mask over the live tiles
+        """
+        count = self.count
+        keep = ~remove
+        kept = int(keep.sum())
+        for array in (
+            self.position,
+            self.size,
+            self.hit_box,
+            self.change_y,
+            self.boundary_top,
+            self.texture_index,
+        ):
+            array[:kept] = array[:count][keep]
+        self.count = kept
+        self.changed = True
+
+    def update(self, view_left: float, view_bottom: float) -> None:
+        """
+        Move every tile, and remove the ones that have passed their boundary or left the viewport
+
+        Args:
+            view_left (float): The left of the viewport
+            view_bottom (float): The bottom of the viewport
+        """
+        count = self.count
+        if count == 0:
+            return
+
+        center_x = self.position[:count, 0]
+        center_y = self.position[:count, 1]
+        center_y += self.change_y[:count]
+
+        half_width = self.size[:count, 0] / 2
+        top = center_y + self.size[:count, 1] / 2
+        expired = top > self.boundary_top[:count]
+        # The bottom is not included in the check because the tiles start below the view port
+        culled = (
+            (center_x + half_width > WIDTH + view_left)
+            | (center_x - half_width < view_left)
+            | (top > HEIGHT + view_bottom)
+        )
+        remove = expired | culled
+        if remove.any():
+            self._remove(remove)
+
+    def overlapping(self, box: BoxTuple) -> List[BoxTuple]:
+        """
+        Find the hit boxes of the tiles that overlap with a box
+
+        Args:
+            box (BoxTuple)
+
+        Returns:
+            List[BoxTuple]: The boxes, as rising surfaces
+        """
+        count = self.count
+        if count == 0:
+            return []
+        hit_box = self.hit_box[:count]
+        center_x = self.position[:count, 0]
+        center_y = self.position[:count, 1]
+        left = center_x + hit_box[:, 0]
+        bottom = center_y + hit_box[:, 1]
+        right = center_x + hit_box[:, 2]
+        top = center_y + hit_box[:, 3]
+        found = (
+            (left < box.right)
+            & (right > box.left)
+            & (bottom < box.top)
+            & (top > box.bottom)
+        )
+        if not found.any():
+            return []
+        return [
+            BoxTuple(*edges, SurfaceType.RISING)
+            for edges in zip(
+                left[found].tolist(),
+                bottom[found].tolist(),
+                right[found].tolist(),
+                top[found].tolist(),
+            )
+        ]
+
+    def create_atlas(self) -> None:
+        """
+        Put every texture in one atlas, side by side
+        """
+        images = [bordered(texture.image) for texture in self.textures]
+        width = sum(image.width for image in images)
+        height = max(image.height for image in images)
+        atlas = Image.new("RGBA", (width, height))
+        self.uv_rects = np.zeros((len(images), 4), np.float32)
+        left = 0
+        for index, image in enumerate(images):
+            atlas.paste(image, (left, 0))
+            # Inside the border
+            self.uv_rects[index] = (
+                (left + 1) / width,
+                1 / height,
+                (image.width - 2) / width,
+                (image.height - 2) / height,
+            )
+            left += image.width
+        self.atlas = self.ctx.texture(
+            (width, height), components=4, data=atlas.tobytes()
+        )
+        self.atlas_changed = False
+
+    def create_buffers(self) -> None:
+        """
+        Create the buffers, with space for every tile the arrays can hold
+        """
+        ctx = self.ctx
+        capacity = len(self.change_y)
+        position = ctx.buffer(reserve=self.position.nbytes, usage="stream")
+        size = ctx.buffer(reserve=self.size.nbytes, usage="dynamic")
+        uv_rect = ctx.buffer(reserve=capacity * 4 * 4, usage="dynamic")
+        # One quad, from -0.5 to 0.5, that every tile is an instance of
+        quad = ctx.buffer(
+            data=np.array(
+                [-0.5, 0.5, 0, 1, -0.5, -0.5, 0, 0, 0.5, 0.5, 1, 1, 0.5, -0.5, 1, 0],
+                np.float32,
+            )
+        )
+        self.buffers = (position, size, uv_rect)
+        self.buffer_capacity = capacity
+        self.geometry = ctx.geometry(
+            [
+                BufferDescription(quad, "2f 2f", ["in_vert", "in_uv"]),
+                BufferDescription(position, "2f", ["in_position"], instanced=True),
+                BufferDescription(size, "2f", ["in_size"], instanced=True),
+                BufferDescription(uv_rect, "4f", ["in_uv_rect"], instanced=True),
+            ],
+            mode=ctx.TRIANGLE_STRIP,
+        )
+        self.changed = True
+
+    def draw(self) -> None:
+        """
+        Draw every tile, in one draw call
+        """
+        count = self.count
+        if count == 0:
+            return
+        if self.ctx is None:
+            self.ctx = get_window().ctx
+            self.program = self.ctx.program(
+                vertex_shader=RISING_TILE_VERTEX_SHADER,
+                fragment_shader=RISING_TILE_FRAGMENT_SHADER,
+            )
+        if self.atlas_changed:
+            self.create_atlas()
+            self.changed = True
+        if self.buffer_capacity != len(self.change_y):
+            self.create_buffers()
+        position, size, uv_rect = self.buffers
+        position.write(self.position[:count])
+        if self.changed:
+            size.write(self.size[:count])
+            uv_rect.write(self.uv_rects[self.texture_index[:count]])
+            self.changed = False
+
+        ctx = self.ctx
+        ctx.enable(ctx.BLEND)
+        ctx.blend_func = ctx.BLEND_DEFAULT
+        self.atlas.use(0)
+        self.geometry.render(self.program, vertices=4, instances=count)
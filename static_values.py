@@ -1,5 +1,7 @@
 # Constant values that are shared accross files
 
+import os
+
 PLAYER_JUMP_SPEED = 12
 BOOSTED_PLAYER_JUMP_SPEED = 18
 
@@ -7,13 +9,107 @@ PLAYER_MOVEMENT_SPEED = 4
 
 GRAVITY = 0.7
 
+# Which physics backend to use, "arcade" or "tile".
+# Only "tile" sweeps the player's movement against the walls, so the player can't pass through them however fast it moves
+PHYSICS_ENGINE = "arcade"
+
 TILE_WIDTH = 128
 TILE_HEIGHT = TILE_WIDTH
 WIDTH = 10 * TILE_WIDTH
 HEIGHT = 6 * TILE_HEIGHT
 VIEWPORT_MARGIN = 280
+# How much of the distance to the player the camera moves every 1/60th of a second
+CAMERA_SMOOTHING = 0.25
 TITLE = "Ice Game"
 
+# Snowflakes per second, falling over the viewport
+SNOW_RATE = 300
+
+# Seconds that updating and drawing a frame should take, the quality is lowered when frames take longer
+FRAME_BUDGET = 1 / 60
+
+
+# Maps with at least this many tiles are streamed in chunks rather than loaded all at once
+STREAMING_MIN_TILES = 200 * 200
+# The width and height of a streamed chunk, in tiles
+STREAMING_CHUNK_SIZE = 16
+# How many chunks around the camera's chunk are kept loaded
+STREAMING_RADIUS = 1
+
+# This layer holds the 'walls', the tiles that are used to 'walk' on, that the player can't pass through
+WALL_LAYER_NAME = "wall_contact"
+
+# This layer holds the springboards. The tiles are processed and then appended to the wall list
+SPRING_LAYER_NAME = "springboards"
+
+# This layer holds the batteries, which are a collectable
+BATTERY_LAYER_NAME = "batteries"
+
+# This layer holds a single tile, which is a wall tile. This tile marks where the character should 'start'
+# The single tile is processed and then appended to the wall list
+START_MARKER_LAYER_NAME = "start_level_marker"
+
+# This layer contains tiles that if touched kill the player
+DEATH_LAYER_NAME = "death"
+
+# This layer contains tiles that if touched the player will 'win' the level
+WIN_LAYER_NAME = "end_flag"
+
+# This layer contain the 'start' point of the moving upwards tiles
+MOVING_UP_LAYER_NAME = "rising_only"
+
+# These layers are all combined into the wall list, so are always processed together
+WALL_LIST_LAYER_NAMES = {WALL_LAYER_NAME, SPRING_LAYER_NAME, START_MARKER_LAYER_NAME}
+
+# The layers that are streamed for large maps, the moving up layer is small so it's loaded all at once
+STREAMED_LAYER_NAMES = WALL_LIST_LAYER_NAMES | {
+    BATTERY_LAYER_NAME,
+    DEATH_LAYER_NAME,
+    WIN_LAYER_NAME,
+}
+
+LAYER_NAMES = STREAMED_LAYER_NAMES | {MOVING_UP_LAYER_NAME}
+
+# The layers that never move, so are drawn together as one batch
+STATIC_LAYER_NAMES = WALL_LIST_LAYER_NAMES | {DEATH_LAYER_NAME, WIN_LAYER_NAME}
+
+# Files are found from the game's directory, so the game can be started from any working directory
+GAME_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIRECTORY = os.path.join(GAME_DIRECTORY, "assets")
+# Built with `python assets.py`, loose files are read until it is
+ASSET_ARCHIVE_PATH = os.path.join(GAME_DIRECTORY, "assets.pack")
+
+# The database finished levels are saved in, for the leaderboard
+RUN_HISTORY_PATH = os.path.join(GAME_DIRECTORY, "run_history.sqlite3")
+
+# Where the best run of each level is stored, it's played back as a ghost
+GHOST_DIRECTORY = os.path.join(GAME_DIRECTORY, "ghosts")
+
+# Where the static layers of each map are saved after they are drawn into pages
+BAKE_DIRECTORY = os.path.join(GAME_DIRECTORY, "baked")
+
+# Seconds between each write of the metrics, when they are enabled with `GAME_METRICS`
+METRICS_FLUSH_INTERVAL = 10
+
+# The levels, `level_1.tmx` onwards. Generated levels are added after the hand made ones
+MAPS_DIRECTORY = os.path.join(ASSETS_DIRECTORY, "maps")
+
+
+def count_levels(directory: str) -> int:
+    """
+    Count the levels in a directory, stopping at the first level number that's missing
+
+    Args:
+        directory (str)
+
+    Returns:
+        int
+    """
+    level = 0
+    while os.path.exists(os.path.join(directory, f"level_{level + 1}.tmx")):
+        level += 1
+    return level
+
 
-MAX_LEVEL = 3
+MAX_LEVEL = count_levels(MAPS_DIRECTORY)
 START_LEVEL = 1  # 2 for testing, this should be changed to 1 on release
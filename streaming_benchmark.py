@@ -0,0 +1,144 @@
+import argparse
+import gc
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# How many generated levels are placed across and up the large map, each is up to 90 by 20 tiles
+DEFAULT_LEVELS_ACROSS = 4
+DEFAULT_LEVELS_UP = 12
+# How far the camera moves each update, in pixels
+CAMERA_SPEED = 16
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Stream a large map built from generated levels"
+    )
+    parser.add_argument("--across", type=int, default=DEFAULT_LEVELS_ACROSS)
+    parser.add_argument("--up", type=int, default=DEFAULT_LEVELS_UP)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--keep", help="Also write the large map here, so it can be played"
+    )
+    args = parser.parse_args()
+
+    from arcade.tilemap import read_tmx
+
+    from hit_boxes import gid_hit_boxes, load_hit_boxes
+    from level_generator import (
+        LEVEL_ROWS,
+        MAX_LEVEL_COLUMNS,
+        generate_layers,
+        new_layers,
+        to_tmx,
+    )
+    from level_streaming import LevelStreamer
+    from static_values import (
+        ASSETS_DIRECTORY,
+        HEIGHT,
+        START_MARKER_LAYER_NAME,
+        STREAMED_LAYER_NAMES,
+        STREAMING_CHUNK_SIZE,
+        STREAMING_MIN_TILES,
+        STREAMING_RADIUS,
+        WIDTH,
+    )
+
+    # Place the levels in a grid, only the first one keeps its start marker
+    rng = random.Random(args.seed)
+    layers = new_layers(MAX_LEVEL_COLUMNS * args.across, LEVEL_ROWS * args.up)
+    for index in range(args.across * args.up):
+        first_column = (index % args.across) * MAX_LEVEL_COLUMNS
+        first_row = (index // args.across) * LEVEL_ROWS
+        for layer_name, grid in generate_layers(rng).items():
+            if layer_name == START_MARKER_LAYER_NAME and index > 0:
+                continue
+            for cell in grid.cells():
+                layers[layer_name].set_gid(
+                    first_column + cell.column, first_row + cell.row, cell.gid
+                )
+    walls = next(iter(layers.values()))
+    tile_count = walls.columns * walls.rows
+    if tile_count < STREAMING_MIN_TILES:
+        print(f"A map of {tile_count} tiles is too small to be streamed")
+        return 1
+    if args.keep:
+        with open(args.keep, "w") as file:
+            file.write(to_tmx(layers, os.path.dirname(os.path.abspath(args.keep))))
+
+    with tempfile.TemporaryDirectory(dir=ASSETS_DIRECTORY) as directory:
+        map_path = os.path.join(directory, "large.tmx")
+        with open(map_path, "w") as file:
+            file.write(to_tmx(layers, directory))
+        del layers
+
+        # Only traced while setting up, as tracing makes the updates slower
+        tracemalloc.start()
+        start = time.perf_counter()
+        map_object = read_tmx(map_path)
+        streamer = LevelStreamer(
+            map_object,
+            STREAMED_LAYER_NAMES,
+            0.5,
+            STREAMING_CHUNK_SIZE,
+            STREAMING_RADIUS,
+            gid_hit_boxes(load_hit_boxes(), map_path),
+        )
+    setup_time = time.perf_counter() - start
+    # The streamer only keeps its tile grids and templates
+    del map_object
+    gc.collect()
+    setup_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    loaded_sprites = 0
+    most_sprites = 0
+
+    def on_load(layer_name: str, sprites: list) -> None:
+        nonlocal loaded_sprites, most_sprites
+        loaded_sprites += len(sprites)
+        most_sprites = max(most_sprites, loaded_sprites)
+
+    def on_unload(layer_name: str, sprites: list) -> None:
+        nonlocal loaded_sprites
+        loaded_sprites -= len(sprites)
+
+    streamer.subscribe(on_load, on_unload)
+
+    # Across the middle of the map, then up the middle of it
+    map_width = streamer.columns * streamer.tile_size
+    map_height = streamer.rows * streamer.tile_size
+    path = [
+        (x, map_height / 2, CAMERA_SPEED, 0)
+        for x in range(WIDTH // 2, int(map_width - WIDTH / 2), CAMERA_SPEED)
+    ] + [
+        (map_width / 2, y, 0, CAMERA_SPEED)
+        for y in range(HEIGHT // 2, int(map_height - HEIGHT / 2), CAMERA_SPEED)
+    ]
+    timings = []
+    for x, y, change_x, change_y in path:
+        update_start = time.perf_counter()
+        streamer.update(x, y, change_x, change_y)
+        timings.append(time.perf_counter() - update_start)
+    streamer.shutdown()
+
+    timings.sort()
+    print(
+        f"{walls.columns} by {walls.rows} tiles, set up in {setup_time:.2f} s "
+        f"keeping {setup_memory / 2 ** 20:.1f} MiB of python memory"
+    )
+    print(
+        f"{len(timings)} updates: median {statistics.median(timings) * 1000:.2f} ms, "
+        f"p95 {timings[int(len(timings) * 0.95)] * 1000:.2f} ms, "
+        f"max {timings[-1] * 1000:.2f} ms, at most {most_sprites} sprites loaded"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+from array import array
+from typing import TYPE_CHECKING, Iterator, NamedTuple, Optional, Tuple
+
+from arcade.tilemap import get_tilemap_layer
+
+if TYPE_CHECKING:
+    from pytiled_parser.objects import TileMap
+
+
+class CellTuple(NamedTuple):
+    """
+    A single occupied cell in a tile grid
+    """
+
+    column: int
+    row: int
+    gid: int
+
+
+class TileGrid:
+    """
+    A compact representation of a single tile layer. Only the gid of each cell is stored,
+    in a flat array, instead of a full sprite for every tile.
+    Rows are stored bottom to top so that row 0 is the row at y = 0, matching the sprite positions.
+    A gid of 0 means the cell is empty.
+    """
+
+    __slots__ = ("columns", "rows", "tile_size", "gids")
+
+    def __init__(
+        self,
+        columns: int,
+        rows: int,
+        tile_size: float,
+        gids: Optional["array[int]"] = None,
+    ) -> None:
+        """
+        Create the grid
+
+        Args:
+            columns (int): The width of the grid in tiles
+            rows (int): The height of the grid in tiles
+            tile_size (float): The width (and height) of a tile in pixels, after scaling
+            gids (Optional[array[int]], optional): The gids of the cells, row by row from the bottom. Defaults to an empty grid.
+        """
+        self.columns = columns
+        self.rows = rows
+        self.tile_size = tile_size
+        self.gids: "array[int]" = (
+            gids if gids is not None else array("I", bytes(4 * columns * rows))
+        )
+
+    @classmethod
+    def from_layer(
+        cls, map_object: "TileMap", layer_name: str, scaling: float
+    ) -> "TileGrid":
+        """
+        Read a tile layer from a map. If the layer does not exist an empty grid the size of the map is returned
+
+        Args:
+            map_object (TileMap): The map read with `read_tmx`
+            layer_name (str): The name of the layer to read
+            scaling (float): The scaling the layer's sprites are created with
+
+        Returns:
+            TileGrid: The grid for the layer
+        """
+        columns = map_object.map_size.width
+        rows = map_object.map_size.height
+        grid = cls(columns, rows, map_object.tile_size.width * scaling)
+
+        layer = get_tilemap_layer(map_object, layer_name)
+        layer_data = getattr(layer, "layer_data", None)
+        if not layer_data:
+            return grid
+
+        # The map stores the top row first, so it's flipped here
+        for row_index, row_data in enumerate(layer_data):
+            row = rows - row_index - 1
+            start = row * columns
+            grid.gids[start : start + len(row_data)] = array("I", row_data)
+        return grid
+
+    def in_bounds(self, column: int, row: int) -> bool:
+        return 0 <= column < self.columns and 0 <= row < self.rows
+
+    def gid_at(self, column: int, row: int) -> int:
+        """
+        Get the gid of a cell
+
+        Args:
+            column (int)
+            row (int)
+
+        Returns:
+            int: The gid, or 0 if the cell is empty or outside of the grid
+        """
+        if not self.in_bounds(column, row):
+            return 0
+        return self.gids[row * self.columns + column]
+
+    def occupied(self, column: int, row: int) -> bool:
+        return self.gid_at(column, row) != 0
+
+    def set_gid(self, column: int, row: int, gid: int) -> None:
+        self.gids[row * self.columns + column] = gid
+
+    def cell_at(self, x: float, y: float) -> Tuple[int, int]:
+        """
+        Get the cell that contains a point
+
+        Args:
+            x (float)
+            y (float)
+
+        Returns:
+            Tuple[int, int]: The column and row
+        """
+        return int(x // self.tile_size), int(y // self.tile_size)
+
+    def cells(self) -> Iterator[CellTuple]:
+        """
+        Iterate over every occupied cell
+
+        Yields:
+            CellTuple
+        """
+        columns = self.columns
+        for index, gid in enumerate(self.gids):
+            if gid:
+                yield CellTuple(index % columns, index // columns, gid)
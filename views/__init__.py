@@ -1,6 +1,13 @@
 from .game_over_view import GameOverView
 from .game_view import GameView
 from .instruction_view import InstructionView
+from .leaderboard_view import LeaderboardView
 from .win_view import GameWonView
 
-__all__ = ("GameOverView", "GameView", "InstructionView", "GameWonView")
+__all__ = (
+    "GameOverView",
+    "GameView",
+    "InstructionView",
+    "LeaderboardView",
+    "GameWonView",
+)
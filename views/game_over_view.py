@@ -1,8 +1,9 @@
 from typing import TYPE_CHECKING
 
-from arcade import View, draw_text, set_viewport, start_render
+from arcade import View, draw_text, start_render
 from arcade.color import WHITE
 
+from metrics import registry
 from static_values import HEIGHT, START_LEVEL, WIDTH
 
 if TYPE_CHECKING:
@@ -26,12 +27,22 @@ class GameOverView(View):
     def setup(self, current_level: int = START_LEVEL) -> None:
         # Reset the viewport, necessary if we have a scrolling game and we need
         # to reset the viewport back to the start so we can see what we draw.
-        set_viewport(0, WIDTH - 1, 0, HEIGHT - 1)
+        self.window.camera.reset()
         self.current_level = current_level
 
+    def on_update(self, delta_time: float) -> None:
+        """
+        Play the burst from the player's death
+
+        Args:
+            delta_time (float)
+        """
+        self.window.game_view.particles.update(delta_time)
+
     def on_draw(self) -> None:
         """Draw this view"""
         start_render()
+        self.window.game_view.particles.draw()
         draw_text(
             "Game Over", WIDTH / 2, HEIGHT / 2, WHITE, font_size=50, anchor_x="center"
         )
@@ -48,6 +59,11 @@ class GameOverView(View):
         self, _x: float, _y: float, _button: int, _modifiers: int
     ) -> None:
         """If the user presses the mouse button, re-start the game."""
+        registry.counter(
+            "game_retries_total",
+            "Levels restarted after dying",
+            level=self.current_level,
+        ).inc()
         game_view = self.window.game_view
-        game_view.setup(self.current_level)
+        game_view.restart(self.current_level)
         self.window.show_view(game_view)
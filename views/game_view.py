@@ -1,41 +1,125 @@
-from copy import deepcopy
-from typing import TYPE_CHECKING, List, NamedTuple, Optional
+import logging
+import os
+import struct
+
+from functools import partial
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+from xml.etree import ElementTree
 
 from arcade import (
     Sprite,
     SpriteList,
+    Texture,
     View,
-    check_for_collision_with_list,
+    cleanup_texture_cache,
     set_background_color,
-    set_viewport,
     start_render,
 )
-from arcade.color import RED
-from arcade.key import LEFT, RIGHT, UP, A, D, W
-from arcade.physics_engines import PhysicsEnginePlatformer
-from arcade.tilemap import process_layer, read_tmx
-
+from arcade.color import GREEN, LIGHT_STEEL_BLUE, ORANGE, RED, YELLOW
+from arcade.tilemap import get_tilemap_layer, process_layer, read_tmx
+
+from assets import assets
+from baked_layers import BakedLayers
+from collision_events import (
+    CollisionEvent,
+    CollisionEvents,
+    CollisionEventTuple,
+    TriggerKind,
+)
 from errors import IncorrectNumberOfMarkers
-from label import EphemeralLabel
-from power.power import PowerManager
-from sprites.player import Player
+from ghost import GhostPlayer, GhostRecorder, ghost_path
+from hit_boxes import (
+    PointList,
+    apply_tile_hit_boxes,
+    gid_hit_boxes,
+    hit_box_key,
+    load_hit_boxes,
+)
+from hot_reload import GID_MASK, AssetWatcher, ChangesTuple
+from input_state import Action, InputState, parse_bindings
+from label import EphemeralLabel, Label
+from level_streaming import LevelStreamer
+from memory_profile import MemoryProfiler
+from metrics import FRAME_TIME_BUCKETS, registry
+from minimap import Minimap
+from particles import DEATH_BURST, SPRINGBOARD_BURST, ParticleSystem
+from physics import (
+    NO_CONTACTS,
+    ArcadePhysicsEngine,
+    CollisionGrid,
+    MovementTuple,
+    PhysicsEngine,
+    SurfaceType,
+    TilePhysicsEngine,
+    sprite_box,
+)
+from power.power import PowerManager, PowerStateTuple
+from quality import QualityController, QualityLevel
+from render_queue import RenderLayer, RenderQueue
+from sprites.player import Player, PlayerStateTuple
+from sprites.rising_tiles import RisingTilesStateTuple, RisingTileSystem
 from static_values import (
+    BAKE_DIRECTORY,
+    BATTERY_LAYER_NAME,
     BOOSTED_PLAYER_JUMP_SPEED,
+    DEATH_LAYER_NAME,
+    FRAME_BUDGET,
+    GHOST_DIRECTORY,
     GRAVITY,
     HEIGHT,
+    LAYER_NAMES,
+    MAPS_DIRECTORY,
     MAX_LEVEL,
+    MOVING_UP_LAYER_NAME,
+    PHYSICS_ENGINE,
     PLAYER_JUMP_SPEED,
     PLAYER_MOVEMENT_SPEED,
+    SNOW_RATE,
+    SPRING_LAYER_NAME,
     START_LEVEL,
+    START_MARKER_LAYER_NAME,
+    STATIC_LAYER_NAMES,
+    STREAMED_LAYER_NAMES,
+    STREAMING_CHUNK_SIZE,
+    STREAMING_MIN_TILES,
+    STREAMING_RADIUS,
     TILE_HEIGHT,
     TILE_WIDTH,
-    VIEWPORT_MARGIN,
+    WALL_LAYER_NAME,
+    WALL_LIST_LAYER_NAMES,
     WIDTH,
+    WIN_LAYER_NAME,
 )
+from tile_grid import TileGrid
 
 if TYPE_CHECKING:
+    from pytiled_parser.objects import TileMap
+
     from main import GameWindow
 
+logger = logging.getLogger(__name__)
+
+# The colour of each layer on the minimap, later layers are drawn over earlier ones
+MINIMAP_COLORS = {
+    WALL_LAYER_NAME: LIGHT_STEEL_BLUE,
+    START_MARKER_LAYER_NAME: LIGHT_STEEL_BLUE,
+    SPRING_LAYER_NAME: ORANGE,
+    BATTERY_LAYER_NAME: YELLOW,
+    DEATH_LAYER_NAME: RED,
+    WIN_LAYER_NAME: GREEN,
+}
+
 
 class CoordinateTuple(NamedTuple):
     """
@@ -43,26 +127,70 @@ class CoordinateTuple(NamedTuple):
     For example `position.x` instead of `position[0]`
     """
 
-    x: int
-    y: int
+    x: float
+    y: float
+
+
+class GameStateTuple(NamedTuple):
+    """
+    A snapshot of the simulation, which can be restored without loading the map again
+    """
+
+    level: int
+    level_time: float
+    player: PlayerStateTuple
+    power: PowerStateTuple
+    rising_tiles: RisingTilesStateTuple
+    # The time until each moving up tile generator creates its next tile
+    generator_timers: Tuple[float, ...]
 
 
 class MovingUpTileGenerator:
     """
     A class for 'deciding' when to 'generate' a new moving up sprite
+    Only what is needed to create the sprite is stored, the sprite itself is created when it's generated
     """
 
+    __slots__ = (
+        "texture",
+        "scale",
+        "center_x",
+        "center_y",
+        "boundary_top",
+        "time_until_next_generation",
+        "time_per_generation",
+    )
+
     def __init__(self, time_per_generation: float, sprite: Sprite) -> None:
-        self.sprite = sprite
+        self.texture: Texture = sprite.texture
+        self.scale = sprite.scale
+        self.center_x = sprite.center_x
+        self.center_y = sprite.center_y
+        self.boundary_top: Optional[float] = sprite.boundary_top
         self.time_until_next_generation: float = 0
         self.time_per_generation = time_per_generation
 
+    def generate(self) -> Sprite:
+        """
+        Create a new sprite in the generator's position
+
+        Returns:
+            Sprite
+        """
+        sprite = Sprite(scale=self.scale)
+        sprite.texture = self.texture
+        sprite.center_x = self.center_x
+        sprite.center_y = self.center_y
+        # arcade only ever sets boundary_top to None, so mypy takes that as its type
+        sprite.boundary_top = self.boundary_top  # type: ignore
+        return sprite
+
     def update(self, delta_time: float) -> Optional[Sprite]:
         self.time_until_next_generation -= delta_time
         if self.time_until_next_generation <= 0:
             self.time_until_next_generation = self.time_per_generation
 
-            return deepcopy(self.sprite)
+            return self.generate()
         return None  # Appease mypy
 
 
@@ -75,9 +203,15 @@ class GameView(View):
         self.power: PowerManager
         self.not_enough_power_label: EphemeralLabel
 
-        # Controls the scroll of the screen
-        self.view_bottom: int
-        self.view_left: int
+        # The death, win and battery sprites, checked against the player's movement once per update
+        self.collision_events = CollisionEvents(TILE_WIDTH * 0.5)
+        self.collision_events.subscribe(TriggerKind.DEATH, self.on_death_event)
+        self.collision_events.subscribe(TriggerKind.WIN, self.on_win_event)
+        self.collision_events.subscribe(TriggerKind.BATTERY, self.on_battery_event)
+
+        # The position of the viewport, kept up to date by the camera
+        self.view_bottom: int = 0
+        self.view_left: int = 0
 
         # Sprite lists
         self.battery_list: SpriteList
@@ -90,17 +224,67 @@ class GameView(View):
         # Wall sprites
         self.wall_list: SpriteList
 
-        # List of sprites that are moving up currently
-        self.moving_up_list: SpriteList
+        # The walls, death and win sprites together, for drawing
+        self.static_list: SpriteList
+        # The static list drawn into pages, these are drawn instead when the map isn't streamed
+        self.baked_layers = BakedLayers(BAKE_DIRECTORY)
+
+        # The whole level in the top left, below the draw stats
+        self.minimap = Minimap(20, HEIGHT - 60, 240, 160)
+
+        # Snow, and the bursts when batteries are collected, springboards are used and the player dies
+        self.particles = ParticleSystem()
+
+        # Reports memory growth at each setup, death and win, when `GAME_MEMORY_PROFILE` is set to the report's path
+        memory_report_path = os.environ.get("GAME_MEMORY_PROFILE")
+        self.memory_profiler: Optional[MemoryProfiler] = (
+            MemoryProfiler(memory_report_path) if memory_report_path else None
+        )
+
+        # The tiles that are moving up currently
+        self.rising_tiles = RisingTileSystem()
 
         # The list of sprites that sprites will "rise" from
         self.static_moving_up_list: List[MovingUpTileGenerator]
         self.player: Player
-        self.spring_board_positions: List[CoordinateTuple] = []
+
+        # The springboards, these are also in the wall list
+        self.spring_board_list: SpriteList
 
         # The bottom x and y position that the player should start at
         self.player_start_position: CoordinateTuple
-        self.physics_engine: PhysicsEnginePlatformer
+        self.physics_engine: PhysicsEngine
+
+        # The path of the current map, and the tiles in each of it's layers when it was loaded
+        self.map_path: str
+        # The width and height of the map in pixels
+        self.map_size: Tuple[float, float] = (0, 0)
+        self.layer_data: Dict[str, Any] = {}
+
+        # Watches the map for changes when hot reloading is turned on with `GAME_HOT_RELOAD`
+        self.asset_watcher: Optional[AssetWatcher] = None
+
+        # The precomputed hit boxes, and those for the gids of the current map
+        self.hit_boxes = load_hit_boxes()
+        self.tile_hit_boxes: Dict[int, PointList] = {}
+
+        # Loads the map in chunks, this is only used for large maps
+        self.streamer: Optional[LevelStreamer] = None
+
+        # Records this run, and plays back the best run of the level as a ghost
+        self.ghost_recorder = GhostRecorder()
+        self.ghost_player: Optional[GhostPlayer] = None
+        self.ghost: Optional[Player] = None
+        self.ghost_visible = False
+
+        # Deaths on the current level, saved in the run history when the level is finished
+        self.level_deaths = 0
+
+        # The state at the start of the level, so dying can go back to it instantly
+        self.checkpoint: Optional[GameStateTuple] = None
+
+        # The held keys, read once per update. They can be rebound with `GAME_KEY_BINDINGS`
+        self.input_state = InputState(self.read_key_bindings())
 
         # Hide the mouse
         self.window.set_mouse_visible(False)
@@ -108,9 +292,29 @@ class GameView(View):
         # Typehint (arcade internals)
         self.window: "GameWindow"
 
-        # If the view should update the viewport
-        # This is false when other views are focused
-        self.inactive = True
+        self.window.camera.subscribe(self.on_camera_changed)
+
+        # How long the current level has been played for, in seconds
+        self.level_time: float = 0
+        self.frame_time = registry.histogram(
+            "game_frame_seconds", "Time between updates", FRAME_TIME_BUCKETS
+        )
+
+        # Lowers the quality when frames take too long to update and draw
+        self.quality = QualityController(FRAME_BUDGET)
+        self.quality.subscribe(self.apply_quality)
+        # Seconds the last update took, the draw time is added to this before it's given to the controller
+        self.update_time: float = 0
+        # How quickly the rising tiles are created, this is lowered on slow machines
+        self.rising_spawn_rate: float = 1
+
+        self.render_queue = RenderQueue()
+        # Shows the draw calls and texture binds of each frame when `GAME_DRAW_STATS` is set
+        self.draw_stats_label: Optional[Label] = None
+        if os.environ.get("GAME_DRAW_STATS"):
+            self.draw_stats_label = Label(
+                "Draw calls: {value}", "", 20, HEIGHT - 35, anchor_x="left"
+            )
 
     def setup(self, force_level: Optional[int] = None) -> None:
         """
@@ -123,36 +327,37 @@ class GameView(View):
         if force_level:
             self.level = force_level
 
-        # Controls the moving sprites
-        self.static_moving_up_list = []
-        self.moving_up_list = SpriteList()
-
-        self.inactive = False
-        self.load_map(f"./assets/maps/level_{self.level}.tmx")
+        self.map_path = os.path.join(MAPS_DIRECTORY, f"level_{self.level}.tmx")
+        self.collision_events.clear()
+        load_start = perf_counter()
+        self.load_map(self.map_path)
+        registry.histogram(
+            "game_level_load_seconds", "Time taken to load a map", level=self.level
+        ).observe(perf_counter() - load_start)
+        self.level_time = 0
+        player_image_path = "characters/main_character/main_character"
         self.player = Player(
             frames=3,
-            image_path="./assets/characters/main_character/main_character",
+            image_path=player_image_path,
             distance_before_change_texture=20,
+            hit_box=self.hit_boxes.get(
+                hit_box_key(assets.path(f"{player_image_path}_idle.png"))
+            ),
         )
 
         # Add set the x,y positions of the player so that the bottom position of the player is inline with the stored position
         self.player.center_x = self.player_start_position.x + (self.player.height / 2)
         self.player.center_y = self.player_start_position.y + (self.player.width / 2)
 
-        # Set the viewport to the player's position, if it is further away than the viewport margin
-        self.view_bottom = (
-            self.player.bottom + VIEWPORT_MARGIN
-            if self.player.bottom > VIEWPORT_MARGIN
-            else 0
-        )
-        self.view_left = (
-            self.player.left + VIEWPORT_MARGIN
-            if self.player.left > VIEWPORT_MARGIN
-            else 0
-        )
+        # Move the viewport straight to the player's position
+        self.window.camera.look_at(self.player)
 
         # Power manager
-        self.power = PowerManager(self.battery_list, self.player)
+        self.register_triggers()
+        self.power = PowerManager(
+            self.battery_list, self.player, self.collision_events, self.particles
+        )
+        self.power.subscribe(self.minimap.set_battery)
 
         self.not_enough_power_label = EphemeralLabel(
             "You do not have any power. Power is required to pass this level!{value}",
@@ -164,132 +369,634 @@ class GameView(View):
             "center",
         )
 
-        # Perform a "shallow copy" of the wall_list
-        # so that when appending to contact_list that doesn't also append to the wall_list
-        # normal shallow copy functions like copy.copy() or List[:] (https://docs.python.org/3/library/copy.html) don't seem to work with arcade SpriteLists
-        self.contact_list = SpriteList(use_spatial_hash=True)
-        for wall in self.wall_list:
-            self.contact_list.append(wall)
+        self.build_contact_list()
+        self.build_static_list()
+        self.bake_static_layers()
+        self.rising_tiles.clear()
+
+        self.physics_engine = self.create_physics_engine()
+
+        if os.environ.get("GAME_HOT_RELOAD"):
+            if self.asset_watcher is None:
+                self.asset_watcher = AssetWatcher(self.map_path)
+            else:
+                self.asset_watcher.watch(self.map_path)
+
+        self.apply_quality(self.quality.level)
+        self.load_ghost(player_image_path)
+        self.start_snow()
+
+        self.checkpoint = self.snapshot()
+        self.profile_memory("setup")
 
-        self.physics_engine = PhysicsEnginePlatformer(
-            self.player, self.contact_list, GRAVITY
+    def read_key_bindings(self) -> Optional[Dict[int, Action]]:
+        """
+        Read the key bindings from `GAME_KEY_BINDINGS`
+
+        Returns:
+            Optional[Dict[int, Action]]: The bindings, or None to use the defaults
+        """
+        text = os.environ.get("GAME_KEY_BINDINGS")
+        if not text:
+            return None
+        try:
+            return parse_bindings(text)
+        except ValueError as error:
+            logger.warning(
+                "Could not read GAME_KEY_BINDINGS, using the defaults: %s", error
+            )
+            return None
+
+    def load_ghost(self, image_path: str) -> None:
+        """
+        Start recording the level, and open the best run of the level to play back if there is one
+
+        Args:
+            image_path (str): The image path of the player, the ghost looks the same
+        """
+        self.ghost_recorder.reset()
+        if self.ghost_player is not None:
+            self.ghost_player.close()
+            self.ghost_player = None
+        self.ghost_visible = False
+
+        try:
+            self.ghost_player = GhostPlayer(ghost_path(GHOST_DIRECTORY, self.level))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, struct.error):
+            # A broken track is replaced by the next finished run
+            logger.warning("Could not read the ghost for level %d", self.level)
+            return
+
+        if self.ghost is None:
+            self.ghost = Player(
+                frames=3, image_path=image_path, distance_before_change_texture=20
+            )
+            self.ghost.alpha = 96
+
+    def update_ghost(self) -> None:
+        """
+        Record the player's position, and move the ghost to where it was at this time in the best run
+        """
+        self.ghost_recorder.update(
+            self.level_time, self.player.center_x, self.player.center_y
         )
+        if self.ghost_player is None or self.ghost is None:
+            return
+        position = self.ghost_player.position_at(self.level_time)
+        self.ghost_visible = position is not None
+        if position is None:
+            return
+        x, y = position
+        self.ghost.change_x = x - self.ghost.center_x
+        grounded = abs(y - self.ghost.center_y) < 0.5
+        self.ghost.center_x = x
+        self.ghost.center_y = y
+        self.ghost.update_animation_for_movement(grounded)
+
+    def save_ghost(self) -> None:
+        """
+        Save this run as the ghost, if it's the fastest run of the level
+        """
+        best = self.ghost_player.seconds if self.ghost_player is not None else None
+        if best is not None and best <= self.level_time:
+            return
+        if self.ghost_player is not None:
+            # The track being played is replaced
+            self.ghost_player.close()
+            self.ghost_player = None
+        try:
+            self.ghost_recorder.save(
+                ghost_path(GHOST_DIRECTORY, self.level), self.level_time
+            )
+        except OSError as error:
+            logger.warning("Could not save the ghost: %s", error)
 
-    def load_map(self, resource: str) -> None:
+    def apply_quality(self, level: QualityLevel) -> None:
         """
-        Load the maps from tmx files. Different layers are used for different types of objects.
+        Turn the expensive features on or off for a quality level
+
+        Args:
+            level (QualityLevel): The new quality level
         """
+        self.power.power_label.refresh_interval = (
+            0.25 if level >= QualityLevel.CACHED_HUD else 0
+        )
+        self.rising_spawn_rate = 0.5 if level >= QualityLevel.FEWER_RISING_TILES else 1
+        self.player.use_simple_hit_box(level >= QualityLevel.SIMPLE_HIT_BOXES)
 
-        # This layer holds the 'walls', the tiles that are used to 'walk' on, that the player can't pass through
-        tile_layer_name = "wall_contact"
+    def snapshot(self) -> GameStateTuple:
+        """
+        Capture the state of the simulation. The map itself isn't included, so a snapshot
+        can only be restored while the same level is loaded
 
-        # This layer holds the springboards. The tiles are processed and then appended to the wall list
-        spring_layer_name = "springboards"
+        Returns:
+            GameStateTuple
+        """
+        return GameStateTuple(
+            level=self.level,
+            level_time=self.level_time,
+            player=self.player.snapshot(),
+            power=self.power.snapshot(),
+            rising_tiles=self.rising_tiles.snapshot(),
+            generator_timers=tuple(
+                generator.time_until_next_generation
+                for generator in self.static_moving_up_list
+            ),
+        )
 
-        # This layer holds the batteries, which are a collectable
-        battery_layer_name = "batteries"
+    def restore(self, state: GameStateTuple) -> None:
+        """
+        Go back to a state from `snapshot`
 
-        # This layer holds a single tile, which is a wall tile. This tile marks where the character should 'start'
-        # The single tile is processed and then appended to the wall list
-        start_marker_layer_name = "start_level_marker"
+        Args:
+            state (GameStateTuple)
+        """
+        self.level_time = state.level_time
+        self.player.restore(state.player)
+        self.power.restore(state.power)
+        self.rising_tiles.restore(state.rising_tiles)
+        for generator, timer in zip(self.static_moving_up_list, state.generator_timers):
+            generator.time_until_next_generation = timer
+        # The checkpoint is at the start of the level, so the run starts again
+        self.ghost_recorder.reset()
+        if self.ghost_player is not None:
+            self.ghost_player.rewind()
+        self.physics_engine.contacts = NO_CONTACTS
+        self.collision_events.forget_contacts()
+        # The views shown while the level wasn't have moved the camera
+        self.window.camera.set_bounds(*self.map_size)
+        self.window.camera.look_at(self.player)
+        self.start_snow()
+
+    def start_snow(self) -> None:
+        """
+        Remove every particle, and fill the viewport with snow as if it had been falling all along
+        """
+        self.particles.clear()
+        self.particles.snow(
+            self.view_left,
+            self.view_bottom,
+            WIDTH,
+            HEIGHT,
+            SNOW_RATE,
+            # Roughly how long snow takes to fall through the viewport
+            HEIGHT / 50,
+            fill=True,
+        )
 
-        # This layer contains tiles that if touched kill the player
-        death_layer_name = "death"
+    def restart(self, level: int) -> None:
+        """
+        Start a level again, from the checkpoint if it's for that level, otherwise by setting it up from the map
 
-        # This layer contains tiles that if touched the player will 'win' the level
-        win_layer_name = "end_flag"
+        Args:
+            level (int): The level to restart
+        """
+        if self.checkpoint is not None and self.checkpoint.level == level:
+            self.restore(self.checkpoint)
+        else:
+            self.setup(level)
 
-        # This layer contain the 'start' point of the moving upwards tiles
-        moving_up_layer_name = "rising_only"
+    def build_contact_list(self) -> None:
+        """
+        The player only collides with the walls, so the wall list is used rather than a copy of it
+        """
+        self.contact_list = self.wall_list
 
+    def register_triggers(self) -> None:
+        """
+        Make the death and win sprites the triggers for death and winning
+        """
+        for kind, sprite_list in (
+            (TriggerKind.DEATH, self.death_list),
+            (TriggerKind.WIN, self.win_list),
+        ):
+            self.collision_events.clear(kind)
+            for sprite in sprite_list:
+                self.collision_events.add(kind, sprite)
+
+    def build_static_list(self) -> None:
+        """
+        Combine the sprites that never move into one list, so they're drawn in a single batch
+        """
+        self.static_list = SpriteList()
+        for sprite_list in (self.wall_list, self.death_list, self.win_list):
+            for sprite in sprite_list:
+                self.static_list.append(sprite)
+
+    def bake_static_layers(self) -> None:
+        """
+        Draw the static list into pages. Streamed maps are too large to bake, so their static list is drawn instead
+        """
+        if self.streamer is not None:
+            self.baked_layers.clear()
+            return
+        self.baked_layers.load(self.map_path, self.static_list, *self.map_size)
+
+    def create_physics_engine(self) -> PhysicsEngine:
+        """
+        Create the physics engine chosen by `PHYSICS_ENGINE`
+
+        Returns:
+            PhysicsEngine
+        """
+        if PHYSICS_ENGINE == "tile":
+            walls = CollisionGrid(TILE_WIDTH * 0.5)
+            spring_board_ids = {id(sprite) for sprite in self.spring_board_list}
+            walls.add_sprites(
+                [wall for wall in self.wall_list if id(wall) not in spring_board_ids]
+            )
+            walls.add_sprites(self.spring_board_list, SurfaceType.SPRINGBOARD)
+            return TilePhysicsEngine(self.player, walls, self.rising_tiles, GRAVITY)
+        return ArcadePhysicsEngine(
+            self.player,
+            self.contact_list,
+            self.spring_board_list,
+            self.rising_tiles,
+            GRAVITY,
+        )
+
+    def load_map(self, resource: str) -> None:
+        """
+        Load the maps from tmx files. Different layers are used for different types of objects.
+        """
         # Read the tmx file
         map = read_tmx(resource)
+        self.tile_hit_boxes = gid_hit_boxes(self.hit_boxes, resource)
+        self.process_map(map, LAYER_NAMES)
+
+    def process_map_layer(
+        self, map: "TileMap", layer_name: str, use_spatial_hash: bool = True
+    ) -> SpriteList:
+        """
+        Process a layer, returning a sprite list
+
+        Args:
+            map (TileMap): The map read from the tmx file
+            layer_name (str): The name of the layer
+            use_spatial_hash (bool, optional): If the sprite list should use a spatial hash. Defaults to True.
+
+        Returns:
+            SpriteList
+        """
+        if not self.tile_hit_boxes:
+            return process_layer(
+                map_object=map,
+                layer_name=layer_name,
+                use_spatial_hash=use_spatial_hash,
+                scaling=0.5,
+            )
 
-        # Process layers, returning a sprite list
-        spring_boards = process_layer(
+        # The textures get a plain rectangle, rather than tracing their outline, and are then given the precomputed hit box
+        sprite_list = process_layer(
             map_object=map,
-            layer_name=spring_layer_name,
-            use_spatial_hash=True,
+            layer_name=layer_name,
+            use_spatial_hash=use_spatial_hash,
             scaling=0.5,
+            hit_box_algorithm="None",
         )
-        start_marker_list = process_layer(
-            map_object=map,
-            layer_name=start_marker_layer_name,
-            use_spatial_hash=True,
-            scaling=0.5,
+        apply_tile_hit_boxes(
+            sprite_list,
+            TileGrid.from_layer(map, layer_name, 0.5),
+            self.tile_hit_boxes,
         )
+        return sprite_list
 
-        self.wall_list = process_layer(
-            map_object=map,
-            layer_name=tile_layer_name,
-            use_spatial_hash=True,
-            scaling=0.5,
-        )
+    def process_map(self, map: "TileMap", layer_names: Set[str]) -> None:
+        """
+        Create the sprite lists from the map's layers. Only the given layers, and the lists built from them, are processed
+        so that the map can be partly reloaded.
 
-        self.battery_list = process_layer(
-            map_object=map,
-            layer_name=battery_layer_name,
-            use_spatial_hash=True,
-            scaling=0.5,
-        )
+        Args:
+            map (TileMap): The map read from the tmx file
+            layer_names (Set[str]): The layers to process
+        """
+        if self.streamer is not None:
+            self.streamer.shutdown()
+            self.streamer = None
 
-        self.death_list = process_layer(
-            map_object=map,
-            layer_name=death_layer_name,
-            use_spatial_hash=True,
-            scaling=0.5,
-        )
+        if map.map_size.width * map.map_size.height >= STREAMING_MIN_TILES:
+            self.stream_map(map)
+            return
 
-        self.win_list = process_layer(
-            map_object=map,
-            layer_name=win_layer_name,
-            use_spatial_hash=True,
-            scaling=0.5,
-        )
+        for layer_name in LAYER_NAMES:
+            self.layer_data[layer_name] = self.read_layer_data(map, layer_name)
 
-        moving_up_list = process_layer(
-            map_object=map,
-            layer_name=moving_up_layer_name,
-            use_spatial_hash=False,
-            scaling=0.5,
+        if layer_names & WALL_LIST_LAYER_NAMES:
+            self.process_wall_layers(map)
+
+        if BATTERY_LAYER_NAME in layer_names:
+            self.battery_list = self.process_map_layer(map, BATTERY_LAYER_NAME)
+
+        if DEATH_LAYER_NAME in layer_names:
+            self.death_list = self.process_map_layer(map, DEATH_LAYER_NAME)
+
+        if WIN_LAYER_NAME in layer_names:
+            self.win_list = self.process_map_layer(map, WIN_LAYER_NAME)
+
+        if MOVING_UP_LAYER_NAME in layer_names:
+            moving_up_list = self.process_map_layer(
+                map, MOVING_UP_LAYER_NAME, use_spatial_hash=False
+            )
+            self.create_moving_up_generators(moving_up_list)
+
+        self.process_map_properties(map)
+
+    def create_moving_up_generators(self, moving_up_list: Iterable[Sprite]) -> None:
+        """
+        Create a generator for each sprite in the moving up layer
+
+        Args:
+            moving_up_list (Iterable[Sprite]): The moving up layer's sprites
+        """
+        self.static_moving_up_list = []
+        for moving_up in moving_up_list:
+            seconds_per_tile = 3
+            moving_tile_generator = MovingUpTileGenerator(
+                time_per_generation=seconds_per_tile, sprite=moving_up
+            )
+            self.static_moving_up_list.append(moving_tile_generator)
+
+    def process_map_properties(self, map: "TileMap") -> None:
+        """
+        Apply the properties of the whole map
+
+        Args:
+            map (TileMap): The map read from the tmx file
+        """
+        self.map_size = (
+            map.map_size.width * map.tile_size.width * 0.5,
+            map.map_size.height * map.tile_size.height * 0.5,
         )
+        # Keep the camera within the map
+        self.window.camera.set_bounds(*self.map_size)
+
+        if map.background_color:
+            set_background_color(map.background_color)
+
+        self.minimap.build(map, 0.5, MINIMAP_COLORS, BATTERY_LAYER_NAME)
+
+    def read_layer_data(self, map: "TileMap", layer_name: str) -> Any:
+        """
+        Get the tiles in a layer, used to see if the layer has changed
+
+        Args:
+            map (TileMap): The map read from the tmx file
+            layer_name (str): The name of the layer
+
+        Returns:
+            Any: The layer's tiles, or None if the layer doesn't exist
+        """
+        return getattr(get_tilemap_layer(map, layer_name), "layer_data", None)
+
+    def process_wall_layers(self, map: "TileMap") -> None:
+        """
+        Create the wall list from the walls, springboards and start marker
+
+        Args:
+            map (TileMap): The map read from the tmx file
+        """
+        spring_boards = self.process_map_layer(map, SPRING_LAYER_NAME)
+        start_marker_list = self.process_map_layer(map, START_MARKER_LAYER_NAME)
+        self.wall_list = self.process_map_layer(map, WALL_LAYER_NAME)
 
         # Process the marker and store it's coordinate
-        marker_list_len = len(start_marker_list)
-        if marker_list_len > 1 or marker_list_len < 1:
+        self.check_marker_count(len(start_marker_list))
+        # Since the length was checked above, there should be only one item.
+        marker_sprite = start_marker_list[0]
+        self.set_player_start_position(marker_sprite.center_x, marker_sprite.center_y)
+        # Add the sprite to the wall list
+        self.wall_list.append(marker_sprite)
+
+        for spring_board in spring_boards:
+            self.wall_list.append(spring_board)
+        self.spring_board_list = spring_boards
+
+    def check_marker_count(self, marker_count: int) -> None:
+        if marker_count > 1 or marker_count < 1:
             raise IncorrectNumberOfMarkers(
                 "There are too many markers in this level!"
-                f"Expected markers: 1, Markers: {len(start_marker_list)}"
+                f"Expected markers: 1, Markers: {marker_count}"
             )
-        # Since the length was checked above, there should be only one item.
-        marker_sprite = start_marker_list[0]
+
+    def set_player_start_position(self, marker_x: float, marker_y: float) -> None:
+        """
+        Store where the player should start, from the centre of the start marker
+
+        Args:
+            marker_x (float): The x of the centre of the marker
+            marker_y (float): The y of the centre of the marker
+        """
         # The player should start on the top of the tile, this stores the bottom x and bottom y of the start position.
         self.player_start_position = CoordinateTuple(
-            x=marker_sprite.center_x + TILE_HEIGHT / 2,
+            x=marker_x + TILE_HEIGHT / 2,
             # 100 is added to the y value because the pymunk physics engine takes a while to kick in
-            y=100 + marker_sprite.center_y - TILE_WIDTH / 2,
+            y=100 + marker_y - TILE_WIDTH / 2,
         )
-        # Add the sprite to the wall list
-        self.wall_list.append(marker_sprite)
 
-        for spring_board in spring_boards:
-            self.wall_list.append(spring_board)
-            self.spring_board_positions.append(
-                CoordinateTuple(
-                    x=spring_board.center_x - (spring_board.width / 2),
-                    y=spring_board.center_y + (spring_board.height / 2),
-                )
+    def stream_map(self, map: "TileMap") -> None:
+        """
+        Set up streaming for a large map. The sprite lists start empty, and are filled as the chunks near the camera are loaded
+
+        Args:
+            map (TileMap): The map read from the tmx file
+        """
+        self.wall_list = SpriteList(use_spatial_hash=True)
+        self.spring_board_list = SpriteList(use_spatial_hash=True)
+        self.battery_list = SpriteList(use_spatial_hash=True)
+        self.death_list = SpriteList(use_spatial_hash=True)
+        self.win_list = SpriteList(use_spatial_hash=True)
+        self.layer_data = {}
+
+        self.streamer = LevelStreamer(
+            map,
+            STREAMED_LAYER_NAMES,
+            0.5,
+            STREAMING_CHUNK_SIZE,
+            STREAMING_RADIUS,
+            self.tile_hit_boxes,
+        )
+        self.streamer.subscribe(self.on_chunk_loaded, self.on_chunk_unloaded)
+
+        markers = list(self.streamer.grids[START_MARKER_LAYER_NAME].cells())
+        self.check_marker_count(len(markers))
+        marker = markers[0]
+        tile_size = self.streamer.tile_size
+        self.set_player_start_position(
+            marker.column * tile_size + tile_size / 2,
+            marker.row * tile_size + tile_size / 2,
+        )
+
+        # The generators are few, so they're created from the layer the same way as for other maps
+        self.create_moving_up_generators(
+            self.process_map_layer(map, MOVING_UP_LAYER_NAME, use_spatial_hash=False)
+        )
+
+        self.process_map_properties(map)
+
+    def on_chunk_loaded(self, layer_name: str, sprites: List[Sprite]) -> None:
+        """
+        Add the sprites from a streamed chunk to the lists for their layer
+
+        Args:
+            layer_name (str): The layer the sprites are from
+            sprites (List[Sprite]): The sprites
+        """
+        if layer_name == BATTERY_LAYER_NAME:
+            # Batteries that are already in the game, such as dormant ones, are not added again
+            existing = {
+                (sprite.center_x, sprite.center_y) for sprite in self.battery_list
+            } | {
+                (dormant.sprite.center_x, dormant.sprite.center_y)
+                for dormant in self.power.dormant_sprites
+            }
+            for sprite in sprites:
+                if (sprite.center_x, sprite.center_y) not in existing:
+                    self.battery_list.append(sprite)
+                    self.collision_events.add(TriggerKind.BATTERY, sprite)
+            return
+        for sprite in sprites:
+            self.static_list.append(sprite)
+        if layer_name == DEATH_LAYER_NAME:
+            for sprite in sprites:
+                self.death_list.append(sprite)
+                self.collision_events.add(TriggerKind.DEATH, sprite)
+            return
+        if layer_name == WIN_LAYER_NAME:
+            for sprite in sprites:
+                self.win_list.append(sprite)
+                self.collision_events.add(TriggerKind.WIN, sprite)
+            return
+
+        # Everything else is part of the walls
+        for sprite in sprites:
+            self.wall_list.append(sprite)
+            if layer_name == SPRING_LAYER_NAME:
+                self.spring_board_list.append(sprite)
+        if isinstance(self.physics_engine, TilePhysicsEngine):
+            surface = (
+                SurfaceType.SPRINGBOARD
+                if layer_name == SPRING_LAYER_NAME
+                else SurfaceType.WALL
             )
+            self.physics_engine.walls.add_sprites(sprites, surface)
 
-        for moving_up in moving_up_list:
-            seconds_per_tile = 3
-            moving_tile_generator = MovingUpTileGenerator(
-                time_per_generation=seconds_per_tile, sprite=moving_up
+    def on_chunk_unloaded(self, layer_name: str, sprites: List[Sprite]) -> None:
+        """
+        Remove the sprites of a streamed chunk from every list
+
+        Args:
+            layer_name (str): The layer the sprites are from
+            sprites (List[Sprite]): The sprites
+        """
+        if layer_name == BATTERY_LAYER_NAME:
+            # A battery that was revived might not be the sprite that was loaded with the chunk
+            positions = {(sprite.center_x, sprite.center_y) for sprite in sprites}
+            for battery in list(self.battery_list):
+                if (battery.center_x, battery.center_y) in positions:
+                    self.battery_list.remove(battery)
+                    self.collision_events.remove(battery)
+        elif layer_name in WALL_LIST_LAYER_NAMES and isinstance(
+            self.physics_engine, TilePhysicsEngine
+        ):
+            surface = (
+                SurfaceType.SPRINGBOARD
+                if layer_name == SPRING_LAYER_NAME
+                else SurfaceType.WALL
             )
-            self.static_moving_up_list.append(moving_tile_generator)
+            for sprite in sprites:
+                self.physics_engine.walls.remove(sprite_box(sprite, surface))
 
-        if map.background_color:
-            set_background_color(map.background_color)
+        for sprite in sprites:
+            self.collision_events.remove(sprite)
+            sprite.remove_from_sprite_lists()
+
+    def hot_reload(self, changes: ChangesTuple) -> None:
+        """
+        Reprocess the layers affected by changed files. The player, power and moving sprites are kept as they are.
+        If the map is saved half written, or isn't a valid level, a warning is logged and the current level is kept.
+
+        Args:
+            changes (ChangesTuple): What changed
+        """
+        try:
+            self.reload_layers(changes)
+        except (
+            ElementTree.ParseError,
+            OSError,
+            ValueError,
+            IncorrectNumberOfMarkers,
+        ) as error:
+            logger.warning(
+                "Could not reload %s, keeping the current level: %s",
+                self.map_path,
+                error,
+            )
+            # Any layers that were read before the error are reprocessed on the next reload
+            self.layer_data = {}
+
+    def reload_layers(self, changes: ChangesTuple) -> None:
+        """
+        Read the map again, and reprocess the layers affected by changed files
+
+        Args:
+            changes (ChangesTuple): What changed
+
+        Raises:
+            IncorrectNumberOfMarkers: If the map doesn't have exactly one start marker
+        """
+        map = read_tmx(self.map_path)
+
+        # Streamed maps don't keep their layers around to compare against, so are always fully reloaded
+        changed_layers: Set[str] = set(LAYER_NAMES) if self.streamer else set()
+        for layer_name in LAYER_NAMES:
+            layer_data = self.read_layer_data(map, layer_name)
+            if layer_data != self.layer_data.get(layer_name):
+                changed_layers.add(layer_name)
+                continue
+            # Layers that use a changed tilesheet need their textures reloaded
+            for tileset in changes.tilesets:
+                if any(
+                    tileset.first_gid <= (gid & GID_MASK) < tileset.end_gid
+                    for row in layer_data or ()
+                    for gid in row
+                ):
+                    changed_layers.add(layer_name)
+                    break
+
+        if changed_layers & WALL_LIST_LAYER_NAMES:
+            # Checked before anything is replaced, so a map with a missing marker doesn't leave half a level
+            marker_data = self.read_layer_data(map, START_MARKER_LAYER_NAME)
+            self.check_marker_count(
+                sum(1 for row in marker_data or () for gid in row if gid)
+            )
+
+        if changes.tilesets:
+            # Otherwise the old textures would be loaded from the cache
+            cleanup_texture_cache()
+            # The precomputed hit boxes are out of date, so the outlines are traced instead
+            self.tile_hit_boxes = {}
+        self.process_map(map, changed_layers)
+
+        if BATTERY_LAYER_NAME in changed_layers:
+            self.power.replace_sprites(self.battery_list)
+        # The minimap was built again from the map, so the dormant batteries are hidden again
+        self.power.announce_batteries()
+        if changed_layers & {DEATH_LAYER_NAME, WIN_LAYER_NAME}:
+            self.register_triggers()
+        if MOVING_UP_LAYER_NAME in changed_layers:
+            self.rising_tiles.clear()
+        if changed_layers & WALL_LIST_LAYER_NAMES:
+            self.build_contact_list()
+            self.physics_engine = self.create_physics_engine()
+        if changed_layers & STATIC_LAYER_NAMES:
+            self.build_static_list()
+            if self.streamer is None:
+                # The static list is drawn until the edits stop and the pages are baked again
+                self.baked_layers.rebake(
+                    self.map_path, self.static_list, *self.map_size
+                )
 
     def calculate_jump_speed(self) -> int:
         """
@@ -299,61 +1006,114 @@ class GameView(View):
         Returns:
             int: The calculated jump speed
         """
-        for pos in self.spring_board_positions:
-            colliding_x = (
-                pos.x < self.player.center_x
-                and pos.x + TILE_WIDTH > self.player.center_x
+        if self.physics_engine.contacts.surface == SurfaceType.SPRINGBOARD:
+            self.particles.emit(
+                SPRINGBOARD_BURST, self.player.center_x, self.player.bottom
             )
-            colliding_y = (
-                pos.y < self.player.center_y
-                and pos.y + TILE_HEIGHT > self.player.center_y
-            )
-            if colliding_x and colliding_y:
-                return BOOSTED_PLAYER_JUMP_SPEED
+            return BOOSTED_PLAYER_JUMP_SPEED
 
         return PLAYER_JUMP_SPEED
 
+    def profile_memory(self, transition: str) -> None:
+        """
+        Snapshot the memory, if profiling is turned on
+
+        Args:
+            transition (str): What happened, eg "death"
+        """
+        if self.memory_profiler is not None:
+            self.memory_profiler.sample(f"{transition} level {self.level}")
+
     def death(self) -> None:
         """
         Display the death view
         """
-        self.inactive = True
+        self.profile_memory("death")
+        # The game over view draws the particles without scrolling, so the burst is placed on the screen
+        self.particles.clear()
+        self.particles.emit(
+            DEATH_BURST,
+            self.player.center_x - self.view_left,
+            self.player.center_y - self.view_bottom,
+        )
+        registry.counter("game_deaths_total", "Player deaths", level=self.level).inc()
+        self.level_deaths += 1
         self.window.game_over_view.setup(self.level)
         self.window.show_view(self.window.game_over_view)
 
     def win(self) -> None:
         """
-        Check if the player can win, and if so either increment the level or display the winning view
+        Finish the level, either incrementing the level or displaying the winning view
         """
-        if not self.power.has_power:
-            self.not_enough_power_label.show("")
-            return
+        self.profile_memory("win")
+        registry.histogram(
+            "game_level_seconds", "Time taken to finish a level", level=self.level
+        ).observe(self.level_time)
+        self.window.run_history.record(
+            self.level,
+            self.level_time,
+            self.level_deaths,
+            self.power.batteries_collected,
+            self.power.power_time_remaining,
+        )
+        self.level_deaths = 0
+        self.save_ghost()
         self.level += 1
         if self.level > MAX_LEVEL:
-            self.inactive = True
             self.window.winning_view.setup()
             self.window.show_view(self.window.winning_view)
             self.level = START_LEVEL
         else:
             self.setup()
 
-    def check_for_collision_with_death(self) -> bool:
+    def on_death_event(self, event: CollisionEventTuple) -> bool:
         """
-        Checks if the player is colliding with the death sprites
+        Kill the player when it touches a death sprite
+
+        Args:
+            event (CollisionEventTuple)
 
         Returns:
-            bool: result
+            bool: If the player died, so the other events are ignored
         """
-        return len(check_for_collision_with_list(self.player, self.death_list)) > 0
+        if event.event != CollisionEvent.ENTER:
+            return False
+        self.death()
+        return True
 
-    def check_for_collision_with_win(self) -> bool:
+    def on_win_event(self, event: CollisionEventTuple) -> bool:
         """
-        Checks if the player is colliding with the win sprites
+        Win when the player touches the flag with power. Without power the label is only shown
+        when the flag is first touched, rather than every update the player stays on it
+
+        Args:
+            event (CollisionEventTuple)
+
+        Returns:
+            bool: If the level was won, so the other events are ignored
+        """
+        if event.event == CollisionEvent.EXIT:
+            return False
+        if not self.power.has_power:
+            if event.event == CollisionEvent.ENTER:
+                self.not_enough_power_label.show("")
+            return False
+        self.win()
+        return True
+
+    def on_battery_event(self, event: CollisionEventTuple) -> bool:
+        """
+        Collect a battery when the player touches it
+
+        Args:
+            event (CollisionEventTuple)
 
         Returns:
-            bool: result
+            bool: Always False, collecting a battery doesn't stop the other events
         """
-        return len(check_for_collision_with_list(self.player, self.win_list)) > 0
+        if event.event == CollisionEvent.ENTER:
+            self.power.hit(event.trigger.sprite)
+        return False
 
     def update_moving_sprites(self, delta_time: float) -> None:
         """
@@ -364,76 +1124,25 @@ class GameView(View):
         """
         for moving_up in self.static_moving_up_list:
             moving_sprite = moving_up.update(
-                delta_time
+                delta_time * self.rising_spawn_rate
             )  # See if a new sprite should be generated
 
             if moving_sprite is not None:
-                moving_sprite.change_y = 3
-                self.moving_up_list.append(moving_sprite)
-                self.contact_list.append(moving_sprite)
-
-        # Check if sprites need to be removed
-        for moving_sprite in self.moving_up_list:
-            if (
-                moving_sprite.boundary_top
-                and moving_sprite.top > moving_sprite.boundary_top
-            ):
-                moving_sprite.remove_from_sprite_lists()
-                return
-            if (
-                moving_sprite.right > (WIDTH + self.view_left)
-                or moving_sprite.left < (self.view_left)
-                or moving_sprite.top > (HEIGHT + self.view_bottom)
-            ):
-                # The bottom is not included in the check because it starts below the view port
-                moving_sprite.remove_from_sprite_lists()
-                return
-            moving_sprite.update()
-
-    def update_scroll(self) -> None:
-        """
-        Scrolls the viewport if needed
-        """
-        changed = False
-
-        max_left_distance = self.view_left + VIEWPORT_MARGIN
-        if self.player.left < max_left_distance:
-            self.view_left -= max_left_distance - self.player.left
-            changed = True
-
-        max_left_distance = self.view_left + WIDTH - VIEWPORT_MARGIN
-        if self.player.right > max_left_distance:
-            self.view_left += self.player.right - max_left_distance
-            changed = True
-
-        max_bottom_distance = self.view_bottom + VIEWPORT_MARGIN
-        if self.player.bottom < max_bottom_distance:
-            self.view_bottom -= max_bottom_distance - self.player.bottom
-            changed = True
-
-        max_top_distance = self.view_bottom + HEIGHT - VIEWPORT_MARGIN
-        if self.player.top > max_top_distance:
-            self.view_bottom += self.player.top - max_top_distance
-            changed = True
-
-        if self.view_left <= 0:
-            self.view_left = 0
-        if self.view_bottom <= 0:
-            self.view_bottom = 0
-
-        # Ensure that the viewport will map exactly onto pixels on the sprites
-
-        self.view_left = int(self.view_left)
-        self.view_bottom = int(self.view_bottom)
-
-        # If we changed the boundary values, update the view port to match
-        if changed and not self.inactive:
-            set_viewport(
-                self.view_left,
-                WIDTH + self.view_left,
-                self.view_bottom,
-                HEIGHT + self.view_bottom,
-            )
+                self.rising_tiles.add(moving_sprite, change_y=3)
+
+        # Move the tiles, and remove those that have gone too far
+        self.rising_tiles.update(self.view_left, self.view_bottom)
+
+    def on_camera_changed(self, view_left: int, view_bottom: int) -> None:
+        """
+        Store the new position of the viewport, used when drawing labels and removing moving sprites
+
+        Args:
+            view_left (int)
+            view_bottom (int)
+        """
+        self.view_left = view_left
+        self.view_bottom = view_bottom
 
     def on_update(self, delta_time: float) -> None:
         """
@@ -442,6 +1151,31 @@ class GameView(View):
         Args:
             delta_time (float)
         """
+        update_start = perf_counter()
+        self.frame_time.observe(delta_time)
+        self.level_time += delta_time
+
+        if self.asset_watcher is not None:
+            changes = self.asset_watcher.poll()
+            if changes is not None:
+                self.hot_reload(changes)
+        self.baked_layers.update(delta_time)
+
+        # Move the player with the keys that are held
+        controls = self.input_state.tick(update_start)
+        self.player.change_x = controls.direction * PLAYER_MOVEMENT_SPEED
+        if controls.jump and self.physics_engine.contacts.grounded:
+            self.player.change_y = self.calculate_jump_speed()
+
+        # Load the parts of large maps that are near the camera
+        if self.streamer is not None:
+            self.streamer.update(
+                self.view_left + WIDTH / 2,
+                self.view_bottom + HEIGHT / 2,
+                self.player.change_x,
+                self.player.change_y,
+            )
+
         # Update various separate classes
         self.not_enough_power_label.update(delta_time)
         self.update_moving_sprites(delta_time)
@@ -450,65 +1184,111 @@ class GameView(View):
             physics_engine=self.physics_engine, delta_time=delta_time
         )
 
-        # Check if colliding with death sprites or off screen
-
+        # Check if off screen
         if (
-            self.check_for_collision_with_death()
-            or self.player.center_y < self.player.height - 300
+            self.player.center_y < self.player.height - 300
             or self.player.center_x <= self.player.width / 2
         ):
             self.death()
             return
 
         # Move viewport if needed
-        self.update_scroll()
+        self.window.camera.follow(self.player, delta_time)
+
+        self.particles.snow(
+            self.view_left, self.view_bottom, WIDTH, HEIGHT, SNOW_RATE, delta_time
+        )
+        self.particles.update(delta_time, self.view_bottom)
 
-        # Update physics objects
+        # Update physics objects, keeping how the player moved so nothing it moved past is missed
+        start_box = sprite_box(self.player)
+        start_x = self.player.center_x
+        start_y = self.player.center_y
         self.physics_engine.update()
+        change_x = self.player.center_x - start_x
+        change_y = self.player.center_y - start_y
+        # Both engines move the player vertically and then horizontally, so the triggers are swept the same way
+        vertical = MovementTuple(start_box, 0, change_y)
+        raised_box = start_box._replace(
+            bottom=start_box.bottom + change_y, top=start_box.top + change_y
+        )
+        horizontal = MovementTuple(raised_box, change_x, 0)
+        self.update_ghost()
+
+        # Send the collisions in the order they happened, if the player hit both death and the flag
+        # the first one hit counts
+        self.collision_events.update((vertical, horizontal))
 
-        # Check collisions
-        self.power.check_collision()
-        if self.check_for_collision_with_win():
-            self.win()
+        self.update_time = perf_counter() - update_start
 
     def on_key_press(self, key: int, modifiers: int) -> None:
         """
-        Handle jumping and movement
+        Record the key as held, the player is moved by it in the next update
 
         Args:
             key (int): The key that was pressed
             modifiers (int): Unused (arcade)
         """
-        if key == LEFT or key == A:
-            self.player.change_x = -PLAYER_MOVEMENT_SPEED
-        elif key == RIGHT or key == D:
-            self.player.change_x = PLAYER_MOVEMENT_SPEED
-        elif key == UP or W:
-            if self.physics_engine.can_jump():
-
-                self.player.change_y = self.calculate_jump_speed()
+        self.input_state.press(key, perf_counter())
 
     def on_key_release(self, key: int, modifiers: int) -> None:
         """
-        Stop player moving on key release
+        Record the key as released
 
         Args:
             key (int): The key that was released
             modifiers (int): Unused (arcade)
         """
-        if key == LEFT or key == A or key == RIGHT or key == D:
-            self.player.change_x = 0
+        self.input_state.release(key, perf_counter())
+
+    def on_hide_view(self) -> None:
+        """
+        The key releases go to the next view, so the keys are no longer known to be held
+        """
+        self.input_state.release_all()
 
     def on_draw(self) -> None:
         """
         Draw objects to screen
         The order is in a way that what needs to be on top is drawn last
         """
+        draw_start = perf_counter()
         start_render()
-        self.moving_up_list.draw()
-        self.wall_list.draw()
-        self.power.draw(self.view_left, self.view_bottom)
-        self.death_list.draw()
-        self.win_list.draw()
-        self.player.draw()
-        self.not_enough_power_label.draw(self.view_left, self.view_bottom)
+        queue = self.render_queue
+        queue.add(self.rising_tiles.draw, RenderLayer.RISING)
+        if self.baked_layers.pages:
+            for page in self.baked_layers.visible(
+                self.view_left, self.view_bottom, WIDTH, HEIGHT
+            ):
+                queue.add(partial(self.baked_layers.draw_page, page), RenderLayer.TILES)
+        else:
+            queue.add(self.static_list, RenderLayer.TILES)
+        self.power.queue_draw(queue, self.view_left, self.view_bottom)
+        if self.ghost_visible and self.ghost is not None:
+            # Behind the player
+            queue.add(self.ghost, RenderLayer.CHARACTERS, z=-1)
+        queue.add(self.player, RenderLayer.CHARACTERS)
+        # In front of the player
+        queue.add(self.particles.draw, RenderLayer.CHARACTERS, z=1)
+        queue.add(
+            lambda: self.minimap.draw(self.view_left, self.view_bottom, self.player),
+            RenderLayer.HUD,
+        )
+        queue.add(
+            lambda: self.not_enough_power_label.draw(self.view_left, self.view_bottom),
+            RenderLayer.HUD,
+        )
+        if self.draw_stats_label is not None:
+            draw_stats_label = self.draw_stats_label
+            draw_stats_label.set_value(
+                f"{queue.last_stats.draw_calls}, "
+                f"texture binds: {queue.last_stats.texture_binds}"
+            )
+            queue.add(
+                lambda: draw_stats_label.draw(self.view_left, self.view_bottom),
+                RenderLayer.HUD,
+            )
+        queue.flush()
+        self.input_state.frame_drawn(perf_counter())
+
+        self.quality.observe(self.update_time + perf_counter() - draw_start)
@@ -1,17 +1,13 @@
-from typing import TYPE_CHECKING, Callable, NamedTuple, Optional, Union
-
-from arcade import (
-    SpriteList,
-    View,
-    draw_text,
-    set_background_color,
-    set_viewport,
-    start_render,
-)
+from typing import TYPE_CHECKING, Callable, List, NamedTuple, Optional, Union
+
+from arcade import SpriteList, Texture, View, set_background_color, start_render
+from arcade.arcade_types import Color
 from arcade.color import WHITE
 from arcade.csscolor import DARK_SLATE_BLUE
 from arcade.sprite import Sprite
+from arcade.text import get_text_image
 
+from assets import assets
 from static_values import HEIGHT, WIDTH
 
 if TYPE_CHECKING:
@@ -20,29 +16,75 @@ if TYPE_CHECKING:
 
 class PageTuple(NamedTuple):
     title: str
-    message: Union[str, Callable[..., None]]
+    message: Union[str, Callable[..., List[Sprite]]]
     sprite_generator: Optional[Callable[..., SpriteList]]
 
 
+def create_text(
+    text: str,
+    start_x: float,
+    start_y: float,
+    color: Color,
+    font_size: float = 12,
+    anchor_x: str = "left",
+    anchor_y: str = "baseline",
+) -> Sprite:
+    """
+    Render text to a sprite, placed the same way `arcade.draw_text` places it.
+    `draw_text` returns a sprite from its cache, which moves whenever the same text is drawn somewhere else,
+    so the pages render their own.
+
+    Args:
+        text (str)
+        start_x (float)
+        start_y (float)
+        color (Color)
+        font_size (float, optional): Defaults to 12.
+        anchor_x (str, optional): "left", "center" or "right". Defaults to "left".
+        anchor_y (str, optional): "top", "center", "bottom" or "baseline". Defaults to "baseline".
+
+    Returns:
+        Sprite
+    """
+    image = get_text_image(text, color, font_size)
+    sprite = Sprite()
+    # Sprite lists share textures by name, text that renders the same can share one
+    sprite.texture = Texture(f"instruction text {text} {color} {font_size}", image)
+    # Placed by the size of the image, left and bottom would use the hit box, which leaves out the margins
+    if anchor_x == "left":
+        sprite.center_x = start_x + sprite.width / 2
+    elif anchor_x == "center":
+        sprite.center_x = start_x
+    else:
+        sprite.center_x = start_x - sprite.width / 2
+    if anchor_y == "top":
+        sprite.center_y = start_y - sprite.height / 2
+    elif anchor_y == "center":
+        sprite.center_y = start_y
+    else:
+        sprite.center_y = start_y + sprite.height / 2
+    return sprite
+
+
 """
 Functions below are in the format:
 
-draw_<pagename>_page_message -> Drawing the text for that instruction screen
+create_<pagename>_page_message -> Return the text sprites for that instruction screen
 generate_<pagename>_sprites -> Return a sprite list with the sprites for that instruction screen
 """
 
 
-def draw_gameplay_page_message() -> None:
+def create_gameplay_page_message() -> List[Sprite]:
     base_width = WIDTH / 2 - 300
     base_height = HEIGHT / 2 + 100
-    draw_text(
+    heading = create_text(
         ("Various items you'll encounter:"),
         base_width,
         base_height,
         WHITE,
         font_size=18,
     )
-    draw_text(
+    spring_board_text = create_text(
         (" - Allows you to jump higher, must be close to the centre of the board"),
         base_width + 35,
         base_height - 50,
@@ -50,32 +92,35 @@ def draw_gameplay_page_message() -> None:
         font_size=18,
         anchor_y="bottom",
     )
-    draw_text(
+    spike_text = create_text(
         (" - Touching this means instant death"),
         base_width + 35,
         base_height - 50 * 2,
         WHITE,
         font_size=18,
     )
+    return [heading, spring_board_text, spike_text]
 
 
 def generate_gameplay_sprites() -> SpriteList:
     sprite_list = SpriteList()
-    spring_board = Sprite("./assets/intro_single_sprites/spring_board.png", scale=0.25)
+    spring_board = Sprite(scale=0.25)
+    spring_board.texture = assets.load_texture("intro_single_sprites/spring_board.png")
     spring_board.center_x = (WIDTH / 2 - 300) + spring_board.width / 2
     spring_board.center_y = HEIGHT / 2 + 100 - 40
     sprite_list.append(spring_board)
-    spike = Sprite("./assets/intro_single_sprites/spike.png", scale=0.25)
+    spike = Sprite(scale=0.25)
+    spike.texture = assets.load_texture("intro_single_sprites/spike.png")
     spike.center_x = (WIDTH / 2 - 300) + spike.width / 2
     spike.center_y = HEIGHT / 2 + 100 - 35 - 50
     sprite_list.append(spike)
     return sprite_list
 
 
-def draw_power_page_message() -> None:
+def create_power_page_message() -> List[Sprite]:
     base_width = WIDTH / 2 - 300
     base_height = HEIGHT / 2 + 100
-    draw_text(
+    power_text = create_text(
         (
             "Power is required to pass each level. When power is 'collected' it will\n"
             "expire after a randomly generated amount of time, and will also\n"
@@ -90,11 +135,13 @@ def draw_power_page_message() -> None:
         font_size=18,
         anchor_y="center",
     )
+    return [power_text]
 
 
 def generate_power_sprites() -> SpriteList:
     sprite_list = SpriteList()
-    power = Sprite("./assets/intro_single_sprites/power.png", scale=2)
+    power = Sprite(scale=2)
+    power.texture = assets.load_texture("intro_single_sprites/power.png")
     power.center_x = WIDTH / 2
     power.center_y = HEIGHT / 2 - 40
     sprite_list.append(power)
@@ -113,22 +160,110 @@ pages = [
         ),
         None,
     ),
-    PageTuple("Items", draw_gameplay_page_message, generate_gameplay_sprites),
-    PageTuple("Power", draw_power_page_message, generate_power_sprites),
+    PageTuple("Items", create_gameplay_page_message, generate_gameplay_sprites),
+    PageTuple("Power", create_power_page_message, generate_power_sprites),
     PageTuple("Good luck!", "", None),
 ]
 
 
+class MaterialisedPage:
+    """
+    A page that has been built once for the session. The sprites are loaded and the text is rendered
+    when the page is created, so showing the page again doesn't load any files or lay out any text.
+    """
+
+    def __init__(self, index: int, page: PageTuple) -> None:
+        """
+        Load the sprites and render the text for the page
+
+        Args:
+            index (int): The index of the page in `pages`
+            page (PageTuple): The page to materialise
+        """
+        self.index = index
+        self.page = page
+        self.sprite_list: Optional[SpriteList] = (
+            page.sprite_generator() if page.sprite_generator else None
+        )
+        self.text_list = SpriteList()
+        for text_sprite in self.render_text():
+            self.text_list.append(text_sprite)
+
+    def render_text(self) -> List[Sprite]:
+        """
+        Render all of the text on this page
+
+        Returns:
+            List[Sprite]: The sprites that the text was rendered to
+        """
+        text_sprites = [
+            create_text(
+                f"Instructions #{self.index + 1}",
+                WIDTH / 2,
+                HEIGHT - 60,
+                WHITE,
+                font_size=35,
+                anchor_x="center",
+            ),
+            create_text(
+                self.page.title,
+                WIDTH / 2,
+                HEIGHT - 100,
+                WHITE,
+                font_size=25,
+                anchor_x="center",
+            ),
+        ]
+
+        # Allows for just string, or a more complicated function
+        if isinstance(self.page.message, str):
+            if self.page.message:
+                text_sprites.append(
+                    create_text(
+                        self.page.message,
+                        WIDTH / 2,
+                        HEIGHT / 2,
+                        WHITE,
+                        font_size=18,
+                        anchor_x="center",
+                    )
+                )
+        else:
+            text_sprites.extend(self.page.message())
+        text_sprites.append(
+            create_text(
+                "Click to advance",
+                WIDTH / 2,
+                75,
+                WHITE,
+                font_size=20,
+                anchor_x="center",
+            )
+        )
+        return text_sprites
+
+    def draw(self) -> None:
+        """
+        Draw the page
+        """
+        if self.sprite_list:
+            self.sprite_list.draw()
+        self.text_list.draw()
+
+
 class InstructionView(View):
     window: "GameWindow"
 
     def __init__(self) -> None:
         super().__init__()
+        # Every page is built once, so changing pages is just changing which one is drawn
+        self.materialised_pages = [
+            MaterialisedPage(index, page) for index, page in enumerate(pages)
+        ]
         # Stores the index of pages that the screen is currently on
-        self.set_page(0)
         self.current_page_index: int
-        self.current_page: PageTuple
-        self.sprite_list: Optional[SpriteList] = None
+        self.current_page: MaterialisedPage
+        self.set_page(0)
 
     def on_show(self) -> None:
         """This is run once when we switch to this view"""
@@ -139,8 +274,7 @@ class InstructionView(View):
     def setup(self) -> None:
         # Reset the viewport, necessary if we have a scrolling game and we need
         # to reset the viewport back to the start so we can see what we draw.
-        set_viewport(0, WIDTH - 1, 0, HEIGHT - 1)
-        self.sprite_list = None
+        self.window.camera.reset()
         self.set_page(0)
 
     def set_page(self, index: int) -> None:
@@ -151,54 +285,12 @@ class InstructionView(View):
             index (int): Which page to set to
         """
         self.current_page_index = index
-        self.current_page = pages[index]
-        if self.current_page.sprite_generator:
-            self.sprite_list = self.current_page.sprite_generator()
-        else:
-            self.sprite_list = None
+        self.current_page = self.materialised_pages[index]
 
     def on_draw(self) -> None:
         """Draw this view"""
         start_render()
-        if self.sprite_list:
-            self.sprite_list.draw()
-        draw_text(
-            f"Instructions #{self.current_page_index + 1}",
-            WIDTH / 2,
-            HEIGHT - 60,
-            WHITE,
-            font_size=35,
-            anchor_x="center",
-        )
-        draw_text(
-            self.current_page.title,
-            WIDTH / 2,
-            HEIGHT - 100,
-            WHITE,
-            font_size=25,
-            anchor_x="center",
-        )
-
-        # Allows for just string, or a more complicated function
-        if isinstance(self.current_page.message, str):
-            draw_text(
-                self.current_page.message,
-                WIDTH / 2,
-                HEIGHT / 2,
-                WHITE,
-                font_size=18,
-                anchor_x="center",
-            )
-        else:
-            self.current_page.message()
-        draw_text(
-            "Click to advance",
-            WIDTH / 2,
-            75,
-            WHITE,
-            font_size=20,
-            anchor_x="center",
-        )
+        self.current_page.draw()
 
     def start_game(self) -> None:
         """
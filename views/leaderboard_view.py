@@ -0,0 +1,102 @@
+from typing import TYPE_CHECKING, List
+
+from arcade import View, draw_text, start_render
+from arcade.color import WHITE
+
+from static_values import HEIGHT, WIDTH
+
+if TYPE_CHECKING:
+    from main import GameWindow
+
+# How many levels fit on the screen below the title
+LINES_PER_PAGE = 10
+
+
+class LeaderboardView(View):
+    """View to show the fastest times for each level that has been finished, a page at a time"""
+
+    def __init__(self) -> None:
+        """This is run once when we switch to this view"""
+        super().__init__()
+
+        self.window.set_mouse_visible(True)
+        # Make the mouse visible
+        self.window: "GameWindow"
+
+        # A line of text for each finished level
+        self.lines: List[str] = []
+        # The index of the first line on the current page
+        self.first_line = 0
+
+    def setup(self, count: int = 3) -> None:
+        """
+        Read the leaderboard, this is only done once rather than every draw
+
+        Args:
+            count (int, optional): How many of the fastest times to show for each level. Defaults to 3.
+        """
+        # Reset the viewport, necessary if we have a scrolling game and we need
+        # to reset the viewport back to the start so we can see what we draw.
+        self.window.camera.reset()
+
+        history = self.window.run_history
+        self.lines = []
+        self.first_line = 0
+        # Only the levels that have been finished, as there can be many generated levels
+        for level in history.levels():
+            times = ", ".join(
+                f"{run.seconds:.1f}s" for run in history.top(level, count)
+            )
+            median = history.percentile(level, 50)
+            median_text = f"{median:.1f}s" if median is not None else "-"
+            self.lines.append(f"Level {level}: {times}   Median: {median_text}")
+        if not self.lines:
+            self.lines.append("No levels finished yet")
+
+    @property
+    def last_page(self) -> bool:
+        return self.first_line + LINES_PER_PAGE >= len(self.lines)
+
+    def on_draw(self) -> None:
+        """Draw this view"""
+        start_render()
+        page = self.first_line // LINES_PER_PAGE + 1
+        pages = (len(self.lines) - 1) // LINES_PER_PAGE + 1
+        draw_text(
+            "Fastest times" if pages == 1 else f"Fastest times ({page}/{pages})",
+            WIDTH / 2,
+            HEIGHT - 150,
+            WHITE,
+            font_size=40,
+            anchor_x="center",
+        )
+        for index, line in enumerate(
+            self.lines[self.first_line : self.first_line + LINES_PER_PAGE]
+        ):
+            draw_text(
+                line,
+                WIDTH / 2,
+                HEIGHT - 220 - index * 50,
+                WHITE,
+                font_size=20,
+                anchor_x="center",
+            )
+        draw_text(
+            "Click to play again" if self.last_page else "Click for more times",
+            WIDTH / 2,
+            HEIGHT - 75,
+            WHITE,
+            font_size=20,
+            anchor_x="center",
+        )
+
+    def on_mouse_press(
+        self, _x: float, _y: float, _button: int, _modifiers: int
+    ) -> None:
+        """If the user presses the mouse button, show the next page or re-start the game."""
+        if not self.last_page:
+            self.first_line += LINES_PER_PAGE
+            return
+        game_view = self.window.game_view
+        game_view.setup()
+        self.window.show_view(game_view)
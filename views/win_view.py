@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from arcade import View, draw_text, set_viewport, start_render
+from arcade import View, draw_text, start_render
 from arcade.color import WHITE
 
 from static_values import HEIGHT, WIDTH
@@ -27,7 +27,7 @@ class GameWonView(View):
     def setup(self) -> None:
         # Reset the viewport, necessary if we have a scrolling game and we need
         # to reset the viewport back to the start so we can see what we draw.
-        set_viewport(0, WIDTH - 1, 0, HEIGHT - 1)
+        self.window.camera.reset()
         self.value = ""
         self.clock = 0
 
@@ -69,7 +69,7 @@ class GameWonView(View):
     def on_mouse_press(
         self, _x: float, _y: float, _button: int, _modifiers: int
     ) -> None:
-        """If the user presses the mouse button, re-start the game."""
-        game_view = self.window.game_view
-        game_view.setup()
-        self.window.show_view(game_view)
+        """If the user presses the mouse button, show the leaderboard."""
+        leaderboard_view = self.window.leaderboard_view
+        leaderboard_view.setup()
+        self.window.show_view(leaderboard_view)